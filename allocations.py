@@ -0,0 +1,205 @@
+"""
+Allocation counters for the hot path: how many Poses, pygame Surfaces and pygame.transform results each frame
+makes, and which function made them. Nothing is patched or hooked until an AllocationCounter is enabled, so the
+game runs exactly as fast without one.
+"""
+
+import json
+import os
+import sys
+import threading
+
+import pygame
+
+from primitives import Pose
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+PRIMITIVES = os.path.join(ROOT, "primitives.py")
+# Files whose functions build Poses for their callers, so the caller is counted instead
+POSE_HELPERS = {PRIMITIVES, os.path.join(ROOT, "pose_array.py"), os.path.join(ROOT, "allocations.py")}
+POSE_INIT = Pose.__init__.__code__
+OBJECT_NEW = object.__new__  # What Pose's operators call to skip __init__
+# Surface methods that return a new Surface
+SURFACE_METHODS = ("copy", "subsurface", "convert", "convert_alpha")
+
+SURFACE = pygame.Surface
+
+
+class AllocationCounter:
+    """
+    Counts allocations by kind ("Pose", "Surface", "Surface.copy", "transform.scale", ...) and by the function that
+    asked for them, e.g. "particle.Puff.draw", one frame at a time.
+
+    enable swaps pygame.Surface for a counting subclass, and sets a profile hook on this thread and on threads
+    started after it to catch Pose construction, Surface methods and pygame.transform calls, none of which can be
+    wrapped and unwrapped again. The hook slows everything down a lot, so time frames with no counter enabled; the
+    counts are what it's for. disable puts everything back as it was.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.current = {}  # (kind, site) to count so far this frame
+        self.totals = {}  # (kind, site) to count over every finished frame
+        self.peaks = {}  # (kind, site) to the most in any one frame
+        self.frames = 0
+        self.sites = {}  # Code object to its site name
+
+    def enable(self):
+        if self.enabled:
+            return
+        self.enabled = True
+        CountingSurface.counter = self
+        pygame.Surface = CountingSurface
+        sys.setprofile(self.profile)
+        threading.setprofile(self.profile)
+
+    def disable(self):
+        if not self.enabled:
+            return
+        self.enabled = False
+        pygame.Surface = SURFACE
+        sys.setprofile(None)
+        threading.setprofile(None)
+
+    def profile(self, frame, event, arg):
+        if not self.enabled:
+            return
+        if event == "call":
+            if frame.f_code is POSE_INIT:
+                self.count("Pose", pose_caller(frame))
+            return
+        if event != "c_call":
+            return
+        if arg is OBJECT_NEW:
+            if frame.f_code.co_filename == PRIMITIVES:
+                self.count("Pose", pose_caller(frame))
+        elif getattr(arg, "__module__", None) == "pygame.transform":
+            self.count("transform." + arg.__name__, frame)
+        elif arg.__name__ in SURFACE_METHODS and isinstance(getattr(arg, "__self__", None), SURFACE):
+            self.count("Surface." + arg.__name__, frame)
+
+    def count(self, kind, frame):
+        code = frame.f_code
+        site = self.sites.get(code)
+        if site is None:
+            site = self.sites[code] = site_name(code, frame)
+        with self.lock:
+            key = (kind, site)
+            self.current[key] = self.current.get(key, 0) + 1
+
+    def end_frame(self):
+        """ Called once per frame, after everything in it has run. """
+        with self.lock:
+            current, self.current = self.current, {}
+            self.frames += 1
+        for key, count in current.items():
+            self.totals[key] = self.totals.get(key, 0) + count
+            self.peaks[key] = max(self.peaks.get(key, 0), count)
+
+    def report(self):
+        """ Allocations per frame by kind, and by kind and site, busiest first. """
+        frames = max(self.frames, 1)
+        kinds = {}
+        for (kind, site), total in self.totals.items():
+            kinds[kind] = kinds.get(kind, 0) + total / frames
+        sites = [{"kind": kind, "site": site, "per_frame": total / frames, "max": self.peaks[(kind, site)],
+                  "total": total} for (kind, site), total in self.totals.items()]
+        sites.sort(key=lambda entry: (-entry["per_frame"], entry["kind"], entry["site"]))
+        return {"frames": self.frames, "kinds": dict(sorted(kinds.items(), key=lambda item: -item[1])),
+                "sites": sites}
+
+
+class SurfaceType(type):
+    """ Lets CountingSurface stand in for pygame.Surface in isinstance and issubclass. """
+
+    def __instancecheck__(cls, instance):
+        return isinstance(instance, SURFACE)
+
+    def __subclasscheck__(cls, subclass):
+        return issubclass(subclass, SURFACE)
+
+
+class CountingSurface(SURFACE, metaclass=SurfaceType):
+    """
+    Takes pygame.Surface's place while counting, and makes plain Surfaces. isinstance(x, pygame.Surface) still
+    holds for every Surface, however it was made.
+    """
+
+    counter = None
+
+    def __new__(cls, *args, **kwargs):
+        cls.counter.count("Surface", sys._getframe(1))
+        return SURFACE(*args, **kwargs)
+
+
+def pose_caller(frame):
+    """ The first frame outside the Pose helpers, counting out from frame. """
+    while frame.f_code.co_filename in POSE_HELPERS:
+        frame = frame.f_back
+    return frame
+
+
+def defining_class(code, frame):
+    """ The class whose method code is, found through the self or cls of the frame running it, if any. """
+    instance = frame.f_locals.get("self", frame.f_locals.get("cls"))
+    if instance is None:
+        return None
+    for cls in (instance if isinstance(instance, type) else type(instance)).__mro__:
+        function = cls.__dict__.get(code.co_name)
+        if getattr(getattr(function, "__func__", function), "__code__", None) is code:
+            return cls
+    return None
+
+
+def site_name(code, frame=None):
+    """
+    module.qualified_name of a function, the module relative to the repository root. Before Python 3.11, code
+    objects don't know their qualified name, so methods are named after the class of the frame's self or cls.
+    """
+    path = os.path.abspath(code.co_filename)
+    if path.startswith(ROOT + os.sep):
+        module = os.path.splitext(os.path.relpath(path, ROOT))[0].replace(os.sep, ".")
+    else:
+        module = os.path.splitext(os.path.basename(path))[0]
+    name = getattr(code, "co_qualname", None)
+    if name is None:
+        cls = defining_class(code, frame) if frame is not None else None
+        name = f"{cls.__qualname__}.{code.co_name}" if cls else code.co_name
+    return f"{module}.{name}"
+
+
+def save(report, path):
+    with open(path, "w") as file:
+        json.dump(report, file, indent=1)
+
+
+def load(path):
+    with open(path) as file:
+        return json.load(file)
+
+
+def regressions(report, baseline, tolerance=0.05):
+    """
+    Sites that allocate more per frame than they did in baseline, by more than tolerance of what they did, and
+    sites that didn't allocate at all in baseline, as lines of text.
+    """
+    before = {(entry["kind"], entry["site"]): entry["per_frame"] for entry in baseline["sites"]}
+    found = []
+    for entry in report["sites"]:
+        key = (entry["kind"], entry["site"])
+        if key not in before:
+            found.append(f"new: {entry['per_frame']:.2f} {entry['kind']} per frame in {entry['site']}")
+        elif entry["per_frame"] > before[key] * (1 + tolerance):
+            found.append(f"more: {entry['per_frame']:.2f} {entry['kind']} per frame in {entry['site']}, "
+                         f"was {before[key]:.2f}")
+    return found
+
+
+def print_report(report, limit=25):
+    print(f"Allocations over {report['frames']} frames")
+    for kind, per_frame in report["kinds"].items():
+        print(f"  {per_frame:9.2f} per frame  {kind}")
+    print("Busiest sites")
+    for entry in report["sites"][:limit]:
+        print(f"  {entry['per_frame']:9.2f} per frame, at most {entry['max']:4}  {entry['kind']:<20} {entry['site']}")
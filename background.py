@@ -1,20 +1,26 @@
 import pygame
 import math
-from camera import Camera
 import constants as c
 from primitives import Pose
-import random
+
+TILE_SIZE = (200, 200)
+CLOUD_PATHS = [f"assets/images/cloud {num}.png" for num in range(1, 10)]
 
 
 class Cloud:
 
-    def __init__(self, surf, position=(0, 0)):
+    state_attributes = ()
+    pose_attributes = ("position",)
+    sprite_attributes = ()
+
+    def __init__(self, surf, camera, position=(0, 0)):
         self.surf = surf
+        self.camera = camera
         self.position = Pose(position)
         self.velocity = Pose((-20, 0))
 
     def update(self, dt, events):
-        self.position += self.velocity*dt
+        self.position.add_pose(self.velocity, dt)
 
     def draw(self, surface, offset=(0, 0)):
         w = self.surf.get_width()
@@ -27,40 +33,72 @@ class Cloud:
         if y < -h or y > c.WINDOW_HEIGHT:
             return
 
-        in_world = Camera.screen_to_world(self.position.get_position())
+        in_world = self.camera.screen_to_world(self.position.get_position())
         if w//2 < in_world.x < c.ARENA_WIDTH - w//2:
             if h//2 < in_world.y < c.ARENA_HEIGHT - h//2:
                 return
 
         surface.blit(self.surf, (x, y))
 
+
+def cut_tiles(images):
+    """ The background image cut into rows of TILE_SIZE tiles. """
+    surf = images.load("assets/images/background.png")
+    tiles_wide = math.ceil(surf.get_width()/TILE_SIZE[0])
+    tiles_high = math.ceil(surf.get_height()/TILE_SIZE[1])
+    tiles = []
+    for y in range(tiles_high):
+        row = []
+        ypix = y * TILE_SIZE[1]
+        for x in range(tiles_wide):
+            xpix = x * TILE_SIZE[0]
+            tile_surf = pygame.Surface(TILE_SIZE)
+            tile_surf.fill((255, 0, 255))
+            tile_surf.blit(surf,(0, 0),(xpix, ypix, TILE_SIZE[0], TILE_SIZE[1]))
+            row.append(tile_surf)
+            tile_surf.set_colorkey((255, 0, 255))
+        tiles.append(row)
+    return tiles
+
+
+def cloud_image(images, path):
+    """ A cloud, shrunk and faded the way the background draws it. Every cloud made from path shares it. """
+    def build():
+        image = images.load(path)
+        image = pygame.transform.scale(image, (image.get_width()*0.5, image.get_height()*0.5))
+        image.set_colorkey((255, 0, 195))
+        image.set_alpha(100)
+        return image
+    return images.get(("cloud", path), build)
+
+
+def warm_up(images):
+    """ Builds everything a Background uses ahead of time, one step per surface, for an IdleScheduler. """
+    for path in CLOUD_PATHS:
+        cloud_image(images, path)
+        yield
+    images.load("assets/images/distant_background.png")
+    yield
+    images.get("background tiles", lambda: cut_tiles(images))
+
+
 class Background:
 
-    def __init__(self):
-        surf = pygame.image.load("assets/images/background.png")
-        self.background_background = pygame.image.load("assets/images/distant_background.png")
-        self.tile_size = (200, 200)
-        self.cloud_images = [
-            pygame.image.load(f"assets/images/cloud {num}.png") for num in range(1,10)
-        ]
+    state_attributes = ("since_cloud",)
+    pose_attributes = ()
+    sprite_attributes = ()
+
+    def __init__(self, world):
+        self.rng = world.rng.cosmetic
+        self.camera = world.camera
+        self.background_background = world.images.load("assets/images/distant_background.png")
+        self.tile_size = TILE_SIZE
+        self.cloud_images = [cloud_image(world.images, path) for path in CLOUD_PATHS]
         self.clouds = []
 
         self.since_cloud = 0
-        tile_size = self.tile_size
-        tiles_wide = math.ceil(surf.get_width()/tile_size[0])
-        tiles_high = math.ceil(surf.get_height()/tile_size[1])
-        self.tiles = []
-        for y in range(tiles_high):
-            row = []
-            ypix = y * tile_size[1]
-            for x in range(tiles_wide):
-                xpix = x * tile_size[0]
-                tile_surf = pygame.Surface(tile_size)
-                tile_surf.fill((255, 0, 255))
-                tile_surf.blit(surf,(0, 0),(xpix, ypix, tile_size[0], tile_size[1]))
-                row.append(tile_surf)
-                tile_surf.set_colorkey((255, 0, 255))
-            self.tiles.append(row)
+        self.tiles = world.images.get("background tiles", lambda: cut_tiles(world.images))
+        # Cheap once the clouds are built: the cloud images are shared, so this only moves clouds into place
         for i in range(120):
             self.update(1, [])
 
@@ -82,11 +120,8 @@ class Background:
         self.since_cloud += dt
         while self.since_cloud > 5:
             self.since_cloud -= 5
-            image = random.choice(self.cloud_images)
-            image = pygame.transform.scale(image, (image.get_width()*0.5, image.get_height()*0.5))
-            image.set_colorkey((255, 0, 195))
-            image.set_alpha(100)
-            self.clouds.append(Cloud(image, (c.WINDOW_WIDTH, random.random() * c.WINDOW_HEIGHT)))
+            image = self.rng.choice(self.cloud_images)
+            self.clouds.append(Cloud(image, self.camera, (c.WINDOW_WIDTH, self.rng.random() * c.WINDOW_HEIGHT)))
         for cloud in self.clouds[:]:
             cloud.update(dt, events)
             if cloud.position.x < -500:
@@ -0,0 +1,206 @@
+"""
+Plays many headless matches across all CPU cores, each with its own seed and scripted input, and collects how
+long every tick took, how many objects were alive at the peak and how each match ended into one report.
+
+    python batch.py --matches 200 --report nightly.json
+    python batch.py --matches 32 --script idle --ticks 3600 --jobs 8
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import constants as c
+from bot import BotInput
+from enemy import Grunt
+from frame import GameFrame
+from game import Game
+from input_state import GatlingSpray, IdleInput
+from stats import PERCENTILES, distribution
+
+# Input sources a match can be played with, by the name given on the command line, each made from the match's seed
+scripts = {
+    "bot": BotInput,
+    "spray": lambda seed: GatlingSpray(),
+    "idle": lambda seed: IdleInput(),
+}
+
+BUCKET_MS = 0.5  # Histogram resolution
+BUCKETS = 200  # The last bucket holds everything slower than BUCKETS * BUCKET_MS
+
+
+def histogram(times):
+    counts = [0] * BUCKETS
+    for duration in times:
+        counts[min(BUCKETS - 1, int(duration * 1000 / BUCKET_MS))] += 1
+    return counts
+
+
+def histogram_percentile(counts, pct):
+    """ Upper edge, in milliseconds, of the bucket holding the given percentile. """
+    target = sum(counts) * pct / 100
+    seen = 0
+    for bucket, count in enumerate(counts):
+        seen += count
+        if seen >= target:
+            return (bucket + 1) * BUCKET_MS
+    return BUCKETS * BUCKET_MS
+
+
+def entity_counts(frame):
+    return {
+        "enemies": len(frame.enemies),
+        "grunts": sum(1 for enemy in frame.enemies if isinstance(enemy, Grunt)),
+        "projectiles": len(frame.projectiles),
+        "particles": len(frame.particles),
+    }
+
+
+def outcome(frame):
+    if frame.boss_dead:
+        return "boss defeated"
+    if frame.player.dead:
+        return "player died"
+    return "timed out"
+
+
+def run_match(seed, ticks, script="bot", render_every=0):
+    """
+    Plays one match until the boss or the player dies, or for ticks ticks. Runs in a worker process, so takes and
+    returns plain data.
+    """
+    game = Game(headless=True, fast_forward=True, render_every=render_every, seed=seed,
+                input_source=scripts[script](seed))
+    frame = GameFrame(game)
+    frame.load()
+
+    step_times = []
+    render_times = []
+    peaks = {}
+    slowest = (0, 0)
+    tick = 0
+    start = time.perf_counter()
+    while tick < ticks and not (frame.boss_dead or frame.player.dead):
+        step_start = time.perf_counter()
+        frame.step(c.TICK_DT, [])
+        step_time = time.perf_counter() - step_start
+        step_times.append(step_time)
+        if step_time > slowest[0]:
+            slowest = (step_time, tick)
+        if render_every and tick % render_every == 0:
+            render_start = time.perf_counter()
+            frame.render(game.screen)
+            render_times.append(time.perf_counter() - render_start)
+
+        for name, count in entity_counts(frame).items():
+            if name not in peaks or count > peaks[name]["count"]:
+                peaks[name] = {"count": count, "tick": tick}
+        tick += 1
+
+    game.input_source.close()
+    return {
+        "seed": seed,
+        "script": script,
+        "outcome": outcome(frame),
+        "ticks": tick,
+        "game_time": tick * c.TICK_DT,
+        "wall_time": time.perf_counter() - start,
+        "boss_health": frame.boss.health,
+        "player_health": frame.player.health,
+        "step_ms": distribution(step_times),
+        "step_histogram": histogram(step_times),
+        "slowest_tick": {"tick": slowest[1], "ms": slowest[0] * 1000},
+        "render_ms": distribution(render_times),
+        "peaks": peaks,
+    }
+
+
+def summarize(matches):
+    """ Combines per match results into totals across the whole batch. """
+    outcomes = {}
+    for match in matches:
+        outcomes[match["outcome"]] = outcomes.get(match["outcome"], 0) + 1
+
+    counts = [0] * BUCKETS
+    for match in matches:
+        counts = [total + count for total, count in zip(counts, match["step_histogram"])]
+
+    peaks = {}
+    for match in matches:
+        for name, peak in match["peaks"].items():
+            if name not in peaks or peak["count"] > peaks[name]["count"]:
+                peaks[name] = {"count": peak["count"], "tick": peak["tick"], "seed": match["seed"]}
+
+    return {
+        "matches": len(matches),
+        "ticks": sum(match["ticks"] for match in matches),
+        "outcomes": outcomes,
+        "step_ms": {f"p{pct:g}": histogram_percentile(counts, pct) for pct in PERCENTILES},
+        "peaks": peaks,
+        "worst_p99": sorted(({"seed": match["seed"], "ms": match["step_ms"].get("p99", 0)} for match in matches),
+                            key=lambda worst: -worst["ms"])[:5],
+    }
+
+
+def run_batch(seeds, ticks, script="bot", render_every=0, jobs=None, progress=None):
+    """ Plays a match for every seed across a pool of worker processes, and returns the report. """
+    matches = []
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(run_match, seed, ticks, script, render_every) for seed in seeds]
+        for future in as_completed(futures):
+            matches.append(future.result())
+            if progress:
+                progress(matches[-1], len(matches), len(futures))
+    matches.sort(key=lambda match: match["seed"])
+    return {
+        "config": {"ticks": ticks, "script": script, "render_every": render_every, "tick_rate": c.TICK_RATE},
+        "summary": summarize(matches),
+        "matches": matches,
+    }
+
+
+def print_progress(match, done, total):
+    print(f"[{done}/{total}] seed {match['seed']}: {match['outcome']} after {match['ticks']} ticks, "
+          f"p99 {match['step_ms'].get('p99', 0):.2f} ms, peak {match['peaks']['grunts']['count']} grunts")
+
+
+def print_summary(summary):
+    print(f"\n{summary['matches']} matches, {summary['ticks']} ticks")
+    for name, count in sorted(summary["outcomes"].items()):
+        print(f"  {name}: {count}")
+    print("Tick time: " + ", ".join(f"{name} <= {ms:g} ms" for name, ms in summary["step_ms"].items()))
+    for name, peak in summary["peaks"].items():
+        print(f"Peak {name}: {peak['count']} (seed {peak['seed']}, tick {peak['tick']})")
+    print("Worst p99 tick times: " + ", ".join(f"seed {worst['seed']} {worst['ms']:.2f} ms"
+                                               for worst in summary["worst_p99"]))
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser(description="Play many headless Six Shooter matches in parallel.")
+    parser.add_argument("--matches", type=int, default=os.cpu_count(), help="number of matches (default one per CPU)")
+    parser.add_argument("--first-seed", type=int, default=0, help="seed of the first match; the rest count up")
+    parser.add_argument("--ticks", type=int, default=c.TICK_RATE * 60 * 5,
+                        help="longest a match may run, in ticks (default five minutes of game time)")
+    parser.add_argument("--script", choices=sorted(scripts), default="bot", help="scripted input to play with")
+    parser.add_argument("--render-every", type=int, default=0,
+                        help="draw every Nth tick offscreen and time it too (default 0, never draw)")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default one per CPU)")
+    parser.add_argument("--report", metavar="PATH", help="write the full report to PATH as JSON")
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    args = parse_args(args)
+    seeds = range(args.first_seed, args.first_seed + args.matches)
+    report = run_batch(seeds, args.ticks, script=args.script, render_every=args.render_every, jobs=args.jobs,
+                       progress=print_progress)
+    print_summary(report["summary"])
+    if args.report:
+        with open(args.report, "w") as file:
+            json.dump(report, file, indent=1)
+
+
+if __name__ == "__main__":
+    main()
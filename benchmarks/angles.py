@@ -0,0 +1,124 @@
+"""
+Times the angle helpers in angles.py against the code they replaced: easing the player's aim, drawing sparks,
+making and drawing muzzle flashes, and the sine table. The batch rows need numpy.
+
+    python -m benchmarks.angles
+"""
+
+import math
+import random
+
+import pygame
+
+import angles
+import constants as c
+from benchmarks.common import best_time, make_frame
+from particle import MuzzleFlash, SparkParticle
+from render_list import DrawList
+
+
+def old_shortest_difference(a, b):
+    da = a - b
+    da2 = a + 360 - b
+    da3 = a - 360 - b
+    return (sorted([da, da2, da3], key=lambda x: abs(x)))[0]
+
+
+def old_spark_draw(spark, surf, offset=(0, 0)):
+    corners = [[3, 0], [0, -0.25], [-2, 0], [0, 0.25]]
+    angle = math.atan2(spark.velocity.y, spark.velocity.x)
+    scale = spark.scale * (1 - spark.through())
+    for corner in corners:
+        original_angle = math.atan2(corner[1], corner[0])
+        new_angle = angle - original_angle
+        mag = math.sqrt(corner[0]**2 + corner[1]**2)
+        mag *= scale
+        corner[0] = math.cos(new_angle) * mag
+        corner[1] = math.sin(new_angle) * mag
+        corner[0] += spark.position.x - offset[0]
+        corner[1] += spark.position.y - offset[1]
+    color = tuple([spark.color[i] * spark.through() + 255 * (1 - spark.through()) for i in range(3)])
+    surf.polygon(color, corners)
+
+
+def old_muzzle_flash(world, angle, surf):
+    flash = pygame.transform.rotate(world.images.load("assets/images/muzzle_flash.png"), angle)
+    flash.set_colorkey((255, 0, 255))
+    for i in range(3):
+        my_surf = pygame.transform.scale(flash, (flash.get_width() * 1.4, flash.get_height() * 1.4))
+        my_surf.set_alpha(200)
+        surf.blit(my_surf, (0, 0))
+
+
+def new_muzzle_flash(world, angle, surf):
+    flash = MuzzleFlash((0, 0), world, angle)
+    for i in range(3):
+        flash.draw(surf)
+
+
+def report(name, old, new, unit=1e6, label="us"):
+    print(f"{name:>28}: {old * unit:8.2f} {label} before, {new * unit:8.2f} {label} after ({old / new:.1f}x)")
+
+
+def main(seed=0):
+    rng = random.Random(seed)
+    frame = make_frame(seed)
+    world = frame.world
+
+    pairs = [(rng.uniform(0, 360), rng.uniform(-180, 180)) for _ in range(1000)]
+    assert all(angles.shortest_difference(a, b) == old_shortest_difference(a, b) for a, b in pairs)
+    report("shortest difference x1000",
+           best_time(lambda: [old_shortest_difference(a, b) for a, b in pairs]),
+           best_time(lambda: [angles.shortest_difference(a, b) for a, b in pairs]))
+
+    sparks = [SparkParticle((rng.uniform(0, 1000), rng.uniform(0, 1000)), world) for _ in range(200)]
+    old_list = DrawList(c.WINDOW_SIZE)
+    new_list = DrawList(c.WINDOW_SIZE)
+    for spark in sparks:
+        old_spark_draw(spark, old_list)
+        spark.draw(new_list)
+    assert old_list.commands == new_list.commands
+    report("spark draw x200",
+           best_time(lambda: [old_spark_draw(spark, DrawList(c.WINDOW_SIZE)) for spark in sparks]),
+           best_time(lambda: [spark.draw(DrawList(c.WINDOW_SIZE)) for spark in sparks]))
+    exact = best_time(lambda: [spark.draw(DrawList(c.WINDOW_SIZE)) for spark in sparks])
+    angles.use_table()
+    report("spark draw x200, sine table", exact,
+           best_time(lambda: [spark.draw(DrawList(c.WINDOW_SIZE)) for spark in sparks]))
+    angles.use_table(0)
+
+    screen = pygame.Surface(c.WINDOW_SIZE)
+    flash_angles = [rng.uniform(0, 360) for _ in range(20)]
+    for angle in range(0, 360, 5):
+        MuzzleFlash((0, 0), world, angle)  # Time the flashes once the cache is warm, as the idle warm up leaves it
+    report("muzzle flash, 3 draws x20",
+           best_time(lambda: [old_muzzle_flash(world, angle, screen) for angle in flash_angles], number=10),
+           best_time(lambda: [new_muzzle_flash(world, angle, screen) for angle in flash_angles], number=10),
+           unit=1e3, label="ms")
+
+    radians = [rng.uniform(-2 * math.pi, 2 * math.pi) for _ in range(1000)]
+    table = angles.SinCosTable()
+    report("cos and sin x1000",
+           best_time(lambda: [(math.cos(angle), math.sin(angle)) for angle in radians]),
+           best_time(lambda: [table.cos_sin(angle) for angle in radians]))
+    worst = max(abs(table.cos_sin(angle)[1] - math.sin(angle)) for angle in radians)
+    print(f"{'':>28}  table error at most {worst:.1e}")
+
+    try:
+        import numpy as np
+    except ImportError:
+        print("numpy is not installed, skipping the batch versions")
+        return
+    a = np.array([pair[0] for pair in pairs])
+    b = np.array([pair[1] for pair in pairs])
+    assert angles.shortest_differences(a, b).tolist() == [old_shortest_difference(*pair) for pair in pairs]
+    report("shortest differences x1000",
+           best_time(lambda: [angles.shortest_difference(x, y) for x, y in pairs]),
+           best_time(lambda: angles.shortest_differences(a, b)))
+    report("cos and sin many x1000",
+           best_time(lambda: [(math.cos(angle), math.sin(angle)) for angle in radians]),
+           best_time(lambda: angles.cos_sin_many(radians)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Replays one recorded frame of a busy gatling fight onto the screen split into 1, 2, 4 and 8 bands, checks every
+split draws the same pixels, and checks whether pygame lets other threads run during a blit, which is what the
+bands need to draw at the same time.
+
+    python -m benchmarks.band_render
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pygame
+
+import constants as c
+from benchmarks.common import gatling_scenario, best_time, entity_counts
+from render_list import BandRenderer, DrawList
+
+BANDS = (1, 2, 4, 8)
+
+
+def blit_releases_gil():
+    """ True if the main thread can take the GIL while another thread is in the middle of blitting. """
+    source = pygame.Surface(c.WINDOW_SIZE, pygame.SRCALPHA)
+    target = pygame.Surface(c.WINDOW_SIZE)
+    done = threading.Event()
+
+    def blit_forever():
+        while not done.is_set():
+            target.blit(source, (0, 0))
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(0.5)
+    worker = threading.Thread(target=blit_forever)
+    worker.start()
+    start = time.perf_counter()
+    time.sleep(0.001)  # Comes back promptly only if the worker lets go of the GIL while blitting
+    waited = time.perf_counter() - start
+    done.set()
+    worker.join()
+    sys.setswitchinterval(interval)
+    return waited < 0.25
+
+
+def main():
+    frame = gatling_scenario()
+    print(entity_counts(frame))
+    draw_list = DrawList(c.WINDOW_SIZE)
+    frame.render(draw_list)
+    print(f"{len(draw_list.commands)} commands, {os.cpu_count()} CPUs, "
+          f"blits release the GIL: {blit_releases_gil()}")
+
+    expected = None
+    for bands in BANDS:
+        screen = pygame.Surface(c.WINDOW_SIZE)
+        renderer = BandRenderer(screen, bands)
+        elapsed = best_time(lambda: renderer.replay(draw_list), number=20)
+        renderer.close()
+        pixels = pygame.image.tobytes(screen, "RGB")
+        if expected is None:
+            expected = pixels
+        print(f"{bands} bands: {elapsed * 1000:.2f} ms, same pixels: {pixels == expected}")
+
+
+if __name__ == "__main__":
+    main()
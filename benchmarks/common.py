@@ -0,0 +1,62 @@
+"""
+Shared setup for the benchmark scripts. Run them from the repository root, e.g.
+
+    python -m benchmarks.snapshot_restore
+"""
+
+import math
+import time
+
+import constants as c
+from enemy import Grunt
+from frame import GameFrame
+from game import Game
+from input_state import GatlingSpray
+from primitives import Pose
+
+
+def make_frame(seed=0, input_source=None):
+    """ A loaded, headless GameFrame. """
+    game = Game(headless=True, fast_forward=True, render_every=0, seed=seed,
+                input_source=input_source if input_source else GatlingSpray())
+    frame = GameFrame(game)
+    frame.load()
+    return frame
+
+
+def gatling_scenario(seed=0, grunts=15, warmup_ticks=120):
+    """
+    A GameFrame with the player holding the gatling gun and firing into a ring of grunts, warmed up until bullets,
+    casings and sparks are in flight.
+    """
+    frame = make_frame(seed)
+    frame.player.weapon_mode = c.GATLING
+    frame.player.since_damage = -10**9  # Never take contact damage, which would also wipe out the grunts
+    for i in range(grunts):
+        angle = i / grunts * math.pi * 2
+        position = frame.player.position + Pose((math.cos(angle), math.sin(angle))) * 500
+        frame.enemies.append(Grunt(position.get_position(), frame))
+    step(frame, warmup_ticks)
+    return frame
+
+
+def step(frame, ticks):
+    for i in range(ticks):
+        frame.step(c.TICK_DT, [])
+
+
+def best_time(function, number=100, repeat=5):
+    """ Seconds per call of function, taking the best of several batches to skip past noise. """
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        for j in range(number):
+            function()
+        elapsed = (time.perf_counter() - start) / number
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def entity_counts(frame):
+    return f"{len(frame.enemies)} enemies, {len(frame.projectiles)} projectiles, {len(frame.particles)} particles"
@@ -0,0 +1,143 @@
+"""
+Compares GameFrame's EntityStores with the plain lists they replaced: churning thousands of short lived entities
+through an update, and the enemy collision passes with more and more grunts on the field.
+
+    python -m benchmarks.entity_store
+"""
+
+import math
+import random
+import statistics
+import time
+
+import constants as c
+from benchmarks.common import best_time, gatling_scenario
+from entity_store import EntityStore
+from primitives import Pose
+
+
+class Dot:
+    """ A particle with nothing to draw: moves, ages and is destroyed at the end of its lifetime. """
+
+    def __init__(self, rng):
+        self.position = Pose((rng.uniform(0, 1000), rng.uniform(0, 1000)))
+        self.velocity = Pose((rng.uniform(-100, 100), rng.uniform(-100, 100)))
+        self.lifetime = rng.uniform(0.1, 1)
+        self.age = 0
+        self.destroyed = False
+
+    def update(self, dt, events):
+        self.position.add_pose(self.velocity, dt)
+        self.age += dt
+        self.destroyed = self.age > self.lifetime
+
+
+def churn_list(dots, rng, spawn):
+    keep = []
+    for dot in dots:
+        dot.update(c.TICK_DT, [])
+        if not dot.destroyed:
+            keep.append(dot)
+    keep += [Dot(rng) for _ in range(spawn)]
+    return keep
+
+
+def churn_store(dots, rng, spawn):
+    dots.update(c.TICK_DT, [])
+    dots.extend(Dot(rng) for _ in range(spawn))
+    return dots
+
+
+def alternating_times(old, new, number=100):
+    """
+    Median seconds per call of old and of new, calling them in turns. Both populations grow in the same process,
+    so timing one after the other lets whichever goes second pay for the other's garbage.
+    """
+    old_times, new_times = [], []
+    for i in range(number):
+        for function, times in ((old, old_times), (new, new_times)):
+            start = time.perf_counter()
+            function()
+            times.append(time.perf_counter() - start)
+    return statistics.median(old_times), statistics.median(new_times)
+
+
+def old_projectile_collisions(frame):
+    for enemy in frame.enemies:
+        for projectile in frame.projectiles:
+            dx = enemy.position.x - projectile.position.x
+            dy = enemy.position.y - (projectile.position.y + projectile.z)
+            if math.sqrt(dx*dx + dy*dy) < enemy.radius + projectile.radius:
+                enemy.get_hit_by(projectile)
+
+
+def old_enemy_collisions(frame, dt):
+    enemies = list(frame.enemies)
+    for i, enemy in enumerate(enemies):
+        for j, enemy2 in enumerate(enemies):
+            if j <= i:
+                continue
+            dx = enemy.position.x - enemy2.position.x
+            dy = enemy.position.y - enemy2.position.y
+            dist = math.sqrt(dx*dx + dy*dy)
+            if dist < enemy.radius + enemy2.radius:
+                overlap_amt = enemy.radius + enemy2.radius - dist
+                overlap_vec = enemy.position - enemy2.position
+                overlap_vec.scale_to(overlap_amt * 10)
+                enemy.velocity.add_pose(overlap_vec, dt)
+                enemy2.velocity.add_pose(overlap_vec, -dt)
+
+
+def velocities(frame):
+    return [enemy.velocity.get_state() for enemy in frame.enemies] + [enemy.health for enemy in frame.enemies]
+
+
+def main(seed=0):
+    for count in (1000, 5000):
+        rng = random.Random(seed)
+        spawn = count // 30  # Dots live about half a second, so this holds roughly count of them
+        dots = [Dot(rng) for _ in range(count)]
+        store = EntityStore(dots[:], stable_order=False)
+        for i in range(60):
+            dots = churn_list(dots, rng, spawn)
+            churn_store(store, rng, spawn)
+        held = [dots]
+
+        def list_tick():
+            held[0] = churn_list(held[0], rng, spawn)
+
+        old, new = alternating_times(list_tick, lambda: churn_store(store, rng, spawn))
+        print(f"churn, {len(held[0])} entities in a list: {old * 1000:.2f} ms, "
+              f"{len(store)} in a store: {new * 1000:.2f} ms")
+
+    for grunts in (15, 60, 200):
+        frame = gatling_scenario(seed, grunts=grunts)
+        saved = frame.snapshot()
+        old_projectile_collisions(frame)
+        old_enemy_collisions(frame, c.TICK_DT)
+        expected = velocities(frame)
+        frame.restore(saved)
+        frame.gather_collision_components()
+        frame.check_enemy_and_projectile_collisions()
+        frame.check_enemy_and_enemy_collisions(c.TICK_DT, [])
+        same = velocities(frame) == expected
+        frame.restore(saved)
+
+        def old_pass():
+            old_projectile_collisions(frame)
+            old_enemy_collisions(frame, c.TICK_DT)
+
+        def new_pass():
+            frame.gather_collision_components()
+            frame.check_enemy_and_projectile_collisions()
+            frame.check_enemy_and_enemy_collisions(c.TICK_DT, [])
+
+        old = best_time(old_pass, number=20)
+        new = best_time(new_pass, number=20)
+        print(f"collisions, {len(frame.enemies)} enemies and {len(frame.projectiles)} projectiles: "
+              f"{old * 1000:.2f} ms with lists, {new * 1000:.2f} ms with stores, "
+              f"{'same results' if same else 'RESULTS DIFFER'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Paces a stand in frame of fixed work, then plays a few seconds of a match in real time, with each frame pacing
+strategy, headless, and reports how evenly the frames were spaced and how much CPU the waiting cost.
+
+    python -m benchmarks.frame_pacing
+    python -m benchmarks.frame_pacing 10 sleep-spin tick
+
+Headless runs never flip, so the vsync strategy is measured in its fallback, pacing itself from the clock.
+"""
+
+import sys
+import time
+
+import constants as c
+from bot import BotInput
+from frame import GameFrame
+from game import Game
+from pacing import FramePacer, STRATEGIES, print_report
+
+
+def pace_work(strategy, seconds, work=0.005):
+    """ Paces frames that each sleep for work seconds, which isolates the pacing from the game's own spikes. """
+    pacer = FramePacer(strategy)
+    for i in range(int(seconds * c.FRAMERATE)):
+        pacer.wait()
+        time.sleep(work)
+    return pacer.report()
+
+
+def pace(strategy, seconds):
+    game = Game(headless=True, seed=0, input_source=BotInput(0), pacing_strategy=strategy)
+    game.idle.finish()
+    frame = GameFrame(game)
+    frame.load()
+    game.main(first_frame=frame, max_ticks=int(seconds * c.TICK_RATE), load=False)
+    return game.pacer.report()
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    strategies = sys.argv[2:] or STRATEGIES
+    print("Frames of 5 ms of sleeping work:")
+    for strategy in strategies:
+        print_report(pace_work(strategy, seconds))
+    print("\nThe game:")
+    for strategy in strategies:
+        print_report(pace(strategy, seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Starts a match and plays two minutes of it with the bot, once straight away and once after the game's idle
+scheduler has finished warming the image and sound caches, and compares how long loading and the slowest ticks
+took.
+
+    python -m benchmarks.idle_warm_up
+"""
+
+import time
+
+import constants as c
+from bot import BotInput
+from frame import GameFrame
+from game import Game
+
+
+def play(warm, ticks=c.TICK_RATE * 120):
+    game = Game(headless=True, fast_forward=True, render_every=0, seed=0, input_source=BotInput(0))
+    if warm:
+        start = time.perf_counter()
+        game.idle.finish()
+        print(f"  warm up: {(time.perf_counter() - start) * 1000:.0f} ms in {game.idle.ran} steps")
+    start = time.perf_counter()
+    frame = GameFrame(game)
+    frame.load()
+    print(f"  load: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    step_times = []
+    for i in range(ticks):
+        start = time.perf_counter()
+        frame.step(c.TICK_DT, [])
+        step_times.append(time.perf_counter() - start)
+    step_times.sort()
+    print("  slowest ticks: " + ", ".join(f"{step * 1000:.1f}" for step in step_times[:-6:-1]) + " ms")
+
+
+def main():
+    print("cold")
+    play(warm=False)
+    print("warmed")
+    play(warm=True)
+
+
+if __name__ == "__main__":
+    main()
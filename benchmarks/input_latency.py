@@ -0,0 +1,71 @@
+"""
+Plays a few seconds of a match in real time, headless, while another thread posts mouse and key events at random
+moments, and reports how long they took to be processed, drawn and shown, for each pipeline mode.
+
+    python -m benchmarks.input_latency
+    python -m benchmarks.input_latency 10
+
+Headless runs never flip, so "to flip" is the same as "to draw" here; run the game with --latency-report to
+include a real display's flip.
+"""
+
+import random
+import sys
+import threading
+import time
+
+import pygame
+
+import constants as c
+from bot import BotInput
+from frame import GameFrame
+from game import Game
+from latency import print_report
+
+# Keyword arguments to Game for each pipeline mode compared
+MODES = (
+    {"pacing_strategy": "tick"},
+    {"pacing_strategy": "sleep-spin"},
+    {"pacing_strategy": "busy"},
+    {"pacing_strategy": "sleep-spin", "threaded": True},
+)
+
+EVENTS = (
+    (pygame.MOUSEMOTION, {"pos": (960, 540), "rel": (1, 0), "buttons": (0, 0, 0)}),
+    (pygame.MOUSEBUTTONDOWN, {"pos": (960, 540), "button": 1}),
+    (pygame.KEYDOWN, {"key": pygame.K_LSHIFT, "mod": 0, "unicode": "", "scancode": 0}),
+)
+
+
+def post_events(stop, seed=0, mean_gap=0.03):
+    """ Posts a random tracked event every mean_gap seconds or so, stamped with when it was posted. """
+    rng = random.Random(seed)
+    while not stop.is_set():
+        time.sleep(rng.expovariate(1 / mean_gap))
+        event_type, attributes = rng.choice(EVENTS)
+        pygame.event.post(pygame.event.Event(event_type, attributes, posted=time.perf_counter()))
+
+
+def measure(mode, seconds):
+    game = Game(headless=True, seed=0, input_source=BotInput(0), measure_latency=True, **mode)
+    game.idle.finish()
+    frame = GameFrame(game)
+    frame.load()
+    stop = threading.Event()
+    poster = threading.Thread(target=post_events, args=(stop,), daemon=True)
+    poster.start()
+    game.main(first_frame=frame, max_ticks=int(seconds * c.TICK_RATE), load=False)
+    stop.set()
+    poster.join()
+    pygame.event.clear()
+    return game.latency.report()
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    for mode in MODES:
+        print_report(measure(mode, seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Times a tick, and counts the Poses created per tick, in a busy gatling fight against fifteen grunts.
+
+    python -m benchmarks.pose_allocations
+"""
+
+import time
+
+from allocations import AllocationCounter, print_report
+from benchmarks.common import gatling_scenario, entity_counts, step
+
+
+def count_poses(frame, ticks):
+    """ Poses created per tick over the next ticks ticks, printing where the rest of the allocations were. """
+    counter = AllocationCounter()
+    counter.enable()
+    for i in range(ticks):
+        step(frame, 1)
+        counter.end_frame()
+    counter.disable()
+    report = counter.report()
+    print_report(report, limit=10)
+    return report["kinds"].get("Pose", 0)
+
+
+def main(ticks=600):
+    frame = gatling_scenario(grunts=15)
+    print(entity_counts(frame))
+    saved = frame.snapshot()
+    source_ticks = frame.game.input_source.ticks
+    start = time.perf_counter()
+    step(frame, ticks)
+    print(f"tick: {(time.perf_counter() - start) / ticks * 1000:.3f} ms")
+
+    frame.restore(saved)
+    frame.game.input_source.ticks = source_ticks
+    print(f"Poses per tick: {count_poses(frame, ticks):.0f}")
+
+
+if __name__ == "__main__":
+    main()
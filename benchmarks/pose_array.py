@@ -0,0 +1,56 @@
+"""
+Compares looping over Poses with one PoseArray call, for moving every entity by its velocity and for the distance
+between every pair of entities, at a few entity counts. Needs numpy.
+
+    python -m benchmarks.pose_array
+"""
+
+import random
+
+from benchmarks.common import best_time
+from pose_array import PoseArray
+from primitives import Pose
+
+COUNTS = (100, 500, 2000)
+
+
+def random_poses(rng, count, spread):
+    return [Pose((rng.uniform(-spread, spread), rng.uniform(-spread, spread)), rng.uniform(-spread, spread))
+            for _ in range(count)]
+
+
+def integrate_poses(positions, velocities, dt):
+    for position, velocity in zip(positions, velocities):
+        position.add_pose(velocity, dt)
+
+
+def distances_poses(positions):
+    return [[a.distance_to(b) for b in positions] for a in positions]
+
+
+def main(seed=0, dt=1/60):
+    rng = random.Random(seed)
+    for count in COUNTS:
+        positions = random_poses(rng, count, 1000)
+        velocities = random_poses(rng, count, 100)
+        array_positions = PoseArray.from_poses(positions)
+        array_velocities = PoseArray.from_poses(velocities)
+
+        integrate_poses(positions, velocities, dt)
+        array_positions.add_pose(array_velocities, dt)
+        same = [pose.get_state() for pose in positions] == [view.get_state() for view in array_positions]
+        same = same and distances_poses(positions) == array_positions.distances().tolist()
+        print(f"{count} poses, {'same results' if same else 'RESULTS DIFFER'}")
+
+        loop = best_time(lambda: integrate_poses(positions, velocities, dt))
+        batch = best_time(lambda: array_positions.add_pose(array_velocities, dt))
+        print(f"  add_pose:  {loop * 1e6:9.1f} us looped, {batch * 1e6:9.1f} us batched ({loop / batch:.0f}x)")
+
+        number = max(1, 20000 // count)
+        loop = best_time(lambda: distances_poses(positions), number=max(1, number // 20), repeat=3)
+        batch = best_time(array_positions.distances, number=number, repeat=3)
+        print(f"  distances: {loop * 1e3:9.2f} ms looped, {batch * 1e3:9.2f} ms batched ({loop / batch:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Times drawing a busy gatling fight straight to a surface against recording it into a DrawList and replaying it,
+then fast forwards a match drawing every tick with the serial and the threaded game loop. The threaded loop
+skips states whenever drawing falls behind, so its time per tick is what the simulation gets, not what the screen
+shows.
+
+Before timing anything it checks that a recorded list still replays the frame it recorded when the next frame
+draws in the middle of the replay, as the simulation thread does in threaded mode.
+
+    python -m benchmarks.render_pipeline
+"""
+
+import time
+
+import pygame
+
+import constants as c
+from benchmarks.common import gatling_scenario, best_time, entity_counts
+from frame import GameFrame
+from game import Game
+from input_state import GatlingSpray
+from particle import MuzzleFlash
+from projectile import Shuriken
+from render_list import DrawList
+
+
+def loop_time(threaded, ticks=600):
+    game = Game(headless=True, fast_forward=True, render_every=1, seed=0, input_source=GatlingSpray(),
+                threaded=threaded)
+    start = time.perf_counter()
+    game.main(first_frame=GameFrame(game), max_ticks=ticks)
+    return (time.perf_counter() - start) / ticks
+
+
+def fade(frame, alpha):
+    """ Sets every overlay, fading message, muzzle flash and shuriken in frame to fade at about alpha. """
+    frame.shade_alpha = frame.white_flash_alpha = frame.damage_flash_alpha = alpha
+    frame.boss_dead = True
+    frame.since_boss_dead = 3 + alpha / 510
+    frame.since_player_died = alpha / 510
+    for obj in frame.particles + frame.projectiles:
+        if isinstance(obj, MuzzleFlash):
+            obj.age = obj.duration * (1 - alpha / 255) ** 0.5
+        elif isinstance(obj, Shuriken):
+            obj.alpha = alpha
+
+
+def check_interleaved_replay():
+    """
+    Records a frame, then replays it onto a surface that draws the next frame, at other alphas, both straight to a
+    surface and into another DrawList, just before the replay's last batch of blits, where the overlays are. The
+    replay must match drawing the recorded frame directly.
+    """
+    frame = gatling_scenario()
+    frame.particles.append(MuzzleFlash(frame.player.position.get_position(), frame.world, 30))
+    frame.projectiles.append(Shuriken(frame.player.position.get_position(), (1, 0), frame))
+    for before, during in ((255, 40), (40, 255), (120, 200)):
+        fade(frame, before)
+        expected = pygame.Surface(c.WINDOW_SIZE)
+        frame.render(expected)
+        draw_list = DrawList(c.WINDOW_SIZE)
+        frame.render(draw_list)
+
+        class Interleaved(pygame.Surface):
+            batches = 0
+            interleave_at = None
+
+            def blits(self, *args, **kwargs):
+                self.batches += 1
+                if self.batches == self.interleave_at:
+                    fade(frame, during)
+                    frame.render(DrawList(c.WINDOW_SIZE))
+                    frame.render(pygame.Surface(c.WINDOW_SIZE))
+                return super().blits(*args, **kwargs)
+
+        counting = Interleaved(c.WINDOW_SIZE)
+        draw_list.replay(counting)
+        actual = Interleaved(c.WINDOW_SIZE)
+        actual.interleave_at = counting.batches
+        draw_list.replay(actual)
+        assert pygame.image.tobytes(actual, "RGB") == pygame.image.tobytes(expected, "RGB"), \
+            f"Drawing the next frame at alpha {during} during a replay changed a frame recorded at {before}"
+
+
+def main():
+    check_interleaved_replay()
+    frame = gatling_scenario()
+    print(entity_counts(frame))
+    screen = pygame.Surface(c.WINDOW_SIZE)
+
+    direct = best_time(lambda: frame.render(screen), number=20)
+    draw_list = DrawList(c.WINDOW_SIZE)
+    frame.render(draw_list)
+    record = best_time(lambda: frame.render(DrawList(c.WINDOW_SIZE)), number=20)
+    replay = best_time(lambda: draw_list.replay(screen), number=20)
+    print(f"draw: {direct * 1000:.2f} ms, record: {record * 1000:.2f} ms ({len(draw_list.commands)} commands), "
+          f"replay: {replay * 1000:.2f} ms")
+
+    serial = loop_time(threaded=False)
+    threaded = loop_time(threaded=True)
+    print(f"tick and draw, serial: {serial * 1000:.2f} ms, threaded: {threaded * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
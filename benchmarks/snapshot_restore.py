@@ -0,0 +1,33 @@
+"""
+Times GameFrame.snapshot and GameFrame.restore in a busy gatling fight, and checks that a restored match plays out
+exactly like the original.
+
+    python -m benchmarks.snapshot_restore
+"""
+
+from benchmarks.common import gatling_scenario, best_time, entity_counts, step
+
+
+def main():
+    frame = gatling_scenario()
+    print(entity_counts(frame))
+
+    saved = frame.snapshot()
+    snapshot_time = best_time(frame.snapshot)
+    restore_time = best_time(lambda: frame.restore(saved))
+    print(f"snapshot: {snapshot_time * 1e6:.0f} us, restore: {restore_time * 1e6:.0f} us")
+
+    # The scripted input keeps its own tick count, so rewind that along with the match
+    source = frame.game.input_source
+    source_ticks = source.ticks
+    frame.restore(saved)
+    step(frame, 300)
+    first_run = frame.get_state()
+    frame.restore(saved)
+    source.ticks = source_ticks
+    step(frame, 300)
+    print("restored run matches:", frame.get_state() == first_run)
+
+
+if __name__ == "__main__":
+    main()
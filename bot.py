@@ -0,0 +1,157 @@
+import math
+import random
+
+import constants as c
+from input_state import InputSnapshot
+from primitives import Pose
+
+LASER_MODES = (c.BOSS_PREPARING_LASER, c.BOSS_FIRING_LASER)
+
+
+class BotInput:
+    """
+    Input source that plays by itself, for unattended runs. It strafes around the nearest enemy while shooting at
+    it, rolls every few seconds to cycle through the weapons, gets out of the boss's laser column, and restarts
+    after dying. It only reads the match and its own random stream, so a seeded bot plays the same way every time.
+
+    seed: seed for the bot's own choices, separate from the match's
+    weapon_time: seconds to use each weapon before rolling for another
+    restart: press restart a couple of seconds after dying
+    """
+
+    keep_distance = 350  # How far from its target the bot tries to stay
+    laser_margin = 220  # How far either side of the laser the bot wants to be
+    wall_margin = 250
+
+    def __init__(self, seed=0, weapon_time=5.0, restart=True):
+        self.random = random.Random(seed)
+        self.weapon_time = weapon_time
+        self.restart = restart
+        self.frame = None
+        self.weapon_ticks = {}  # Ticks spent holding each weapon mode, across every match
+        self.strafe_direction = 1
+        self.until_turn = 0
+        self.weapon_mode = None
+        self.since_weapon_change = 0
+
+    def attach(self, frame):
+        self.frame = frame
+        self.weapon_mode = None
+        self.since_weapon_change = 0
+
+    def poll(self, events):
+        frame = self.frame
+        player = frame.player
+        if player.dead:
+            if self.restart and frame.since_player_died > 2:
+                return InputSnapshot(InputSnapshot.RESTART)
+            return InputSnapshot()
+
+        if player.weapon_mode != self.weapon_mode:
+            self.weapon_mode = player.weapon_mode
+            self.since_weapon_change = 0
+        self.since_weapon_change += c.TICK_DT
+        self.weapon_ticks[player.weapon_mode] = self.weapon_ticks.get(player.weapon_mode, 0) + 1
+
+        self.until_turn -= c.TICK_DT
+        if self.until_turn <= 0:
+            self.strafe_direction = self.random.choice((-1, 1))
+            self.until_turn = self.random.uniform(1.5, 4)
+
+        target = self.nearest_enemy()
+        direction = self.dodge_direction()
+        if direction is None:
+            direction = self.strafe(target.position if target else Pose(c.ARENA_SIZE) * 0.5)
+        buttons = self.buttons_for(direction)
+
+        if target:
+            buttons |= InputSnapshot.FIRE
+            aim = frame.world.camera.world_to_screen(target.position.get_position())
+        else:
+            aim = frame.world.camera.world_to_screen((player.position + Pose((200, 0))).get_position())
+        if self.wants_roll():
+            buttons |= InputSnapshot.ROLL
+        return InputSnapshot(buttons, (int(aim.x), int(aim.y)))
+
+    def nearest_enemy(self):
+        player = self.frame.player
+        nearest = None
+        nearest_distance = None
+        for enemy in self.frame.enemies:
+            if enemy.lethal or enemy.destroyed:
+                continue
+            distance = (enemy.position - player.position).magnitude()
+            if nearest is None or distance < nearest_distance:
+                nearest = enemy
+                nearest_distance = distance
+        return nearest
+
+    def dodge_direction(self):
+        """ Which way to run to get out of the boss's laser column, or None if it isn't coming. """
+        boss = self.frame.boss
+        player = self.frame.player
+        if boss not in self.frame.enemies or boss.boss_mode not in LASER_MODES:
+            return None
+        offset = player.position.x - boss.position.x
+        if abs(offset) > self.laser_margin:
+            return None
+        side = 1 if offset >= 0 else -1
+        if player.position.x + side * self.laser_margin > c.ARENA_WIDTH - player.radius \
+                or player.position.x + side * self.laser_margin < player.radius:
+            side = -side  # Pinned against a wall, so cross the beam to the open side
+        return Pose((side, 0))
+
+    def strafe(self, center):
+        """ Circles center at keep_distance, turning back when a wall gets close. """
+        player = self.frame.player
+        away = player.position - center
+        if away.magnitude() == 0:
+            away = Pose((1, 0))
+        radial = away.copy()
+        radial.scale_to(1)
+        tangent = Pose((-radial.y, radial.x)) * self.strafe_direction
+        direction = tangent + radial * ((self.keep_distance - away.magnitude()) / self.keep_distance)
+
+        for axis, size in (("x", c.ARENA_WIDTH), ("y", c.ARENA_HEIGHT)):
+            position = getattr(player.position, axis)
+            if position < self.wall_margin:
+                setattr(direction, axis, 1)
+            elif position > size - self.wall_margin:
+                setattr(direction, axis, -1)
+        return direction
+
+    def wants_roll(self):
+        player = self.frame.player
+        if player.rolling or player.stamina_visible or player.firing and player.weapon_mode == c.FIRE:
+            return False
+        return self.since_weapon_change > self.weapon_time or self.threatened()
+
+    def threatened(self):
+        """ True if an enemy is about to touch the player, which a roll passes through unhurt. """
+        player = self.frame.player
+        for enemy in self.frame.enemies:
+            if not enemy.damaging or enemy.lethal or enemy.destroyed:
+                continue
+            if (enemy.position - player.position).magnitude() < enemy.radius + player.radius + 60:
+                return True
+        return False
+
+    @staticmethod
+    def buttons_for(direction):
+        """ The movement keys closest to a direction, allowing diagonals. """
+        buttons = 0
+        if direction.magnitude() == 0:
+            return buttons
+        angle = math.atan2(direction.y, direction.x)
+        if math.cos(angle) > 0.38:
+            buttons |= InputSnapshot.RIGHT
+        elif math.cos(angle) < -0.38:
+            buttons |= InputSnapshot.LEFT
+        if math.sin(angle) > 0.38:
+            buttons |= InputSnapshot.DOWN
+        elif math.sin(angle) < -0.38:
+            buttons |= InputSnapshot.UP
+        return buttons
+
+    def close(self):
+        pass
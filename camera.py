@@ -2,24 +2,21 @@ from primitives import Pose
 import constants as c
 
 class Camera:
-    position = None
-    target = None
 
-    @classmethod
-    def init(cls, position=(0, 0)):
-        cls.position = Pose(position)
-        cls.target = cls.position.copy()
+    def __init__(self, position=(0, 0)):
+        self.position = Pose(position)
+        self.target = self.position.copy()
 
-    @classmethod
-    def update(cls, dt, events):
-        d = cls.target - cls.position - Pose(c.WINDOW_SIZE) * 0.5
-        speed = d*dt*4
-        cls.position += speed
+    def update(self, dt, events):
+        speed = self.target - self.position
+        speed.x -= c.WINDOW_WIDTH*0.5
+        speed.y -= c.WINDOW_HEIGHT*0.5
+        speed *= dt
+        speed *= 4
+        self.position += speed
 
-    @classmethod
-    def screen_to_world(cls, position):
-        return Pose(position) + cls.position
+    def screen_to_world(self, position):
+        return Pose(position) + self.position
 
-    @classmethod
-    def world_to_screen(cls, position):
-        return Pose(position) - cls.position
\ No newline at end of file
+    def world_to_screen(self, position):
+        return Pose(position) - self.position
@@ -7,7 +7,11 @@ ARENA_WIDTH = 2800
 ARENA_HEIGHT = 2000
 ARENA_SIZE = ARENA_WIDTH, ARENA_HEIGHT
 
-FRAMERATE = 60
+FRAMERATE = 60  # Render rate
+
+TICK_RATE = 60  # Fixed simulation rate, independent of FRAMERATE
+TICK_DT = 1/TICK_RATE
+MAX_FRAME_TIME = 0.25  # Longest real frame the simulation will try to catch up on
 
 WALKING = 0
 IDLE = 1
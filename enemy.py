@@ -3,15 +3,19 @@ from primitives import Pose
 import constants as c
 import math
 import pygame
-from camera import Camera
-import random
-from sound_manager import SoundManager
 from particle import Puff
+import angles
 
 class Enemy:
 
+    state_attributes = ("health", "max_health", "lethal", "destroyed", "fixed", "damaging",
+                        "health_recently_lost", "since_take_damage", "raised", "radius")
+    pose_attributes = ("position", "velocity")
+    sprite_attributes = ("sprite",)
+
     def __init__(self, position, frame):
         self.frame = frame
+        self.world = frame.world
         self.radius = 75
         self.sprite = None
         self.health = 100
@@ -23,7 +27,7 @@ class Enemy:
         self.fixed = False
         self.damaging = True
 
-        self.damage_bread_sound = SoundManager.load("assets/sounds/Bread-Hits-Object.mp3")
+        self.damage_bread_sound = self.world.sounds.load("assets/sounds/Bread-Hits-Object.mp3")
         self.damage_bread_sound.set_volume(0.25)
 
         self.health_recently_lost = 0
@@ -35,7 +39,7 @@ class Enemy:
         self.shadow.set_colorkey((255, 255, 0))
         pygame.draw.ellipse(self.shadow, (0, 0, 0), self.shadow.get_rect())
         self.shadow.set_alpha(60)
-        self.damage_sound = SoundManager.load("assets/sounds/Enemy-Damage.mp3")
+        self.damage_sound = self.world.sounds.load("assets/sounds/Enemy-Damage.mp3")
         self.damage_sound.set_volume(0.5)
 
         self.raised = False
@@ -77,7 +81,7 @@ class Enemy:
     def update(self, dt, events):
         self.sprite.update(dt, events)
         if not self.fixed:
-            self.position += self.velocity*dt
+            self.position.add_pose(self.velocity, dt)
         if self.health < 0 and not self.lethal:
             self.lethal = True
             self.destroy()
@@ -172,7 +176,7 @@ class Grunt(Enemy):
             dp.scale_to(1200)
 
         if not self.lethal:
-            self.velocity += dp * dt
+            self.velocity.add_pose(dp, dt)
             if self.velocity.magnitude() > 500:
                 self.velocity.scale_to(500)
 
@@ -206,6 +210,13 @@ class Grunt(Enemy):
 
 
 class BossMan(Enemy):
+
+    state_attributes = Enemy.state_attributes + (
+        "boss_mode", "sweep_position", "sweep_direction", "sweep_target", "sweep_target_speed", "sweep_speed",
+        "drift_speed", "since_last_attack_finish", "since_laser_noise", "since_spawn", "enemy_wave_ct",
+        "since_hand_attack")
+    sprite_attributes = Enemy.sprite_attributes + ("beam_sprite", "beam_length_sprite")
+
     def __init__(self, position, frame):
         super().__init__(position, frame)
         idle = Animation.from_path("assets/images/boss_idle.png",frame_count=3,sheet_size=(3, 1))
@@ -222,7 +233,7 @@ class BossMan(Enemy):
         self.fixed = True
         self.boss_mode = c.BOSS_IDLE
 
-        self.death_sound = SoundManager.load("assets/sounds/Boss-Death.mp3")
+        self.death_sound = self.world.sounds.load("assets/sounds/Boss-Death.mp3")
 
         self.beam_sprite = Sprite(12)
         charging = Animation.from_path("assets/images/laser_mouth.png", sheet_size=(19, 1), frame_count=15)
@@ -242,18 +253,19 @@ class BossMan(Enemy):
         self.beam_length_sprite.start_animation("Beam")
 
         self.sweep_position = 0
+        self.sweep_target = 100
         self.sweep_direction = c.RIGHT
         self.sweep_target_speed = 400
         self.sweep_speed = 0
         self.drift_speed = 100
 
-        self.laser_charge_sound = SoundManager.load("assets/sounds/Laser-Charge.mp3")
-        self.laser_shoot_sound = SoundManager.load("assets/sounds/Laser-Shoot.wav")
+        self.laser_charge_sound = self.world.sounds.load("assets/sounds/Laser-Charge.mp3")
+        self.laser_shoot_sound = self.world.sounds.load("assets/sounds/Laser-Shoot.wav")
         self.laser_charge_sound.set_volume(0.3)
 
         #self.prepare_laser_attack()
 
-        self.buzz_sound =  SoundManager.load("assets/sounds/Wing-Buzz.mp3")
+        self.buzz_sound =  self.world.sounds.load("assets/sounds/Wing-Buzz.mp3")
         self.buzz_sound.set_volume(0.4)
 
         self.since_last_attack_finish = 0
@@ -276,7 +288,7 @@ class BossMan(Enemy):
         if self.difficulty() < 0.1:
             poses = [(-200, -200), (c.WINDOW_WIDTH//2, -200), (c.WINDOW_WIDTH + 200, -200)]
         for pos in poses:
-            pos = Camera.screen_to_world(pos)
+            pos = self.world.camera.screen_to_world(pos)
             self.frame.enemies.append(Grunt(pos.get_position(), self.frame))
 
     def laser_attack_start(self):
@@ -296,7 +308,7 @@ class BossMan(Enemy):
     def prepare_laser_attack(self):
         self.sweep_target = 100
         self.boss_mode = c.BOSS_PREPARING_LASER
-        self.sweep_position = Camera.world_to_screen(self.position.get_position()).x
+        self.sweep_position = self.world.camera.world_to_screen(self.position.get_position()).x
         self.beam_sprite.start_animation("Charging")
         self.sweep_direction = c.RIGHT
         self.sweep_target_speed = 500
@@ -368,20 +380,20 @@ class BossMan(Enemy):
         self.beam_length_sprite.update(dt, events)
         if self.boss_mode == c.BOSS_FIRING_LASER or self.boss_mode == c.BOSS_PREPARING_LASER:
             self.sweep_speed += (self.sweep_target_speed - self.sweep_speed) * 4 * dt
-            self.position.y += (Camera.screen_to_world((0, 100)).y - self.position.y) * 5 * dt
+            self.position.y += (self.world.camera.screen_to_world((0, 100)).y - self.position.y) * 5 * dt
             if self.sweep_direction==c.RIGHT:
                 self.sweep_target_speed = 500 * (1 + self.difficulty()*2.5)
                 self.position.x += self.sweep_speed*dt
-                if Camera.world_to_screen((self.position.x, 0)).x > c.WINDOW_WIDTH - 100:
+                if self.world.camera.world_to_screen((self.position.x, 0)).x > c.WINDOW_WIDTH - 100:
                     self.sweep_direction = c.LEFT
             else:
                 self.sweep_target_speed = -500 * (1 + self.difficulty()*2.5)
                 self.position.x += self.sweep_speed*dt
-                if Camera.world_to_screen((self.position.x, 0)).x < -100:
+                if self.world.camera.world_to_screen((self.position.x, 0)).x < -100:
                     self.swoop_above_player()
         if self.boss_mode == c.BOSS_PREPARING_LASER:
             self.sweep_position += (self.sweep_target - self.sweep_position) * 5 * dt
-            self.position.x = Camera.screen_to_world((self.sweep_position, 0)).x
+            self.position.x = self.world.camera.screen_to_world((self.sweep_position, 0)).x
         self.since_hand_attack += dt
         if self.boss_mode == c.BOSS_HAND_ATTACK and self.since_hand_attack > 6:
             self.swoop_above_player()
@@ -399,7 +411,7 @@ class BossMan(Enemy):
         options = [self.prepare_laser_attack, self.start_spawn_attack]
         if any([not hand.destroyed for hand in self.hands]):
             options.append(self.hand_attack)
-        random.choice(options)()
+        self.world.rng.gameplay.choice(options)()
 
     def hand_attack(self):
         self.boss_mode = c.BOSS_HAND_ATTACK
@@ -442,6 +454,10 @@ class BossMan(Enemy):
 
 
 class Hand(Enemy):
+
+    state_attributes = Enemy.state_attributes + ("age", "z", "target_z", "attacking", "slam_timer")
+    pose_attributes = Enemy.pose_attributes + ("offset", "target_offset", "anchor", "target_anchor")
+
     def __init__(self, position, frame, right=False):
         super().__init__(position, frame)
         idle = Animation.from_path("assets/images/boss hand idle.png",sheet_size=(2, 1),frame_count=2, reverse_x=(not right))
@@ -489,7 +505,7 @@ class Hand(Enemy):
         self.raised = False
         self.frame.shake(amt=30)
         for i in range(20):
-            self.frame.particles.append(Puff(self.position.get_position()))
+            self.frame.particles.append(Puff(self.position.get_position(), self.world))
 
 
     def shadow_offset(self):
@@ -526,13 +542,18 @@ class Hand(Enemy):
         if self.z > 0:
             self.damaging = False
         self.age += dt
+        cos, sin = angles.cos_sin(self.age*3 + math.pi/4*self.right)
         if not self.attacking:
-            self.target_offset = Pose((0, math.sin(self.age*3 + math.pi/4*self.right) * 50))
+            self.target_offset = Pose((0, sin * 50))
         else:
             self.target_offset = Pose((0, 15))
         do = self.target_offset - self.offset
         da = self.target_anchor - self.anchor
-        self.anchor += da*10*dt
-        self.offset += do*10*dt
+        da *= 10
+        da *= dt
+        do *= 10
+        do *= dt
+        self.anchor += da
+        self.offset += do
         self.position = self.anchor + self.offset
-        self.sprite.set_angle(math.cos(self.age*3 + math.pi/4*self.right) * 20 * (-1 + 2*self.right))
+        self.sprite.set_angle(cos * 20 * (-1 + 2*self.right))
@@ -0,0 +1,222 @@
+"""
+Storage for the things that come and go during a match: GameFrame's enemies, projectiles and particles are each
+kept in an EntityStore, densely, with handles that stay valid while an entity lives and typed arrays of the
+components that systems like collision read in bulk.
+"""
+
+from array import array
+from operator import attrgetter
+
+LETHAL, DESTROYED, DAMAGING, RAISED = 1, 2, 4, 8
+FLAGS = (("lethal", LETHAL), ("destroyed", DESTROYED), ("damaging", DAMAGING), ("raised", RAISED))
+COMPONENTS = ("x", "y", "vx", "vy", "z", "radius", "health", "flags")
+GENERATION = 1 << 24  # A handle is its slot plus its slot's generation times this
+
+
+def flags_of(entity):
+    flags = 0
+    for name, flag in FLAGS:
+        if getattr(entity, name, False):
+            flags |= flag
+    return flags
+
+
+# How gather reads each component from an entity
+READERS = {"x": attrgetter("position.x"), "y": attrgetter("position.y"), "vx": attrgetter("velocity.x"),
+           "vy": attrgetter("velocity.y"), "z": attrgetter("z"), "radius": attrgetter("radius"),
+           "health": attrgetter("health"), "flags": flags_of}
+
+
+class EntityStore:
+    """
+    Entities in a dense list, with their components in parallel typed arrays: x, y (position), vx, vy (velocity),
+    z, radius, health and flags, a bitfield of LETHAL, DESTROYED, DAMAGING and RAISED. Entities missing a component
+    read as 0.
+
+    Entities keep their own Poses and attributes, which everything they do is written against, so the arrays are a
+    copy, not the authority: gather() fills the components a system needs, and the system reads them instead of
+    walking attribute chains. They line up with the entities until the store or the entities next change, so
+    GameFrame gathers once per tick, before the collision passes, which change neither positions nor radii. Gathering
+    is a pass over every entity per component, so the arrays only pay for themselves in loops that read each
+    element many times, like the pairwise collision checks.
+
+    Removing an entity moves the last one into its place (swap-remove), unless stable_order is set, in which case
+    everything after it moves up one instead. Stores whose order matters to gameplay, because it decides who
+    collides first or is part of the state hash, keep it stable.
+
+    Indexing, iteration, len, in, append, += and slicing all work as they would on a list, so code that only reads
+    the store, or appends to it, needn't know it isn't one.
+    """
+
+    def __init__(self, entities=(), stable_order=True):
+        self.stable_order = stable_order
+        self.entities = []
+        self.slots = []  # Dense index to slot
+        self.slot_index = []  # Slot to dense index, or -1 while the slot is free
+        self.generations = []  # Slot to how many entities have been removed from it
+        self.free = []  # Slots waiting to be reused
+        self.slot_of = {}  # Entity to its slot
+        for name in COMPONENTS:
+            setattr(self, name, array("B" if name == "flags" else "d"))
+        self.extend(entities)
+
+    def add(self, entity):
+        """ Adds an entity at the end and returns its handle. """
+        if entity in self.slot_of:
+            raise ValueError(f"{entity!r} is already in this EntityStore")
+        if self.free:
+            slot = self.free.pop()
+        else:
+            slot = len(self.slot_index)
+            self.slot_index.append(-1)
+            self.generations.append(0)
+        self.slot_index[slot] = len(self.entities)
+        self.slot_of[entity] = slot
+        self.slots.append(slot)
+        self.entities.append(entity)
+        return slot + self.generations[slot] * GENERATION
+
+    append = add
+
+    def extend(self, entities):
+        for entity in entities:
+            self.add(entity)
+
+    def __iadd__(self, entities):
+        self.extend(entities)
+        return self
+
+    def handle_of(self, entity):
+        slot = self.slot_of[entity]
+        return slot + self.generations[slot] * GENERATION
+
+    def get(self, handle):
+        """ The entity a handle was given for, or None once it has been removed. """
+        slot, generation = handle % GENERATION, handle // GENERATION
+        if slot >= len(self.slot_index) or self.generations[slot] != generation or self.slot_index[slot] < 0:
+            return None
+        return self.entities[self.slot_index[slot]]
+
+    def remove(self, entity):
+        if entity not in self.slot_of:
+            raise ValueError(f"{entity!r} is not in this EntityStore")
+        self.remove_indices([self.slot_index[self.slot_of[entity]]])
+
+    def discard(self, handle):
+        """ Removes the entity a handle was given for, if it is still here. """
+        entity = self.get(handle)
+        if entity is not None:
+            self.remove(entity)
+
+    def remove_indices(self, indices):
+        """ Removes the entities at the given dense indices, which must be in increasing order. """
+        if not indices:
+            return
+        for index in indices:
+            slot = self.slots[index]
+            del self.slot_of[self.entities[index]]
+            self.slot_index[slot] = -1
+            self.generations[slot] += 1
+            self.free.append(slot)
+        if self.stable_order:
+            removed = set(indices)
+            write = indices[0]
+            for read in range(indices[0] + 1, len(self.entities)):
+                if read not in removed:
+                    self.move(read, write)
+                    write += 1
+        else:
+            write = len(self.entities)
+            for index in reversed(indices):
+                write -= 1
+                if index != write:
+                    self.move(write, index)
+        del self.entities[write:]
+        del self.slots[write:]
+
+    def move(self, source, destination):
+        """ Copies the entity at dense index source over the one at destination. """
+        slot = self.slots[source]
+        self.entities[destination] = self.entities[source]
+        self.slots[destination] = slot
+        self.slot_index[slot] = destination
+
+    def update(self, dt, events, live=True):
+        """
+        Updates each entity and removes those that were destroyed by the end of their own update. One destroyed
+        after its own update, by another's, stays until the next call.
+
+        live: update entities added during the updates too, and remove the destroyed all at once at the end. If
+            False, only the entities here at the start are updated, and each is removed as soon as its update
+            destroys it, so the updates after it don't see it
+        """
+        if not live:
+            for entity in self.entities[:]:
+                entity.update(dt, events)
+                if entity.destroyed:
+                    self.remove(entity)
+            return
+        destroyed = []
+        for index, entity in enumerate(self.entities):  # A list iterator also reaches entities appended meanwhile
+            entity.update(dt, events)
+            if entity.destroyed:
+                destroyed.append(index)
+        self.remove_indices(destroyed)
+
+    def retain(self, keep):
+        """ Removes every entity for which keep(entity) is false. """
+        self.remove_indices([index for index, entity in enumerate(self.entities) if not keep(entity)])
+
+    def clear(self):
+        self.remove_indices(list(range(len(self.entities))))
+
+    def replace(self, entities):
+        """ Makes the store hold exactly entities, in that order. Handles to anything removed stop working. """
+        self.clear()
+        self.extend(entities)
+
+    def sort(self, key):
+        """ Reorders the entities by key, keeping the order of ties as list.sort does. """
+        entities = self.entities
+        order = sorted(range(len(entities)), key=lambda index: key(entities[index]))
+        if all(index == position for position, index in enumerate(order)):
+            return
+        entities[:] = [entities[index] for index in order]
+        self.slots[:] = [self.slots[index] for index in order]
+        for position, slot in enumerate(self.slots):
+            self.slot_index[slot] = position
+
+    def gather(self, *names):
+        """ Fills the named component arrays, or all of them, from the entities, one element per entity in order. """
+        for name in names or COMPONENTS:
+            column = getattr(self, name)
+            read = READERS[name]
+            try:
+                column[:] = array(column.typecode, map(read, self.entities))
+            except AttributeError:
+                column[:] = array(column.typecode, [read_or_zero(read, entity) for entity in self.entities])
+
+    def __len__(self):
+        return len(self.entities)
+
+    def __iter__(self):
+        return iter(self.entities)
+
+    def __contains__(self, entity):
+        return entity in self.slot_of
+
+    def __getitem__(self, index):
+        return self.entities[index]
+
+    def __add__(self, other):
+        return self.entities + list(other)
+
+    def __repr__(self):
+        return f"<EntityStore of {len(self)}>"
+
+
+def read_or_zero(read, entity):
+    try:
+        return read(entity)
+    except AttributeError:
+        return 0
@@ -0,0 +1,304 @@
+"""
+Six Shooter as a step/reset environment for automated play, in the style of Gym.
+
+    env = SixShooterEnv(observation="state")
+    observation, info = env.reset(seed=3)
+    observation, reward, terminated, truncated, info = env.step(action)
+
+Actions are either an index below SixShooterEnv.action_count (discrete) or a sequence of six floats in [-1, 1]
+(continuous): move x, move y, aim x, aim y, fire and roll. Moves under half a stick are ignored, aim is a direction
+from the player, and fire and roll are pressed when positive.
+
+Observations are either a float32 state vector or a downscaled RGB frame. Frames are read straight out of a
+scaled copy of the draw surface through pygame.surfarray, with no intermediate arrays, into a buffer the
+environment owns (or one it is handed, such as a slot in shared memory).
+
+VectorEnv runs K environments in worker processes that write their observations into one shared memory block.
+
+Needs numpy.
+"""
+
+import math
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+import pygame
+
+import constants as c
+from enemy import Grunt
+from frame import GameFrame
+from game import Game
+from input_state import InputSnapshot
+
+MOVES = (
+    0,
+    InputSnapshot.UP,
+    InputSnapshot.UP | InputSnapshot.RIGHT,
+    InputSnapshot.RIGHT,
+    InputSnapshot.DOWN | InputSnapshot.RIGHT,
+    InputSnapshot.DOWN,
+    InputSnapshot.DOWN | InputSnapshot.LEFT,
+    InputSnapshot.LEFT,
+    InputSnapshot.UP | InputSnapshot.LEFT,
+)
+AIM_DIRECTIONS = 8
+AIM_DISTANCE = 300  # How far from the player, in pixels, the reticle is put when aiming
+
+NEAREST_ENEMIES = 8  # Enemies included in the state vector, nearest first
+PLAYER_FEATURES = 8
+BOSS_FEATURES = 5
+ENEMY_FEATURES = 4
+STATE_SIZE = PLAYER_FEATURES + BOSS_FEATURES + NEAREST_ENEMIES * ENEMY_FEATURES
+
+FRAME_SCALE = 8  # Frame observations are the window size divided by this
+
+
+class ActionInput:
+    """ Input source that hands the GameFrame whatever the environment last set. """
+
+    def __init__(self):
+        self.snapshot = InputSnapshot()
+
+    def attach(self, frame):
+        pass
+
+    def poll(self, events):
+        return self.snapshot
+
+    def close(self):
+        pass
+
+
+class SixShooterEnv:
+    """
+    One headless match driven an action at a time.
+
+    observation: "state" for the state vector, or "frame" for a downscaled RGB frame
+    frame_skip: ticks each action is held for
+    max_ticks: ticks before an episode is truncated
+    out: array to write observations into (default one of the environment's own)
+    """
+
+    action_count = len(MOVES) * AIM_DIRECTIONS * 2 * 2
+    action_size = 6
+
+    def __init__(self, observation="state", frame_skip=1, max_ticks=c.TICK_RATE * 60 * 5, out=None):
+        if observation not in ("state", "frame"):
+            raise ValueError(f"observation must be 'state' or 'frame', not {observation!r}")
+        self.observation_kind = observation
+        self.frame_skip = frame_skip
+        self.max_ticks = max_ticks
+        self.input = ActionInput()
+        self.game = Game(headless=True, fast_forward=True, render_every=0, input_source=self.input)
+        self.frame = None
+        self.ticks = 0
+        self.small = None
+        if observation == "frame":
+            size = c.WINDOW_WIDTH // FRAME_SCALE, c.WINDOW_HEIGHT // FRAME_SCALE
+            self.small = pygame.Surface(size, 0, self.game.screen)
+        self.observation = out if out is not None else np.zeros(self.observation_shape(observation),
+                                                                self.observation_dtype(observation))
+
+    @staticmethod
+    def observation_shape(observation="state"):
+        if observation == "frame":
+            return c.WINDOW_HEIGHT // FRAME_SCALE, c.WINDOW_WIDTH // FRAME_SCALE, 3
+        return STATE_SIZE,
+
+    @staticmethod
+    def observation_dtype(observation="state"):
+        return np.uint8 if observation == "frame" else np.float32
+
+    def reset(self, seed=None):
+        """ Starts a new match. Returns the first observation and an info dict. """
+        self.game.seed = seed
+        self.frame = GameFrame(self.game)
+        self.frame.load()
+        self.ticks = 0
+        self.input.snapshot = InputSnapshot()
+        return self.observe(), self.info()
+
+    def step(self, action):
+        """ Holds an action for frame_skip ticks. Returns observation, reward, terminated, truncated and info. """
+        self.input.snapshot = self.snapshot_for(action)
+        boss_health = self.frame.boss.health
+        player_health = self.frame.player.health
+        for i in range(self.frame_skip):
+            self.frame.step(c.TICK_DT, [])
+            self.ticks += 1
+            if self.finished():
+                break
+            # Rolling is a press, not a hold, so only the first tick of a repeated action rolls
+            self.input.snapshot = InputSnapshot(self.input.snapshot.buttons & ~InputSnapshot.ROLL,
+                                                self.input.snapshot.mouse_position)
+
+        reward = (boss_health - self.frame.boss.health) / 100 - (player_health - self.frame.player.health) / 10
+        if self.frame.boss_dead:
+            reward += 100
+        if self.frame.player.dead:
+            reward -= 100
+        terminated = self.finished()
+        truncated = not terminated and self.ticks >= self.max_ticks
+        return self.observe(), reward, terminated, truncated, self.info()
+
+    def finished(self):
+        return self.frame.boss_dead or self.frame.player.dead
+
+    def info(self):
+        return {"ticks": self.ticks, "boss_health": self.frame.boss.health, "player_health": self.frame.player.health,
+                "weapon_mode": self.frame.player.weapon_mode}
+
+    def snapshot_for(self, action):
+        """ Turns a discrete or continuous action into the input the player would have given. """
+        player_on_screen = self.frame.world.camera.world_to_screen(self.frame.player.position.get_position())
+        if np.ndim(action) == 0:
+            action = int(action)
+            action, roll = divmod(action, 2)
+            action, fire = divmod(action, 2)
+            move, aim = divmod(action, AIM_DIRECTIONS)
+            buttons = MOVES[move]
+            angle = aim / AIM_DIRECTIONS * math.pi * 2
+            aim_x, aim_y = math.cos(angle), math.sin(angle)
+        else:
+            move_x, move_y, aim_x, aim_y, fire, roll = (float(value) for value in action)
+            buttons = 0
+            if move_x > 0.5:
+                buttons |= InputSnapshot.RIGHT
+            elif move_x < -0.5:
+                buttons |= InputSnapshot.LEFT
+            if move_y > 0.5:
+                buttons |= InputSnapshot.DOWN
+            elif move_y < -0.5:
+                buttons |= InputSnapshot.UP
+            length = math.hypot(aim_x, aim_y)
+            aim_x, aim_y = (aim_x / length, aim_y / length) if length else (1, 0)
+            fire, roll = fire > 0, roll > 0
+        if fire:
+            buttons |= InputSnapshot.FIRE
+        if roll:
+            buttons |= InputSnapshot.ROLL
+        mouse = (int(player_on_screen.x + aim_x * AIM_DISTANCE), int(player_on_screen.y + aim_y * AIM_DISTANCE))
+        return InputSnapshot(buttons, mouse)
+
+    def observe(self):
+        if self.observation_kind == "frame":
+            self.frame.render(self.game.screen)
+            pygame.transform.scale(self.game.screen, self.small.get_size(), self.small)
+            pixels = pygame.surfarray.pixels3d(self.small)  # A view of the surface, indexed [x, y]
+            np.copyto(self.observation, pixels.transpose(1, 0, 2))
+            del pixels  # Unlocks the surface for the next scale
+        else:
+            self.write_state(self.observation)
+        return self.observation
+
+    def write_state(self, out):
+        """ Fills out with the state vector: player, boss, then the nearest enemies relative to the player. """
+        frame = self.frame
+        player = frame.player
+        boss = frame.boss
+        out[:] = 0
+        out[:PLAYER_FEATURES] = (
+            player.position.x / c.ARENA_WIDTH, player.position.y / c.ARENA_HEIGHT,
+            player.velocity.x / 1000, player.velocity.y / 1000,
+            player.health / player.max_health, c.VALID_MODES.index(player.weapon_mode) / len(c.VALID_MODES),
+            player.rolling, player.firing,
+        )
+        base = PLAYER_FEATURES
+        out[base:base + BOSS_FEATURES] = (
+            (boss.position.x - player.position.x) / c.WINDOW_WIDTH, (boss.position.y - player.position.y) / c.WINDOW_HEIGHT,
+            boss.health / boss.max_health, boss in frame.enemies, boss.boss_mode == c.BOSS_FIRING_LASER,
+        )
+        base += BOSS_FEATURES
+        others = [enemy for enemy in frame.enemies if enemy is not boss]
+        others.sort(key=lambda enemy: (enemy.position - player.position).magnitude())
+        for enemy in others[:NEAREST_ENEMIES]:
+            out[base:base + ENEMY_FEATURES] = (
+                (enemy.position.x - player.position.x) / c.WINDOW_WIDTH,
+                (enemy.position.y - player.position.y) / c.WINDOW_HEIGHT,
+                isinstance(enemy, Grunt), enemy.damaging,
+            )
+            base += ENEMY_FEATURES
+
+    def close(self):
+        self.frame = None
+
+
+def worker(pipe, shared_name, index, shape, dtype, options):
+    """ Runs one SixShooterEnv in a child process, writing observations into its slot of the shared block. """
+    block = shared_memory.SharedMemory(name=shared_name)
+    observations = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+    env = SixShooterEnv(out=observations[index], **options)
+    try:
+        while True:
+            command, argument = pipe.recv()
+            if command == "reset":
+                _, info = env.reset(seed=argument)
+                pipe.send(info)
+            elif command == "step":
+                _, reward, terminated, truncated, info = env.step(argument)
+                if terminated or truncated:
+                    info["final_info"] = dict(info)
+                    env.reset(seed=None)
+                pipe.send((reward, terminated, truncated, info))
+            elif command == "close":
+                break
+    finally:
+        env.close()
+        del observations
+        block.close()
+        pipe.close()
+
+
+class VectorEnv:
+    """
+    K SixShooterEnvs stepped together, each in its own process. Observations land in one shared memory array of
+    shape (K, *observation shape), which step and reset return without copying. Finished episodes reset
+    themselves; the info for that env then carries the last tick's info under "final_info".
+    """
+
+    def __init__(self, count, observation="state", frame_skip=1, max_ticks=c.TICK_RATE * 60 * 5):
+        self.count = count
+        shape = (count,) + SixShooterEnv.observation_shape(observation)
+        dtype = SixShooterEnv.observation_dtype(observation)
+        self.block = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * np.dtype(dtype).itemsize)
+        self.observations = np.ndarray(shape, dtype=dtype, buffer=self.block.buf)
+        options = {"observation": observation, "frame_skip": frame_skip, "max_ticks": max_ticks}
+
+        context = multiprocessing.get_context("spawn")
+        self.pipes = []
+        self.processes = []
+        for index in range(count):
+            parent, child = context.Pipe()
+            process = context.Process(target=worker, args=(child, self.block.name, index, shape, dtype, options),
+                                      daemon=True)
+            process.start()
+            child.close()
+            self.pipes.append(parent)
+            self.processes.append(process)
+
+    def reset(self, seeds=None):
+        """ Resets every env, seeding env i with seeds[i] if given. Returns the observations and a list of infos. """
+        seeds = seeds if seeds is not None else [None] * self.count
+        for pipe, seed in zip(self.pipes, seeds):
+            pipe.send(("reset", seed))
+        return self.observations, [pipe.recv() for pipe in self.pipes]
+
+    def step(self, actions):
+        """ Steps every env with its action. Returns observations, rewards, terminateds, truncateds and infos. """
+        for pipe, action in zip(self.pipes, actions):
+            pipe.send(("step", action))
+        results = [pipe.recv() for pipe in self.pipes]
+        rewards = np.array([result[0] for result in results], dtype=np.float32)
+        terminated = np.array([result[1] for result in results])
+        truncated = np.array([result[2] for result in results])
+        return self.observations, rewards, terminated, truncated, [result[3] for result in results]
+
+    def close(self):
+        for pipe in self.pipes:
+            pipe.send(("close", None))
+        for process in self.processes:
+            process.join()
+        del self.observations
+        self.block.close()
+        self.block.unlink()
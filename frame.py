@@ -1,15 +1,58 @@
 from player import Player
-from camera import Camera
 import constants as c
 import pygame
+import background
 from background import Background
 from primitives import Pose
 import math
-from particle import SparkParticle
-import random
+from particle import SparkParticle, cut_puff_frames, muzzle_flash_image, MUZZLE_FLASH_STEP
+from world import World
+from entity_store import EntityStore
+from render_list import blit_alpha, draw_overlay
 from healthbar import BossHealthBar
+from input_state import InputSnapshot
 
 from enemy import Grunt, BossMan
+from projectile import PistolBullet, Bread, Shuriken
+import snapshot
+
+# Everything a match loads through its world's image and sound caches, whether when it starts or the first time
+# something is fired, hit or killed
+MATCH_IMAGES = [f"assets/images/{name}.png" for name in (
+    "1", "2", "3", "4", "5", "6", "boss attack", "boss bar hands", "boss fist", "boss hand idle", "boss palm",
+    "boss_bar", "boss_hand_hp_left", "boss_hand_hp_left_blink", "boss_hp", "boss_hp_blink", "boss_idle", "bread",
+    "bread_arm", "bug", "bug_dying", "bullet", "casing", "fire_arm", "flame", "forward_idle", "gatling_arm", "gun",
+    "hp_bar_back", "hp_bar_front", "hp_bar_front_low", "knife arm final", "laser", "laser_mouth", "muzzle_flash",
+    "player death", "player_take_damage", "roll", "shuriken", "shuriken_arm", "stam wheel", "walk_right",
+    "walk_right_back",
+)]
+MATCH_SOUNDS = [f"assets/sounds/{name}" for name in (
+    "Boss-Death.mp3", "Bread-1.mp3", "Bread-2.mp3", "Bread-3.mp3", "Bread-Hits-Object.mp3", "Enemy-Damage.mp3",
+    "Flame-Burst_v2.ogg", "Footstep-1.mp3", "Footstep-2.mp3", "Footstep-3.mp3", "Gatling-Gun-1.mp3",
+    "Gatling-Gun-2.mp3", "Gatling-Gun-3.mp3", "Knife-2.mp3", "Laser-Charge.mp3", "Laser-Shoot.wav",
+    "Pistol_v2.mp3", "Player-Death.mp3", "Shuriken-1.mp3", "Shuriken-2.mp3", "Shuriken-3.mp3",
+    "Taking-Damage.ogg", "Wing-Buzz.mp3", "die_roll.mp3",
+)]
+
+
+def warm_up(images, sounds):
+    """
+    Loads and decodes a match's images and sounds one file per step, for an IdleScheduler, so neither starting a
+    match nor its first shot or grunt has to wait on the disk.
+    """
+    yield from background.warm_up(images)
+    for path in MATCH_IMAGES:
+        images.load(path)
+        yield
+    images.get("puff frames", lambda: cut_puff_frames(images))
+    yield
+    for angle in range(0, 360, MUZZLE_FLASH_STEP):
+        muzzle_flash_image(images, angle)
+        yield
+    for path in MATCH_SOUNDS:
+        sounds.load(path)
+        yield
+
 
 class Frame:
     def __init__(self):
@@ -21,9 +64,17 @@ class Frame:
     def update(self, dt, events):
         pass
 
+    def step(self, dt, events):
+        """ Advance the simulation by one fixed tick. """
+        self.update(dt, events)
+
     def draw(self, surface, offset=(0, 0)):
         surface.fill((0, 0, 0))
 
+    def render(self, surface, alpha=1.0):
+        """ Draw the frame, blending alpha of the way from the previous tick to the current one. """
+        self.draw(surface, (0, 0))
+
     def next_frame(self):
         return Frame()
 
@@ -36,8 +87,6 @@ class Instructions(Frame):
 
     def load(self):
         self.instructions = pygame.image.load("assets/images/Instructions.png")
-        self.shade = pygame.Surface(c.WINDOW_SIZE)
-        self.shade.fill((0, 0, 0))
         self.shade_alpha = 255
 
     def update(self, dt, events):
@@ -56,27 +105,44 @@ class Instructions(Frame):
 
     def draw(self, surface, offset=(0, 0)):
         surface.blit(self.instructions, (0, 0))
-        self.shade.set_alpha(self.shade_alpha)
-        surface.blit(self.shade, (0, 0))
+        draw_overlay(surface, (0, 0, 0), self.shade_alpha)
 
 
 
 
 class GameFrame(Frame):
+
+    state_attributes = ("age", "restarting", "since_shake", "red_flash_alpha", "white_flash_alpha",
+                        "damage_flash_alpha", "boss_dead", "since_boss_dead", "since_player_died", "shade_alpha",
+                        "done")
+    pose_attributes = ("shake_amp",)
+    sprite_attributes = ()
+
+    # Objects that come and go during a match, by the name get_state saves them under
+    spawnable_enemies = {"Grunt": Grunt}
+    spawnable_projectiles = {"PistolBullet": PistolBullet, "Bread": Bread, "Shuriken": Shuriken}
+
     def __init__(self, game):
         super().__init__()
         self.game = game
 
     def load(self):
+        self.world = World(self.game.seed, clock=self.game.game_clock, sounds=self.game.sounds,
+                           images=self.game.images)
+        self.input = InputSnapshot()
+        self.game.input_source.attach(self)
+        if self.game.latency:
+            self.game.latency.start()
         self.player = Player(self)
-        self.enemies = [Grunt((200, c.ARENA_HEIGHT*0.2), self), Grunt((c.ARENA_WIDTH*2, c.ARENA_HEIGHT*0.7), self)]
+        # Enemy and projectile order decides who collides first and feeds the state hash, so only particles,
+        # which are cosmetic, get the faster swap-remove
+        self.enemies = EntityStore([Grunt((200, c.ARENA_HEIGHT*0.2), self),
+                                    Grunt((c.ARENA_WIDTH*2, c.ARENA_HEIGHT*0.7), self)])
         self.boss = BossMan((c.WINDOW_WIDTH//2, -2000), self)
         self.healthbar = BossHealthBar(self.boss)
-        self.particles = []
-        self.projectiles = []
-        self.background = Background()
-        self.red_flash = pygame.Surface(c.WINDOW_SIZE)
-        self.red_flash.fill((255, 0, 0))
+        self.particles = EntityStore(stable_order=False)
+        self.projectiles = EntityStore()
+        self.background = Background(self.world)
         self.red_flash_alpha = 0
         self.shake_amp = Pose((0, 0))
         self.since_shake = 0
@@ -86,29 +152,62 @@ class GameFrame(Frame):
         self.restarting = False
 
 
-        self.white_flash = pygame.Surface(c.WINDOW_SIZE)
-        self.white_flash.fill((255, 255, 255))
         self.white_flash_alpha = 0
-
-        self.damage_flash = pygame.Surface(c.WINDOW_SIZE)
-        self.damage_flash.fill((255, 255, 255))
         self.damage_flash_alpha = 0
 
         self.boss_dead = False
         self.since_boss_dead = 0
         self.since_player_died = 0
 
-        self.shade = pygame.Surface(c.WINDOW_SIZE)
-        self.shade.fill((0, 0, 0))
         self.shade_alpha = 255
 
         self.thanks = pygame.image.load("assets/images/thanks.png")
         self.youdied = pygame.image.load("assets/images/youdied.png")
 
+        self.previous_positions = {}
+        self.previous_camera_position = None
+
+    def interpolated_objects(self):
+        yield self.player
+        yield from self.enemies
+        yield from self.projectiles
+        yield from self.particles
+
+    def step(self, dt, events):
+        self.previous_positions = {obj: obj.position.get_position() for obj in self.interpolated_objects()}
+        self.previous_camera_position = self.world.camera.position.get_position()
+        self.input = self.game.input_source.poll(events)
+        self.update(dt, events)
+        self.world.clock.advance(dt)
+        if self.game.hasher:
+            self.game.hasher.update(self)
+
+    def render(self, surface, alpha=1.0):
+        if alpha >= 1 or self.previous_camera_position is None:
+            self.draw(surface, (0, 0))
+            return
+
+        # Swap in blended positions just for this draw, then put the real ones back
+        current_positions = []
+        for obj, (x, y) in self.previous_positions.items():
+            current = obj.position
+            current_positions.append((obj, current))
+            obj.position = Pose((x + (current.x - x)*alpha, y + (current.y - y)*alpha), current.angle)
+        camera = self.world.camera
+        current_camera = camera.position
+        x, y = self.previous_camera_position
+        camera.position = Pose((x + (current_camera.x - x)*alpha, y + (current_camera.y - y)*alpha))
+        try:
+            self.draw(surface, (0, 0))
+        finally:
+            for obj, current in current_positions:
+                obj.position = current
+            camera.position = current_camera
+
 
     def update(self, dt, events):
 
-        Camera.update(dt, events)
+        self.world.camera.update(dt, events)
 
         self.background.update(dt, events)
         self.player.update(dt, events)
@@ -120,9 +219,7 @@ class GameFrame(Frame):
             self.enemies.append(self.boss)
             self.healthbar.visible = True
             if not self.game.main_music_started:
-                pygame.mixer.music.load("assets/sounds/Music-Main-Loop.mp3")
-                pygame.mixer.music.play(loops=-1)
-                pygame.mixer.music.set_volume(0.4)
+                self.world.sounds.play_music("assets/sounds/Music-Main-Loop.mp3", volume=0.4)
                 self.game.main_music_started = True
                 self.game.intro_music.fadeout(800)
 
@@ -147,26 +244,12 @@ class GameFrame(Frame):
         else:
             self.shake_amp = Pose((0, 0))
 
-        for enemy in self.enemies[:]:
-            enemy.update(dt, events)
-            if enemy.destroyed:
-                self.enemies.remove(enemy)
+        self.enemies.update(dt, events, live=False)
         self.enemies.sort(key=lambda x:x.position.y)
+        self.particles.update(dt, events)
+        self.projectiles.update(dt, events)
 
-        keep_particles = []
-        for particle in self.particles:
-            particle.update(dt, events)
-            if not particle.destroyed:
-                keep_particles.append(particle)
-        self.particles = keep_particles
-
-        keep_projectiles = []
-        for projectile in self.projectiles:
-            projectile.update(dt, events)
-            if not projectile.destroyed:
-                keep_projectiles.append(projectile)
-        self.projectiles = keep_projectiles
-
+        self.gather_collision_components()
         self.check_enemy_and_projectile_collisions()
         self.check_enemy_and_enemy_collisions(dt, events)
 
@@ -176,44 +259,171 @@ class GameFrame(Frame):
         self.white_flash_alpha *= 0.2**dt
         self.damage_flash_alpha -= 500*dt
         self.damage_flash_alpha *= 0.01**dt
+        if self.white_flash_alpha > 0:
+            self.enemies.retain(lambda enemy: isinstance(enemy, BossMan))
         if self.player.weapon_mode == c.FIRE and self.player.firing and int(self.player.hand_sprite.get_frame_num()) == 7 and self.red_flash_alpha < 10:
             self.red_flash_alpha = 255
             self.shake(direction=None, amt=30)
             for i in range(16):
                 position = self.player.hand_sprite.x, self.player.hand_sprite.y
-                self.particles.append(SparkParticle(position))
-            random.choice(self.player.flame_bursts).play()
+                self.particles.append(SparkParticle(position, self.world))
+            self.world.rng.cosmetic.choice(self.player.flame_bursts).play()
             for enemy in self.enemies:
                 if enemy.lethal or enemy.destroyed:
                     return
-                pos_on_screen = Camera.world_to_screen(enemy.position.get_position())
+                pos_on_screen = self.world.camera.world_to_screen(enemy.position.get_position())
                 if pos_on_screen.x > 0 and pos_on_screen.x < c.WINDOW_WIDTH:
                     if pos_on_screen.y > 0 and pos_on_screen.y < c.WINDOW_HEIGHT:
                         enemy.take_damage(250)
 
+    def get_state(self):
+        """
+        Returns the gameplay state of the match as plain data (no surfaces or sprites), suitable for
+        saving in a replay keyframe. Particles and background clouds are cosmetic and left out.
+        """
+        enemies = []
+        for enemy in self.enemies:
+            if enemy is self.boss:
+                enemies.append(("BossMan", None))
+            elif enemy in self.boss.hands:
+                enemies.append(("Hand", self.boss.hands.index(enemy)))
+            else:
+                enemies.append((type(enemy).__name__, snapshot.get_state(enemy)))
+        return {
+            "frame": snapshot.get_state(self),
+            "player": snapshot.get_state(self.player),
+            "boss": snapshot.get_state(self.boss),
+            "hands": [snapshot.get_state(hand) for hand in self.boss.hands],
+            "enemies": enemies,
+            "projectiles": [(type(projectile).__name__, snapshot.get_state(projectile)) for projectile in self.projectiles],
+            "healthbar_visible": self.healthbar.visible,
+            "camera": (self.world.camera.position.get_position(), self.world.camera.target.get_position()),
+            "rng": self.world.rng.getstate(),
+            "clock": self.world.clock.time,
+        }
+
+    def set_state(self, state):
+        """ Restores a state returned by get_state, rebuilding any Grunts and projectiles it contains. """
+        snapshot.set_state(self, state["frame"])
+        snapshot.set_state(self.player, state["player"])
+        snapshot.set_state(self.boss, state["boss"])
+        for hand, hand_state in zip(self.boss.hands, state["hands"]):
+            snapshot.set_state(hand, hand_state)
+
+        self.enemies.clear()
+        for kind, enemy_state in state["enemies"]:
+            if kind == "BossMan":
+                self.enemies.append(self.boss)
+            elif kind == "Hand":
+                self.enemies.append(self.boss.hands[enemy_state])
+            else:
+                enemy = self.spawnable_enemies[kind]((0, 0), self)
+                snapshot.set_state(enemy, enemy_state)
+                self.enemies.append(enemy)
+
+        self.projectiles.clear()
+        for kind, projectile_state in state["projectiles"]:
+            projectile = self.spawnable_projectiles[kind]((0, 0), (1, 0), self)
+            snapshot.set_state(projectile, projectile_state)
+            self.projectiles.append(projectile)
+
+        self.healthbar.visible = state["healthbar_visible"]
+        position, target = state["camera"]
+        self.world.camera.position = Pose(position)
+        self.world.camera.target = Pose(target)
+
+        # Rebuilding projectiles above spawns casings and draws random numbers, so these come last
+        self.particles.clear()
+        self.world.rng.setstate(state["rng"])
+        self.world.clock.time = state["clock"]
+        self.previous_positions = {}
+        self.previous_camera_position = None
+
+    def snapshot(self):
+        """
+        Saves the complete simulation in memory, particles and clouds included, for rollback and retries.
+        Game objects are kept by reference alongside their state as plain tuples, so restore never rebuilds
+        anything. Only valid for restoring into this same GameFrame.
+        """
+        objects = [self, self.player, self.boss, self.background]
+        objects += self.boss.hands
+        objects += [enemy for enemy in self.enemies if enemy is not self.boss and enemy not in self.boss.hands]
+        objects += self.projectiles
+        objects += self.particles
+        objects += self.background.clouds
+        camera = self.world.camera
+        return (
+            objects,
+            [snapshot.get_state(obj) for obj in objects],
+            self.enemies[:],
+            self.projectiles[:],
+            self.particles[:],
+            self.background.clouds[:],
+            self.healthbar.visible,
+            (camera.position.x, camera.position.y, camera.target.x, camera.target.y),
+            self.world.rng.getstate(),
+            self.world.clock.time,
+        )
+
+    def restore(self, saved):
+        """ Rolls the simulation back to a snapshot taken from this GameFrame. """
+        objects, states, enemies, projectiles, particles, clouds, healthbar_visible, camera, rng, clock = saved
+        for obj, state in zip(objects, states):
+            snapshot.set_state(obj, state)
+        self.enemies.replace(enemies)
+        self.projectiles.replace(projectiles)
+        self.particles.replace(particles)
+        self.background.clouds = clouds[:]
+        self.healthbar.visible = healthbar_visible
+        self.world.camera.position = Pose(camera[:2])
+        self.world.camera.target = Pose(camera[2:])
+        self.world.rng.setstate(rng)
+        self.world.clock.time = clock
+        self.previous_positions = {}
+        self.previous_camera_position = None
+
     def flash(self, alpha=255):
         self.white_flash_alpha = alpha
 
+    def gather_collision_components(self):
+        """
+        Copies what the collision passes read into the stores' arrays. Collisions change velocities and health,
+        never positions or radii, so this serves both passes.
+        """
+        self.enemies.gather("x", "y", "radius")
+        self.projectiles.gather("x", "y", "z", "radius")
+
     def check_enemy_and_projectile_collisions(self):
-        for enemy in self.enemies:
-            for projectile in self.projectiles:
-                projectile_position = projectile.position + Pose((0, projectile.z))
-                if (enemy.position - projectile_position).magnitude() < enemy.radius + projectile.radius:
+        if not self.enemies or not self.projectiles:
+            return
+        projectiles = self.projectiles
+        heights = [y + z for y, z in zip(projectiles.y, projectiles.z)]
+        targets = list(zip(projectiles.x, heights, projectiles.radius, projectiles.entities))
+        for enemy, x, y, radius in zip(self.enemies.entities, self.enemies.x, self.enemies.y, self.enemies.radius):
+            for projectile_x, projectile_y, projectile_radius, projectile in targets:
+                dx = x - projectile_x
+                dy = y - projectile_y
+                if math.sqrt(dx*dx + dy*dy) < radius + projectile_radius:
                     enemy.get_hit_by(projectile)
 
     def check_enemy_and_enemy_collisions(self, dt, events):
-        for i, enemy in enumerate(self.enemies):
-            for j, enemy2 in enumerate(self.enemies):
-                if j <= i:
-                    continue
-                diff = enemy.position - enemy2.position
-                dist = (diff).magnitude()
-                if dist < enemy.radius + enemy2.radius:
+        enemies = self.enemies
+        xs, ys, radii = enemies.x, enemies.y, enemies.radius
+        count = len(enemies)
+        for i in range(count):
+            x, y, radius = xs[i], ys[i], radii[i]
+            for j in range(i + 1, count):
+                dx = x - xs[j]
+                dy = y - ys[j]
+                dist = math.sqrt(dx*dx + dy*dy)
+                if dist < radius + radii[j]:
+                    enemy = enemies[i]
+                    enemy2 = enemies[j]
                     overlap_amt = enemy.radius + enemy2.radius - dist
-                    overlap_vec = diff.copy()
+                    overlap_vec = enemy.position - enemy2.position
                     overlap_vec.scale_to(overlap_amt * 10)
-                    enemy.velocity += overlap_vec*dt
-                    enemy2.velocity += overlap_vec*-dt
+                    enemy.velocity.add_pose(overlap_vec, dt)
+                    enemy2.velocity.add_pose(overlap_vec, -dt)
 
     def restart(self):
         self.restarting = True
@@ -222,7 +432,7 @@ class GameFrame(Frame):
 
     def draw(self, surface, offset=(0, 0)):
         surface.fill((0, 0, 0))
-        offset = Camera.position
+        offset = self.world.camera.position
         screenshake = Pose((self.shake_amp.x * math.cos(self.since_shake * 35), self.shake_amp.y * math.cos(self.since_shake * 35)))
         offset = (offset + screenshake).get_position()
         self.background.draw(surface, offset)
@@ -248,33 +458,24 @@ class GameFrame(Frame):
         self.healthbar.draw(surface, offset)
 
         if self.red_flash_alpha > 0:
-            self.red_flash.fill((self.red_flash_alpha, 0.25*self.red_flash_alpha, 0))
-            surface.blit(self.red_flash, (0, 0), special_flags=pygame.BLEND_ADD)
+            surface.fill((self.red_flash_alpha, 0.25*self.red_flash_alpha, 0), special_flags=pygame.BLEND_ADD)
 
         if self.boss_dead and self.since_boss_dead > 3:
             thanks_alpha = min(((self.since_boss_dead - 3) * 255), 128)
-            self.thanks.set_alpha(thanks_alpha)
-            surface.blit(self.thanks, (0, 0))
+            blit_alpha(surface, self.thanks, (0, 0), thanks_alpha)
 
         if self.since_player_died > 0:
             thanks_alpha = min(((self.since_player_died) * 255), 128)
-            self.youdied.set_alpha(thanks_alpha)
-            surface.blit(self.youdied, (0, 0))
+            blit_alpha(surface, self.youdied, (0, 0), thanks_alpha)
 
         if self.white_flash_alpha > 0:
-            self.white_flash.set_alpha(self.white_flash_alpha)
-            surface.blit(self.white_flash, (0, 0))
-            for enemy in self.enemies[:]:
-                if not isinstance(enemy, BossMan):
-                    self.enemies.remove(enemy)
+            draw_overlay(surface, (255, 255, 255), self.white_flash_alpha)
 
         if self.damage_flash_alpha > 0:
-            self.damage_flash.set_alpha(self.damage_flash_alpha)
-            surface.blit(self.damage_flash, (0, 0))
+            draw_overlay(surface, (255, 255, 255), self.damage_flash_alpha)
 
         if self.shade_alpha > 0:
-            self.shade.set_alpha(self.shade_alpha)
-            surface.blit(self.shade, (0, 0))
+            draw_overlay(surface, (0, 0, 0), self.shade_alpha)
 
     def shake(self, direction=None, amt=15):
         direction = direction.copy() if direction is not None else Pose((1, -1))
@@ -1,67 +1,327 @@
 import constants as c
+import os
 import pygame
-from frame import Frame, GameFrame, Instructions
+from frame import Frame, GameFrame, Instructions, warm_up
 import sys
-from camera import Camera
 from sound_manager import SoundManager
+from world import ImageCache
+from game_clock import GameClock
+from pyracy import particle_tools, sprite_tools
+from input_state import LiveInput, InputRecorder, InputPlayback
+from replay import ReplayRecorder
+from state_hash import WorldHasher
+from bot import BotInput
+from render_list import BandRenderer, DrawList, RenderBuffer
+from scheduler import IdleScheduler
+from pacing import FramePacer, STRATEGIES
+from latency import LatencyProbe
+from allocations import AllocationCounter
+import pacing
+import latency
+import allocations
+import argparse
+import atexit
+import random
+import threading
+import time
 
 
 class Game:
 
-    def __init__(self):
+    def __init__(self, headless=False, fast_forward=False, render_every=1, seed=None, input_source=None,
+                 hash_state=False, threaded=False, bands=1, pacing_strategy="sleep-spin", measure_latency=False,
+                 count_allocations=False):
+        """
+        headless: run without a window or audio device
+        fast_forward: step as fast as the CPU allows, with a synthetic dt of one tick per loop
+        render_every: when fast forwarding, draw only every Nth tick (0 never draws)
+        seed: seed for each GameFrame's random streams, or None for a different match every time
+        input_source: where GameFrames get their per-tick input (default live keyboard and mouse)
+        hash_state: keep a WorldHasher of every tick's gameplay state in self.hasher
+        threaded: simulate on a worker thread and only draw on this one (see main_threaded)
+        bands: record each frame and replay it in this many horizontal bands of the screen, one thread each
+        pacing_strategy: how the realtime loop waits for the next frame, one of pacing.STRATEGIES
+        measure_latency: time input events on their way to the screen with a LatencyProbe in self.latency
+        count_allocations: count the Poses, Surfaces and transforms each frame makes in self.allocations, which
+            slows every frame down a lot
+        """
+        self.headless = headless
+        self.game_clock = GameClock(fast_forward=fast_forward)
+        self.render_every = render_every
+        self.seed = seed
+        self.input_source = input_source if input_source else LiveInput()
+        self.hasher = WorldHasher() if hash_state else None
+        self.threaded = threaded
+        self.render_buffer = None
+        self.pending_events = []
+        self.events_lock = threading.Lock()
+        self.ticks = 0
+        if headless:
+            # Must be set before pygame.init so SDL never looks for a real display or audio device
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+            os.environ["SDL_AUDIODRIVER"] = "dummy"
         pygame.init()
-        if c.FULLSCREEN:
-            self.screen = pygame.display.set_mode(c.WINDOW_SIZE, flags=pygame.FULLSCREEN)
+        flags = pygame.FULLSCREEN if c.FULLSCREEN and not headless else 0
+        if pacing_strategy == "vsync" and not headless:
+            try:
+                self.screen = pygame.display.set_mode(c.WINDOW_SIZE, flags | pygame.SCALED, vsync=1)
+            except pygame.error:
+                self.screen = pygame.display.set_mode(c.WINDOW_SIZE, flags)  # The pacer notices flips don't block
         else:
-            self.screen = pygame.display.set_mode(c.WINDOW_SIZE)
-        self.clock = pygame.time.Clock()
+            self.screen = pygame.display.set_mode(c.WINDOW_SIZE, flags)
+        self.pacer = FramePacer(pacing_strategy)
+        self.latency = None
+        if measure_latency:
+            self.latency = LatencyProbe(f"{'threaded' if threaded else 'serial'}, {bands} band(s), {pacing_strategy} pacing")
+        self.allocations = None
+        if count_allocations:
+            self.allocations = AllocationCounter()
+            self.allocations.enable()
+        self.band_renderer = BandRenderer(self.screen, bands) if bands > 1 else None
+        particle_tools.set_time_source(self.game_clock.now)
         self.reticle = pygame.image.load("assets/images/reticle.png")
         pygame.mouse.set_visible(False)
-        Camera.init()
-        SoundManager.init()
+        self.sounds = SoundManager(silent=headless)
+        self.images = ImageCache()
+        sprite_tools.set_image_loader(self.images.load)
+        self.idle = IdleScheduler()
+        self.idle.defer(warm_up(self.images, self.sounds), "warm up")
         self.main_music_started = False
-        self.intro_music = pygame.mixer.Sound("assets/sounds/Music-Intro.mp3")
+        self.intro_music = self.sounds.load("assets/sounds/Music-Intro.mp3")
         self.intro_music.set_volume(0.4)
         self.intro_music.play(-1)
         self.tutorial = False
-        pygame.mixer.set_num_channels(32)
-
-    def main(self):
-        current_frame = Instructions(self)
-        current_frame.load()
-        self.clock.tick(60)
-
-        while True:
-            dt, events = self.get_events()
-            if dt > 0.05:
-                dt = 0.05
-            current_frame.update(dt, events)
-            current_frame.draw(self.screen, (0, 0))
-            self.draw_reticle(self.screen)
-            pygame.display.flip()
+        self.sounds.set_num_channels(32)
+
+    def main(self, first_frame=None, max_ticks=None, load=True):
+        current_frame = first_frame if first_frame else Instructions(self)
+        if load:
+            current_frame.load()
+        if self.threaded:
+            return self.main_threaded(current_frame, max_ticks)
+        self.pacer.reset()
+        accumulator = 0
+        pending_events = []
+
+        while max_ticks is None or self.ticks < max_ticks:
+            if self.game_clock.fast_forward:
+                # Paused, no ticks run, so wait out a frame rather than spin on the same picture
+                paused = self.game_clock.paused
+                _, events = self.get_events(wait=paused)
+                frame_start = time.perf_counter()
+                if not paused:
+                    current_frame.step(c.TICK_DT, events)
+                    self.ticks += 1
+                if self.render_every and self.ticks % self.render_every == 0:
+                    self.present(current_frame)
+            else:
+                frame_time, events = self.get_events()
+                frame_start = time.perf_counter()
+                if frame_time > c.MAX_FRAME_TIME:
+                    frame_time = c.MAX_FRAME_TIME
+                accumulator += self.game_clock.scaled(frame_time)
+                pending_events += events
+
+                # Simulate in fixed ticks; events go to the first tick that runs after they arrive
+                while accumulator >= c.TICK_DT and not current_frame.done:
+                    current_frame.step(c.TICK_DT, pending_events)
+                    pending_events = []
+                    accumulator -= c.TICK_DT
+                    self.ticks += 1
+                self.pacer.mark("update", time.perf_counter() - frame_start)
+
+                self.present(current_frame, accumulator/c.TICK_DT)
+
+            self.idle.run(frame_start)
+            if self.allocations:
+                self.allocations.end_frame()
+            if current_frame.done:
+                current_frame = current_frame.next_frame()
+                current_frame.load()
+                accumulator = 0
+        return current_frame
+
+    def main_threaded(self, current_frame, max_ticks=None):
+        """
+        Runs the simulation on a worker thread, which records each new state into a DrawList, while this thread
+        handles events and pushes the newest list to the screen. A slow draw then delays the next picture, but
+        not the next tick, and the two overlap wherever pygame lets go of the GIL.
+
+        In realtime this thread is paced by self.pacer like main's loop, and shows the newest list each frame, or
+        the last one again if the simulation hasn't published since.
+        """
+        self.render_buffer = RenderBuffer()
+        result = {}
+
+        def simulate():
+            try:
+                result["frame"] = self.simulate(current_frame, max_ticks)
+            except BaseException as error:
+                result["error"] = error
+            finally:
+                self.render_buffer.close()
+
+        simulation = threading.Thread(target=simulate, name="simulation", daemon=True)
+        simulation.start()
+        paced = not self.game_clock.fast_forward
+        self.pacer.reset()
+        while simulation.is_alive():
+            _, events = self.get_events(wait=paced)
+            with self.events_lock:
+                self.pending_events += events
+            if paced:
+                draw_list = self.render_buffer.take(timeout=0) or self.render_buffer.front
+            else:
+                draw_list = self.render_buffer.take(timeout=c.TICK_DT)
+            if draw_list is not None:
+                self.present(draw_list)
+        simulation.join()
+        if "error" in result:
+            raise result["error"]
+        return result["frame"]
+
+    def simulate(self, current_frame, max_ticks=None):
+        """
+        The simulation half of main_threaded: the same fixed tick loop as main, publishing a DrawList to
+        self.render_buffer instead of drawing. Returns the frame that was current when it stopped.
+        """
+        accumulator = 0
+        pending_events = []
+        then = time.perf_counter()
+
+        while max_ticks is None or self.ticks < max_ticks:
+            with self.events_lock:
+                pending_events += self.pending_events
+                self.pending_events = []
+
+            now = time.perf_counter()
+            if self.game_clock.fast_forward:
+                if not self.game_clock.paused:
+                    current_frame.step(c.TICK_DT, pending_events)
+                    pending_events = []
+                    self.ticks += 1
+                if self.render_every and self.ticks % self.render_every == 0:
+                    self.render_buffer.publish(self.record(current_frame))
+                self.idle.run(now)
+                if self.game_clock.paused:
+                    time.sleep(max(0, 1/c.FRAMERATE - (time.perf_counter() - now)))
+            else:
+                accumulator += self.game_clock.scaled(min(now - then, c.MAX_FRAME_TIME))
+                then = now
+                while accumulator >= c.TICK_DT and not current_frame.done:
+                    current_frame.step(c.TICK_DT, pending_events)
+                    pending_events = []
+                    accumulator -= c.TICK_DT
+                    self.ticks += 1
+                self.render_buffer.publish(self.record(current_frame, accumulator/c.TICK_DT))
+                self.idle.run(now)
+                time.sleep(max(0, 1/c.FRAMERATE - (time.perf_counter() - now)))
+            if self.allocations:
+                self.allocations.end_frame()
 
             if current_frame.done:
                 current_frame = current_frame.next_frame()
                 current_frame.load()
+                accumulator = 0
+        return current_frame
+
+    def record(self, frame, alpha=1.0):
+        draw_list = DrawList(self.screen.get_size(), self.ticks)
+        frame.render(draw_list, alpha)
+        return draw_list
+
+    def present(self, frame, alpha=1.0):
+        """ Draws a frame, or replays a DrawList, then the reticle, and flips. """
+        start = time.perf_counter()
+        if self.band_renderer:
+            self.band_renderer.replay(frame if isinstance(frame, DrawList) else self.record(frame, alpha))
+        elif isinstance(frame, DrawList):
+            frame.replay(self.screen)
+        else:
+            frame.render(self.screen, alpha)
+        self.draw_reticle(self.screen)
+        flip_start = time.perf_counter()
+        self.pacer.mark("draw", flip_start - start)
+        if self.latency:
+            self.latency.draw(frame.ticks if isinstance(frame, DrawList) else self.ticks)
+        if not self.headless:
+            pygame.display.flip()
+            self.pacer.flipped(flip_start)
+        if self.latency:
+            self.latency.flip()
 
     def draw_reticle(self, surface, offset=(0, 0)):
         x, y = pygame.mouse.get_pos()
         surface.blit(self.reticle, (x - self.reticle.get_width(), y - self.reticle.get_height()))
 
-    def get_events(self):
-        dt = self.clock.tick(c.FRAMERATE)/1000
-
+    def get_events(self, wait=True):
+        """
+        Returns the real time since the last call, in seconds, along with the pending events.
+        If wait is False, the framerate cap is skipped and no time is reported.
+        """
+        dt = self.pacer.wait() if wait else 0
 
         events = pygame.event.get()
+        if self.latency:
+            self.latency.receive(events)
         for event in events:
             if event.type == pygame.QUIT:
+                self.input_source.close()
                 pygame.quit()
                 sys.exit()
 
-
         return dt, events
 
 
+def parse_args(args=None):
+    parser = argparse.ArgumentParser(description="Play Six Shooter.")
+    parser.add_argument("--seed", type=int, default=None, help="seed for the match's random streams")
+    parser.add_argument("--record", metavar="PATH", help="record every tick of input to PATH")
+    parser.add_argument("--replay", metavar="PATH", help="play back an input recording instead of live input")
+    parser.add_argument("--record-session", metavar="PATH",
+                        help="record a seekable replay, with keyframes, to PATH (view it with replay.py)")
+    parser.add_argument("--bot", action="store_true", help="watch the built in bot play")
+    parser.add_argument("--threaded", action="store_true",
+                        help="simulate on a worker thread and draw on the main one")
+    parser.add_argument("--bands", type=int, default=1,
+                        help="draw the screen as this many horizontal bands, each on its own thread")
+    parser.add_argument("--pacing", choices=STRATEGIES, default="sleep-spin",
+                        help="how to wait for the next frame (default sleep-spin)")
+    parser.add_argument("--frame-report", action="store_true",
+                        help="print frame time and jitter percentiles on exit")
+    parser.add_argument("--latency-report", action="store_true",
+                        help="time input events through to the screen and print the percentiles on exit")
+    parser.add_argument("--allocation-report", action="store_true",
+                        help="count Poses, Surfaces and transforms per frame by caller and print them on exit "
+                             "(slow)")
+    return parser.parse_args(args)
+
+
 if __name__=="__main__":
-    game = Game()
-    game.main()
\ No newline at end of file
+    args = parse_args()
+    seed = args.seed
+    input_source = None
+    if args.replay:
+        input_source = InputPlayback(args.replay)
+        if input_source.tick_rate != c.TICK_RATE:
+            raise ValueError(f"{args.replay} was recorded at {input_source.tick_rate} ticks per second, not {c.TICK_RATE}")
+        seed = input_source.seed
+    else:
+        if seed is None and (args.record or args.record_session):
+            seed = random.randrange(2**32)
+        if args.bot:
+            input_source = BotInput(seed)
+        if args.record:
+            input_source = InputRecorder(args.record, seed, c.TICK_RATE, source=input_source)
+        if args.record_session:
+            input_source = ReplayRecorder(args.record_session, seed, c.TICK_RATE, source=input_source)
+    game = Game(seed=seed, input_source=input_source, threaded=args.threaded, bands=args.bands,
+                pacing_strategy=args.pacing,
+                measure_latency=args.latency_report, count_allocations=args.allocation_report)
+    if args.frame_report:
+        atexit.register(lambda: pacing.print_report(game.pacer.report()))
+    if args.latency_report:
+        atexit.register(lambda: latency.print_report(game.latency.report()))
+    if args.allocation_report:
+        atexit.register(lambda: allocations.print_report(game.allocations.report()))
+    game.main()
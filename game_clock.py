@@ -0,0 +1,33 @@
+class GameClock:
+    """
+    The single source of game time. Everything that animates or simulates should read time from here rather than
+    from the wall clock, so paused, slowed down, fast forwarded and headless runs all see the same timeline.
+    """
+
+    def __init__(self, scale=1.0, fast_forward=False):
+        self.time = 0  # Seconds of game time simulated so far
+        self.scale = scale
+        self.paused = False
+        self.fast_forward = fast_forward
+
+    def now(self):
+        return self.time
+
+    def pause(self):
+        self.paused = True
+
+    def resume(self):
+        self.paused = False
+
+    def set_scale(self, scale):
+        self.scale = scale
+
+    def scaled(self, real_dt):
+        """ Converts real elapsed seconds into game seconds to simulate. """
+        if self.paused:
+            return 0
+        return real_dt * self.scale
+
+    def advance(self, dt):
+        """ Called by GameFrame once per simulation tick with the game time that tick covered. """
+        self.time += dt
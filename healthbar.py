@@ -1,7 +1,6 @@
 import pygame
 import constants as c
 from primitives import Pose
-import time
 import math
 
 
@@ -10,21 +9,22 @@ class BossHealthBar:
 
     def __init__(self, boss):
         self.boss = boss
-        self.background = pygame.image.load("assets/images/boss_bar.png")
-        self.head_bar = pygame.image.load("assets/images/boss_hp.png")
-        self.head_bar_blink = pygame.image.load("assets/images/boss_hp_blink.png")
+        images = boss.world.images
+        self.background = images.load("assets/images/boss_bar.png")
+        self.head_bar = images.load("assets/images/boss_hp.png")
+        self.head_bar_blink = images.load("assets/images/boss_hp_blink.png")
         self.head_bar.set_colorkey((255, 0, 255))
-        self.hand_bar_left = pygame.image.load("assets/images/boss_hand_hp_left.png")
-        self.hand_bar_left_blink = pygame.image.load("assets/images/boss_hand_hp_left_blink.png")
+        self.hand_bar_left = images.load("assets/images/boss_hand_hp_left.png")
+        self.hand_bar_left_blink = images.load("assets/images/boss_hand_hp_left_blink.png")
         self.hand_bar_left_blink.set_colorkey((255, 0, 255))
         self.hand_bar_left.set_colorkey((255, 255, 255))
         self.hand_bar_right = pygame.transform.flip(self.hand_bar_left, 1, 0)
         self.hand_bar_right_blink = pygame.transform.flip(self.hand_bar_left_blink, 1, 0)
-        self.hands = pygame.image.load("assets/images/boss bar hands.png")
+        self.hands = images.load("assets/images/boss bar hands.png")
 
-        self.player_bar = pygame.image.load("assets/images/hp_bar_front.png")
-        self.player_bar_back = pygame.image.load("assets/images/hp_bar_back.png")
-        self.player_bar_front_low = pygame.image.load("assets/images/hp_bar_front_low.png")
+        self.player_bar = images.load("assets/images/hp_bar_front.png")
+        self.player_bar_back = images.load("assets/images/hp_bar_back.png")
+        self.player_bar_front_low = images.load("assets/images/hp_bar_front_low.png")
         self.player_bar.set_colorkey((255, 0, 255))
 
         self.visible = False
@@ -85,4 +85,4 @@ class BossHealthBar:
                 sliver.set_colorkey((255, 0, 255))
                 surface.blit(sliver, (x+w, y))
 
-        surface.blit(self.hands, (bx+3, by + 3*math.sin(time.time()*10)))
\ No newline at end of file
+        surface.blit(self.hands, (bx+3, by + 3*math.sin(self.boss.world.clock.now()*10)))
\ No newline at end of file
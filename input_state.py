@@ -0,0 +1,179 @@
+import gzip
+import math
+import struct
+
+import pygame
+
+import constants as c
+
+
+class InputSnapshot:
+    """
+    Everything the player did during one simulation tick. The Player reads this instead of polling pygame, so
+    the same ticks can be fed back from a recording.
+    """
+
+    UP = 1
+    DOWN = 2
+    LEFT = 4
+    RIGHT = 8
+    FIRE = 16  # Left mouse button held
+    ROLL = 32  # Space pressed this tick
+    RESTART = 64  # R pressed this tick
+
+    record_format = struct.Struct("<Bhh")
+
+    def __init__(self, buttons=0, mouse_position=(0, 0)):
+        self.buttons = buttons
+        self.mouse_position = mouse_position
+
+    def held(self, button):
+        return bool(self.buttons & button)
+
+    @staticmethod
+    def from_pygame(events):
+        buttons = 0
+        pressed = pygame.key.get_pressed()
+        if pressed[pygame.K_w]:
+            buttons |= InputSnapshot.UP
+        if pressed[pygame.K_s]:
+            buttons |= InputSnapshot.DOWN
+        if pressed[pygame.K_a]:
+            buttons |= InputSnapshot.LEFT
+        if pressed[pygame.K_d]:
+            buttons |= InputSnapshot.RIGHT
+        if pygame.mouse.get_pressed()[0]:
+            buttons |= InputSnapshot.FIRE
+        for event in events:
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    buttons |= InputSnapshot.ROLL
+                if event.key == pygame.K_r:
+                    buttons |= InputSnapshot.RESTART
+        return InputSnapshot(buttons, pygame.mouse.get_pos())
+
+    def pack(self):
+        x, y = self.mouse_position
+        return InputSnapshot.record_format.pack(self.buttons, int(x), int(y))
+
+    @staticmethod
+    def unpack(data):
+        buttons, x, y = InputSnapshot.record_format.unpack(data)
+        return InputSnapshot(buttons, (x, y))
+
+    def __eq__(self, other):
+        return isinstance(other, InputSnapshot) and self.buttons == other.buttons \
+            and tuple(self.mouse_position) == tuple(other.mouse_position)
+
+    def __repr__(self):
+        return f"<InputSnapshot buttons:{self.buttons:07b} mouse:{self.mouse_position}>"
+
+
+class LiveInput:
+    """ Reads input from pygame as the player plays. """
+
+    def attach(self, frame):
+        """ Called by each GameFrame as it loads, for sources that need to see the match. """
+        pass
+
+    def poll(self, events):
+        return InputSnapshot.from_pygame(events)
+
+    def close(self):
+        pass
+
+
+class IdleInput:
+    """ Never presses anything. """
+
+    def attach(self, frame):
+        pass
+
+    def poll(self, events):
+        return InputSnapshot()
+
+    def close(self):
+        pass
+
+
+class GatlingSpray:
+    """ Walks in a slow circle while holding fire and sweeping the aim across the screen. """
+
+    def __init__(self):
+        self.ticks = 0
+
+    def attach(self, frame):
+        pass
+
+    def poll(self, events):
+        self.ticks += 1
+        directions = (InputSnapshot.UP, InputSnapshot.LEFT, InputSnapshot.DOWN, InputSnapshot.RIGHT)
+        buttons = directions[(self.ticks // 40) % 4] | InputSnapshot.FIRE
+        angle = self.ticks / 30
+        mouse = (c.WINDOW_WIDTH//2 + int(math.cos(angle) * 600), c.WINDOW_HEIGHT//2 + int(math.sin(angle) * 350))
+        return InputSnapshot(buttons, mouse)
+
+    def close(self):
+        pass
+
+
+class InputRecorder:
+    """
+    Passes input through from another source while writing every tick to a gzipped recording.
+
+    File layout: magic, version, tick rate and seed, then one packed InputSnapshot per tick.
+    """
+
+    magic = b"SSIN"
+    version = 1
+    header_format = struct.Struct("<4sBHQ")
+
+    def __init__(self, path, seed, tick_rate, source=None):
+        self.source = source if source else LiveInput()
+        self.file = gzip.open(path, "wb")
+        self.file.write(InputRecorder.header_format.pack(InputRecorder.magic, InputRecorder.version, tick_rate, seed))
+        self.ticks = 0
+
+    def attach(self, frame):
+        self.source.attach(frame)
+
+    def poll(self, events):
+        snapshot = self.source.poll(events)
+        self.file.write(snapshot.pack())
+        self.ticks += 1
+        return snapshot
+
+    def close(self):
+        self.source.close()
+        self.file.close()
+
+
+class InputPlayback:
+    """ Feeds a recording back one tick at a time, ignoring live input. Once it runs out, returns empty input. """
+
+    def __init__(self, path):
+        with gzip.open(path, "rb") as file:
+            header = file.read(InputRecorder.header_format.size)
+            magic, version, self.tick_rate, self.seed = InputRecorder.header_format.unpack(header)
+            if magic != InputRecorder.magic or version != InputRecorder.version:
+                raise ValueError(f"{path} is not a version {InputRecorder.version} input recording")
+            self.data = file.read()
+        self.size = InputSnapshot.record_format.size
+        self.tick_count = len(self.data) // self.size
+        self.ticks = 0
+
+    def attach(self, frame):
+        pass
+
+    def finished(self):
+        return self.ticks >= self.tick_count
+
+    def poll(self, events):
+        if self.finished():
+            return InputSnapshot()
+        start = self.ticks * self.size
+        self.ticks += 1
+        return InputSnapshot.unpack(self.data[start:start + self.size])
+
+    def close(self):
+        pass
@@ -0,0 +1,120 @@
+"""
+Input to photon latency: how long a mouse or key event takes to reach the simulation, the screen's back buffer,
+and the display.
+"""
+
+import threading
+import time
+
+import pygame
+
+from stats import distribution
+
+# Events followed through the pipeline, by the name they are reported under
+TRACKED = {
+    pygame.MOUSEMOTION: "aim",
+    pygame.MOUSEBUTTONDOWN: "fire",
+    pygame.KEYDOWN: "key",
+}
+LEGS = ("process", "draw", "flip")
+
+
+class LatencyProbe:
+    """
+    Follows input events through the game loop. Each tracked event is stamped when the loop receives it, again
+    when Player.process_inputs first runs after that, again when the first draw including that tick is finished,
+    and last when the flip that shows that draw returns. The reticle is drawn from the live mouse position
+    rather than from a tick, so mouse motion is also timed to the first draw and flip after it arrives, as "reticle".
+
+    Only the reticle is timed until start is called, when a frame that processes input becomes current: before
+    then nothing would process the events, and the first tick after the instructions screen would report
+    seconds of "process" latency for everything that arrived while it was up.
+
+    Events carrying a "posted" attribute, a time.perf_counter() stamp, are timed from then instead of from when the
+    loop received them, which lets synthetic input count the time it spent queued in SDL. Real input can't, so its
+    numbers start at the loop.
+
+    mode: names the pipeline configuration the samples were taken with, for comparing reports
+    """
+
+    def __init__(self, mode="serial"):
+        self.mode = mode
+        self.lock = threading.Lock()  # Events arrive on the main thread but may be processed on the simulation's
+        self.started = False
+        self.received = []  # (kind, origin) waiting for a tick
+        self.processed = []  # (kind, origin, processed, tick) waiting for a draw
+        self.drawn = []  # (kind, origin, processed, drawn) waiting for a flip
+        self.samples = {}  # Kind to a list of (process, draw, flip) latencies in seconds
+
+    def start(self):
+        """ Called when a frame whose ticks call process becomes current. """
+        with self.lock:
+            self.started = True
+
+    def receive(self, events):
+        now = time.perf_counter()
+        with self.lock:
+            for event in events:
+                kind = TRACKED.get(event.type)
+                if kind is None:
+                    continue
+                origin = getattr(event, "posted", now)
+                if self.started:
+                    self.received.append((kind, origin))
+                if kind == "aim":
+                    self.drawn.append(("reticle", origin, None, None))
+
+    def process(self, tick):
+        """ Called from Player.process_inputs during the given tick. """
+        now = time.perf_counter()
+        with self.lock:
+            self.processed += [(kind, origin, now, tick) for kind, origin in self.received]
+            self.received = []
+
+    def draw(self, ticks):
+        """ Called when a draw of the state after ticks ticks is finished, the reticle included. """
+        now = time.perf_counter()
+        with self.lock:
+            waiting = []
+            for kind, origin, processed, tick in self.processed:
+                if tick < ticks:
+                    self.drawn.append((kind, origin, processed, now))
+                else:
+                    waiting.append((kind, origin, processed, tick))
+            self.processed = waiting
+            self.drawn = [(kind, origin, processed, now if drawn is None else drawn)
+                          for kind, origin, processed, drawn in self.drawn]
+
+    def flip(self):
+        """ Called when pygame.display.flip returns, or right after the draw when there is no display. """
+        now = time.perf_counter()
+        with self.lock:
+            for kind, origin, processed, drawn in self.drawn:
+                if drawn is None:
+                    continue
+                legs = (None if processed is None else processed - origin, drawn - origin, now - origin)
+                self.samples.setdefault(kind, []).append(legs)
+            self.drawn = [entry for entry in self.drawn if entry[3] is None]
+
+    def report(self):
+        """ Latency distributions for each kind of input and each leg of the pipeline, in milliseconds. """
+        result = {"mode": self.mode}
+        for kind, samples in sorted(self.samples.items()):
+            result[kind] = {"events": len(samples)}
+            for i, leg in enumerate(LEGS):
+                values = [sample[i] for sample in samples if sample[i] is not None]
+                if values:
+                    result[kind][leg] = distribution(values)
+        return result
+
+
+def print_report(report):
+    print(report["mode"])
+    for kind, legs in report.items():
+        if kind == "mode":
+            continue
+        print(f"  {kind} ({legs['events']} events)")
+        for leg in LEGS:
+            if leg in legs:
+                print(f"    to {leg:>7}: " + ", ".join(f"{key} {value:.2f}" for key, value in legs[leg].items())
+                      + " ms")
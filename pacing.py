@@ -0,0 +1,132 @@
+"""
+Frame pacing: holding each frame of the realtime loop to 1/FRAMERATE seconds, and recording where every frame's
+time went so the pacing can be judged by its jitter instead of by eye.
+"""
+
+import statistics
+import time
+from collections import deque
+
+import pygame
+
+import constants as c
+from stats import distribution
+
+STRATEGIES = ("tick", "busy", "sleep-spin", "vsync")
+FIELDS = ("update", "draw", "flip", "wait")
+
+
+class FramePacer:
+    """
+    Waits out the rest of each frame, by one of several strategies:
+
+    tick: pygame's Clock.tick, which sleeps in whole milliseconds and overshoots by however late the OS wakes it
+    busy: Clock.tick_busy_loop, which spins for the whole wait; precise, but keeps a core busy
+    sleep-spin: sleeps until spin_margin before the deadline, then spins the rest. Deadlines are on a fixed grid,
+        one period apart, so a late wake up shortens the next wait instead of pushing every later frame back
+    vsync: leaves the waiting to a display opened with vsync, whose flip blocks until the next refresh. If flips
+        turn out not to block (no vsync, or no display), paces like sleep-spin on a grid lined up with the flips
+
+    Every frame records how long was spent in update, draw, flip and wait, and the interval since the frame
+    before, for report().
+    """
+
+    def __init__(self, strategy="sleep-spin", framerate=c.FRAMERATE, spin_margin=0.002, history=c.FRAMERATE*60):
+        """
+        strategy: one of STRATEGIES
+        framerate: frames per second to pace to
+        spin_margin: seconds before a deadline that sleep-spin stops sleeping and starts spinning
+        history: how many of the latest frames to keep for report()
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown pacing strategy {strategy!r}, expected one of {', '.join(STRATEGIES)}")
+        self.strategy = strategy
+        self.framerate = framerate
+        self.period = 1/framerate
+        self.spin_margin = spin_margin
+        self.clock = pygame.time.Clock()
+        self.frames = deque(maxlen=history)  # (interval, update, draw, flip, wait) for each frame, in seconds
+        self.current = dict.fromkeys(FIELDS, 0)
+        self.deadline = None
+        self.last = time.perf_counter()  # When the previous wait returned
+        self.last_flip = None
+        self.flip_intervals = deque(maxlen=30)
+        self.cpu_start = time.process_time()
+        self.wall_start = time.perf_counter()
+
+    def reset(self):
+        """ Starts timing afresh, e.g. after a pause in calling wait. """
+        self.clock.tick()
+        self.deadline = None
+        self.last = time.perf_counter()
+
+    def mark(self, name, seconds):
+        """ Adds seconds spent in one of FIELDS to the current frame. """
+        self.current[name] += seconds
+
+    def flipped(self, start):
+        """ Called right after pygame.display.flip, with the time the flip began. """
+        now = time.perf_counter()
+        self.current["flip"] += now - start
+        if self.last_flip is not None:
+            self.flip_intervals.append(now - self.last_flip)
+        self.last_flip = now
+
+    def vsync_blocking(self):
+        """ True if recent flips have been held to the display's refresh rate. """
+        return len(self.flip_intervals) >= 10 and statistics.median(self.flip_intervals) > 0.75 * self.period
+
+    def wait(self):
+        """ Waits until the next frame is due. Returns the seconds since the previous call. """
+        start = time.perf_counter()
+        if self.strategy == "tick":
+            self.clock.tick(self.framerate)
+        elif self.strategy == "busy":
+            self.clock.tick_busy_loop(self.framerate)
+        elif self.strategy == "sleep-spin" or not self.vsync_blocking():
+            self.sleep_until_deadline(start)
+
+        now = time.perf_counter()
+        self.current["wait"] = now - start
+        interval = now - self.last
+        self.frames.append((interval,) + tuple(self.current[name] for name in FIELDS))
+        self.current = dict.fromkeys(FIELDS, 0)
+        self.last = now
+        return interval
+
+    def sleep_until_deadline(self, start):
+        if self.deadline is None or start > self.deadline + self.period:
+            # First frame, or more than a frame behind: start a new grid rather than rushing to catch up
+            anchor = self.last_flip if self.strategy == "vsync" and self.last_flip else start
+            self.deadline = anchor + self.period
+            while self.deadline < start:
+                self.deadline += self.period
+        remaining = self.deadline - start - self.spin_margin
+        if remaining > 0:
+            time.sleep(remaining)
+        while time.perf_counter() < self.deadline:
+            pass
+        self.deadline += self.period
+
+    def report(self):
+        """
+        Distributions of each part of the recorded frames, and of how far frame intervals strayed from the period.
+        """
+        frames = list(self.frames)
+        intervals = [frame[0] for frame in frames]
+        result = {"strategy": self.strategy, "frames": len(frames)}
+        result["interval_ms"] = distribution(intervals)
+        result["jitter_ms"] = distribution([abs(interval - self.period) for interval in intervals])
+        result["late_frames"] = sum(1 for interval in intervals if interval > 1.5 * self.period)
+        for i, name in enumerate(FIELDS):
+            result[f"{name}_ms"] = distribution([frame[i + 1] for frame in frames])
+        result["cpu"] = (time.process_time() - self.cpu_start) / max(time.perf_counter() - self.wall_start, 1e-9)
+        return result
+
+
+def print_report(report):
+    print(f"{report['strategy']}: {report['frames']} frames, {report['late_frames']} late, "
+          f"{report['cpu'] * 100:.0f}% CPU")
+    for name in ("interval", "jitter") + FIELDS:
+        summary = report[f"{name}_ms"]
+        print(f"  {name:>8}: " + ", ".join(f"{key} {value:.2f}" for key, value in summary.items()) + " ms")
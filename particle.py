@@ -1,13 +1,22 @@
 from primitives import Pose
-import random
 import math
 import pygame
 import constants as c
 from pyracy.sprite_tools import Sprite, Animation
+from render_list import blit_alpha, draw_polygon
+import angles
+
+# A spark's outline as (angle, distance) from its center, pointing along +x
+SPARK_CORNERS = [(math.atan2(y, x), math.sqrt(x**2 + y**2)) for x, y in ((3, 0), (0, -0.25), (-2, 0), (0, 0.25))]
+MUZZLE_FLASH_STEP = 5  # Degrees between the angles muzzle flashes are cached at
 
 
 class Particle:
 
+    state_attributes = ("destroyed", "duration", "age", "layer")
+    pose_attributes = ("position", "velocity")
+    sprite_attributes = ()
+
     def __init__(self, position=(0, 0), velocity=(0, 0), duration=1):
         self.position = Pose(position)
         self.velocity = Pose(velocity)
@@ -19,7 +28,7 @@ class Particle:
     def update(self, dt, events):
         if self.destroyed:
             return
-        self.position += self.velocity * dt
+        self.position.add_pose(self.velocity, dt)
         if self.age > self.duration:
             self.destroy()
         self.age += dt
@@ -35,28 +44,32 @@ class Particle:
         self.destroyed = True
 
 
-class Puff(Particle):
+def cut_puff_frames(images):
+    sheet = images.load("assets/images/puff.png")
+    width = sheet.get_width()//3
     surfs = []
-    def __init__(self, position=(0, 0), velocity=None):
-        angle = random.random() * math.pi * 2
+    for i in range(3):
+        new_surf = pygame.Surface((width, sheet.get_height()))
+        new_surf.blit(sheet, (i*-width, 0))
+        new_surf.set_colorkey((255, 0, 255))
+        surfs.append(new_surf)
+    return surfs
+
+
+class Puff(Particle):
+    def __init__(self, position, world, velocity=None):
+        rng = world.rng.cosmetic
+        angle = rng.random() * math.pi * 2
         if not velocity:
-            amt = random.random() * 500
+            amt = rng.random() * 500
             vx = math.cos(angle) * amt
             vy = -math.sin(angle) * amt * 0.5
             velocity = (vx, vy)
         super().__init__((position[0], position[1] + 30), duration=0.5, velocity=velocity)
         self.position += self.velocity*(1/self.velocity.magnitude()) * 30
-        self.age += random.random() * self.duration * 0.5
-        if not Puff.surfs:
-            Puff.surfs = []
-            sheet = pygame.image.load("assets/images/puff.png")
-            width = sheet.get_width()//3
-            for i in range(3):
-                new_surf = pygame.Surface((width, sheet.get_height()))
-                new_surf.blit(sheet, (i*-width, 0))
-                new_surf.set_colorkey((255, 0, 255))
-                Puff.surfs.append(new_surf)
-        self.surf = random.choice(Puff.surfs)
+        self.age += rng.random() * self.duration * 0.5
+        surfs = world.images.get("puff frames", lambda: cut_puff_frames(world.images))
+        self.surf = rng.choice(surfs)
 
     def update(self, dt, events):
         super().update(dt, events)
@@ -75,45 +88,49 @@ class Puff(Particle):
         surf.blit(my_surf, (x, y))
 
 
-class MuzzleFlash(Particle):
-    surf = None
+def muzzle_flash_image(images, angle):
+    """
+    The muzzle flash turned to angle, rounded to a multiple of MUZZLE_FLASH_STEP, and grown to the size it's drawn
+    at. Every flash at that angle shares it, so draw it with blit_alpha rather than changing its alpha.
+    """
+    angle = round(angle / MUZZLE_FLASH_STEP) * MUZZLE_FLASH_STEP % 360
+
+    def build():
+        image = pygame.transform.rotate(images.load("assets/images/muzzle_flash.png"), angle)
+        image.set_colorkey((255, 0, 255))
+        return pygame.transform.scale(image, (image.get_width() * 1.4, image.get_height() * 1.4))
+    return images.get(("muzzle flash", angle), build)
 
-    def __init__(self, position, angle, duration=0.08):
-        if not MuzzleFlash.surf:
-            MuzzleFlash.surf = pygame.image.load("assets/images/muzzle_flash.png")
 
+class MuzzleFlash(Particle):
+
+    def __init__(self, position, world, angle, duration=0.08):
         super().__init__(position, duration=duration)
-        self.surf = pygame.transform.rotate(MuzzleFlash.surf, angle)
-        self.surf.set_colorkey((255, 0, 255))
+        self.surf = muzzle_flash_image(world.images, angle)
         self.layer = c.FOREGROUND
 
     def draw(self, surf, offset=(0, 0)):
-        w = self.surf.get_width() * 1.4 #* (1 - self.through()**2)
-        h = self.surf.get_height() * 1.4#* (1 - self.through()**2)
-        if w < 0 or h < 0:
-            pass
-        my_surf = pygame.transform.scale(self.surf, (w, h))
+        w = self.surf.get_width()
+        h = self.surf.get_height()
         x = -offset[0] - w//2 + self.position.x
         y = -offset[1] - h//2 + self.position.y
-        my_surf.set_alpha(255 * (1-self.through()**2))
-        surf.blit(my_surf, (x, y))
+        blit_alpha(surf, self.surf, (x, y), 255 * (1-self.through()**2))
 
 
 class Casing(Particle):
-    surf = None
 
-    def __init__(self, position, duration=20):
+    state_attributes = Particle.state_attributes + ("z", "z_velocity", "landed")
 
-        x_velocity = (random.random() * 80 + 30) * random.choice((-1, 1))
+    def __init__(self, position, world, duration=20):
+        rng = world.rng.cosmetic
+        x_velocity = (rng.random() * 80 + 30) * rng.choice((-1, 1))
         self.z_velocity = -750
         velocity = Pose((x_velocity, 0))
         self.z = -0
         super().__init__(position, velocity=velocity.get_position(), duration=duration)
         self.landed = False
-        if not Casing.surf:
-            Casing.surf = pygame.image.load("assets/images/casing.png")
-        self.surf = pygame.transform.scale(Casing.surf.copy(), (10, 20))
-        self.random_angle = random.random()*360
+        self.surf = pygame.transform.scale(world.images.load("assets/images/casing.png"), (10, 20))
+        self.random_angle = rng.random()*360
 
     def update(self, dt, events):
         super().update(dt, events)
@@ -136,19 +153,20 @@ class Casing(Particle):
 
 class SparkParticle(Particle):
 
-    def __init__(self, position, velocity=None, duration=0.5, color=(255, 0, 0), scale=40, velocity_scale=1.0):
+    def __init__(self, position, world, velocity=None, duration=0.5, color=(255, 0, 0), scale=40, velocity_scale=1.0):
+        rng = world.rng.cosmetic
         self.color = color
         self.scale = scale
-        velocity_mag = (random.random()**2 * 1600 + 800) * velocity_scale
+        velocity_mag = (rng.random()**2 * 1600 + 800) * velocity_scale
         if not velocity:
-            velocity_angle = random.random() * 2 * math.pi
+            velocity_angle = rng.random() * 2 * math.pi
         else:
-            velocity_angle = math.atan2(velocity[0], velocity[1]) + random.choice((-1, 1))*random.random()**4*math.pi/2
+            velocity_angle = math.atan2(velocity[0], velocity[1]) + rng.choice((-1, 1))*rng.random()**4*math.pi/2
         velocity_x = math.sin(velocity_angle) * velocity_mag
         velocity_y = math.cos(velocity_angle) * velocity_mag
         velocity = velocity_x, velocity_y
         super().__init__(position=position, velocity=velocity, duration=duration)
-        self.age += random.random() * 0.3
+        self.age += rng.random() * 0.3
         self.layer = c.FOREGROUND
 
     def update(self, dt, events):
@@ -159,20 +177,16 @@ class SparkParticle(Particle):
     def draw(self, surf, offset=(0, 0)):
         if self.destroyed:
             return
-        corners = [[3, 0], [0, -0.25], [-2, 0], [0, 0.25]]
-
         angle = math.atan2(self.velocity.y, self.velocity.x)
-
-        scale = self.scale * (1 - self.through())
-        for corner in corners:
-            original_angle = math.atan2(corner[1], corner[0])
-            new_angle = angle - original_angle
-            mag = math.sqrt(corner[0]**2 + corner[1]**2)
-            mag *= scale
-            corner[0] = math.cos(new_angle) * mag
-            corner[1] = math.sin(new_angle) * mag
-            corner[0] += self.position.x - offset[0]
-            corner[1] += self.position.y - offset[1]
-
-        color = tuple([self.color[i] * self.through() + 255 * (1 - self.through()) for i in range(3)])
-        pygame.draw.polygon(surf, color, corners)
+        through = self.through()
+        scale = self.scale * (1 - through)
+        x = self.position.x - offset[0]
+        y = self.position.y - offset[1]
+        corners = []
+        for corner_angle, distance in SPARK_CORNERS:
+            cos, sin = angles.draw_cos_sin(angle - corner_angle)
+            distance *= scale
+            corners.append((cos * distance + x, sin * distance + y))
+
+        color = tuple([self.color[i] * through + 255 * (1 - through) for i in range(3)])
+        draw_polygon(surf, color, corners)
@@ -3,20 +3,26 @@ from primitives import Pose
 import pygame
 import constants as c
 import math
-from camera import Camera
 from particle import Puff,MuzzleFlash,SparkParticle
 from projectile import PistolBullet, Bread, Shuriken
-import random
-from sound_manager import SoundManager
 from enemy import Grunt, BossMan, Hand
+from input_state import InputSnapshot
+import angles
 
 class Player:
 
+    state_attributes = ("since_damage", "dead", "health", "since_roll_finish", "animation_state",
+                        "last_lr_direction", "rolling", "firing", "last_fire", "weapon_mode", "aim_angle",
+                        "arm_angle", "aim_knockback", "knockback_velocity", "since_kick", "stamina_visible")
+    pose_attributes = ("position", "velocity")
+    sprite_attributes = ("sprite", "hand_sprite", "stamina_sprite", "fire_sprite")
+
     def __init__(self, frame):
 
         self.frame = frame
+        self.world = frame.world
         self.position = Pose(c.ARENA_SIZE) * 0.5
-        Camera.position = self.position.copy() - Pose(c.WINDOW_SIZE)*0.5
+        self.world.camera.position = self.position.copy() - Pose(c.WINDOW_SIZE)*0.5
         self.velocity = Pose((0, 0))
         self.sprite = Sprite(12, (0, 0))
         self.hand_sprite = Sprite(12, (0, 0))
@@ -105,7 +111,7 @@ class Player:
         )
 
         self.number_surfs = {
-            mode: pygame.image.load(f"assets/images/{mode}.png") for mode in c.VALID_MODES
+            mode: self.world.images.load(f"assets/images/{mode}.png") for mode in c.VALID_MODES
         }
 
         self.since_roll_finish = 99
@@ -129,7 +135,7 @@ class Player:
         self.knockback_velocity = 0
         self.radius = 40
 
-        self.death_sound = SoundManager.load("assets/sounds/Player-Death.mp3")
+        self.death_sound = self.world.sounds.load("assets/sounds/Player-Death.mp3")
 
         self.shadow = pygame.Surface((self.radius*2, self.radius*2))
         self.shadow.fill((255, 255, 0))
@@ -137,26 +143,26 @@ class Player:
         pygame.draw.circle(self.shadow, (0, 0, 0), (self.radius, self.radius), self.radius)
         self.shadow.set_alpha(60)
 
-        self.take_damage = SoundManager.load("assets/sounds/Taking-Damage.ogg")
+        self.take_damage = self.world.sounds.load("assets/sounds/Taking-Damage.ogg")
 
         self.since_kick = 0
-        self.roll_sound = SoundManager.load("assets/sounds/die_roll.mp3")
-        self.footsteps = [SoundManager.load(f"assets/sounds/Footstep-{rel+1}.mp3") for rel in range(3)]
+        self.roll_sound = self.world.sounds.load("assets/sounds/die_roll.mp3")
+        self.footsteps = [self.world.sounds.load(f"assets/sounds/Footstep-{rel+1}.mp3") for rel in range(3)]
         for step in self.footsteps:
             step.set_volume(0.1)
-        self.shots = [SoundManager.load(f"assets/sounds/Gatling-Gun-{rel+1}.mp3") for rel in range(3)]
+        self.shots = [self.world.sounds.load(f"assets/sounds/Gatling-Gun-{rel+1}.mp3") for rel in range(3)]
         for shot in self.shots:
             shot.set_volume(0.3)
-        self.shurikens = [SoundManager.load(f"assets/sounds/Shuriken-{rel+1}.mp3") for rel in range(3)]
+        self.shurikens = [self.world.sounds.load(f"assets/sounds/Shuriken-{rel+1}.mp3") for rel in range(3)]
         for shuriken in self.shurikens:
             shuriken.set_volume(0.3)
-        self.pistols = [SoundManager.load(f"assets/sounds/Pistol_v2.mp3") for rel in range(3)]
+        self.pistols = [self.world.sounds.load(f"assets/sounds/Pistol_v2.mp3") for rel in range(3)]
         for shot in self.pistols:
             shot.set_volume(0.5)
-        self.flame_bursts = [SoundManager.load(f"assets/sounds/Flame-Burst_v2.ogg") for rel in range(3)]
+        self.flame_bursts = [self.world.sounds.load(f"assets/sounds/Flame-Burst_v2.ogg") for rel in range(3)]
         for shot in self.flame_bursts:
             shot.set_volume(1)
-        self.breads = [SoundManager.load(f"assets/sounds/Bread-{rel+1}.mp3") for rel in range(3)]
+        self.breads = [self.world.sounds.load(f"assets/sounds/Bread-{rel+1}.mp3") for rel in range(3)]
         for shot in self.breads:
             shot.set_volume(0.2)
 
@@ -230,19 +236,20 @@ class Player:
             self.hand_sprite.update(0, events)
         elif not self.rolling and was_rolling:
             self.hand_sprite.update(0, events)
-        mpos = Camera.screen_to_world(pygame.mouse.get_pos())
-        Camera.target = self.position.copy() * 0.8 + mpos * 0.2
+        self.update_hand_animation()
+        mpos = self.world.camera.screen_to_world(self.frame.input.mouse_position)
+        self.world.camera.target = self.position.copy() * 0.8 + mpos * 0.2
         if self.animation_state == c.WALKING:
             self.since_kick += dt
         if self.since_kick > 1/3 and self.velocity.magnitude() > 0:
             self.since_kick -= 1 / 3
             for i in range(3):
                 start_position = self.position + self.velocity * (1/self.velocity.magnitude()) * 30
-                start_position += Pose((random.random() * 10 - 5, random.random() * 10 - 5))
+                start_position += Pose((self.world.rng.cosmetic.random() * 10 - 5, self.world.rng.cosmetic.random() * 10 - 5))
                 start_velocity = self.velocity * -0.3
                 start_velocity.rotate_position(20 * (i-1))
-                self.frame.particles.append(Puff(start_position.get_position(), start_velocity.get_position()))
-                random.choice(self.footsteps).play()
+                self.frame.particles.append(Puff(start_position.get_position(), self.world, start_velocity.get_position()))
+                self.world.rng.cosmetic.choice(self.footsteps).play()
         if self.position.x - self.radius < 0:
             self.position.x = self.radius
         if self.position.x + self.radius > c.ARENA_WIDTH:
@@ -277,15 +284,17 @@ class Player:
         self.death_sound.play()
 
     def process_inputs(self, dt, events):
+        if self.frame.game.latency:
+            self.frame.game.latency.process(self.frame.game.ticks)
         direction = Pose((0, 0))
-        pressed = pygame.key.get_pressed()
-        if pressed[pygame.K_w]:
+        inputs = self.frame.input
+        if inputs.held(InputSnapshot.UP):
             direction += Pose((0, -1))
-        if pressed[pygame.K_s]:
+        if inputs.held(InputSnapshot.DOWN):
             direction += Pose((0, 1))
-        if pressed[pygame.K_a]:
+        if inputs.held(InputSnapshot.LEFT):
             direction += Pose((-1, 0))
-        if pressed[pygame.K_d]:
+        if inputs.held(InputSnapshot.RIGHT):
             direction += Pose((1, 0))
 
         if (self.firing and self.weapon_mode == c.FIRE) or self.dead:
@@ -293,15 +302,12 @@ class Player:
 
         old_state = self.animation_state
 
-        for event in events:
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_SPACE:
-                    if not self.rolling and not self.dead and not self.stamina_visible:
-                        self.roll(direction)
-                if event.key == pygame.K_r and self.dead:
-                    self.frame.restart()
-        mouse_pressed = pygame.mouse.get_pressed()
-        if mouse_pressed[0]:
+        if inputs.held(InputSnapshot.ROLL):
+            if not self.rolling and not self.dead and not self.stamina_visible:
+                self.roll(direction)
+        if inputs.held(InputSnapshot.RESTART) and self.dead:
+            self.frame.restart()
+        if inputs.held(InputSnapshot.FIRE):
             if not self.rolling and not self.firing and not self.dead:
                 self.fire()
 
@@ -352,7 +358,7 @@ class Player:
         if self.velocity.magnitude() > 550 and not self.rolling and not self.frame.damage_flash_alpha > 0:
             self.velocity.scale_to(550)
 
-        self.position += self.velocity * dt
+        self.position.add_pose(self.velocity, dt)
 
     def roll(self, direction):
         self.last_fire = 999
@@ -375,11 +381,11 @@ class Player:
         self.animation_state = c.IDLE
         self.sprite.start_animation("IdleRight")
         for i in range(20):
-            self.frame.particles.append(Puff(self.position.get_position()))
+            self.frame.particles.append(Puff(self.position.get_position(), self.world))
         modes_to_roll = [mode for mode in c.VALID_MODES if mode is not self.weapon_mode]
         if not len(modes_to_roll):
             modes_to_roll = c.VALID_MODES
-        self.weapon_mode = random.choice(modes_to_roll)
+        self.weapon_mode = self.world.rng.gameplay.choice(modes_to_roll)
         self.frame.shake(self.velocity,15)
 
     def draw(self, surface, offset=(0, 0)):
@@ -407,6 +413,7 @@ class Player:
         surface.blit(self.shadow, (self.position.x - offset[0] - self.shadow.get_width()//2,
                                    self.position.y - offset[1] - self.shadow.get_height()//2 + 20))
         self.draw_hand(surface, offset, up=True)
+        self.sprite.set_position(self.position.get_position())
         self.sprite.draw(surface, offset)
         self.draw_hand(surface, offset, up=False)
 
@@ -632,28 +639,23 @@ class Player:
         self.fire_sprite.chain_animation("Idle", "Idle")
         self.fire_sprite.start_animation("Idle", restart_if_active=True)
 
-        self.knife_sound = SoundManager.load("assets/sounds/Knife-2.mp3")
+        self.knife_sound = self.world.sounds.load("assets/sounds/Knife-2.mp3")
         self.knife_sound.set_volume(0.3)
 
     def update_hand(self, dt, events):
-        mpos = pygame.mouse.get_pos()
-        aim_position = Camera.screen_to_world(mpos)
+        mpos = self.frame.input.mouse_position
+        aim_position = self.world.camera.screen_to_world(mpos)
         relative = aim_position - self.position
         relative.scale_to(70)
-        da = self.aim_angle - relative.get_angle_of_position()*180/math.pi
-        da2 = self.aim_angle + 360 - relative.get_angle_of_position()*180/math.pi
-        da3 = self.aim_angle - 360 - relative.get_angle_of_position()*180/math.pi
-        target = (sorted([da, da2, da3], key=lambda x: abs(x)))[0]
+        aim = relative.get_angle_of_position()*180/math.pi
+        target = angles.shortest_difference(self.aim_angle, aim)
         max_change = abs(target)
         change = target * 25 * dt
         if abs(change) > abs(max_change) and target != 0:
             change *= abs(max_change)/abs(change)
         self.aim_angle -= change
 
-        da = self.arm_angle - relative.get_angle_of_position()*180/math.pi
-        da2 = self.arm_angle + 360 - relative.get_angle_of_position()*180/math.pi
-        da3 = self.arm_angle - 360 - relative.get_angle_of_position()*180/math.pi
-        target = (sorted([da, da2, da3], key=lambda x: abs(x)))[0]
+        target = angles.shortest_difference(self.arm_angle, aim)
         amt = target * 100
         if abs(amt) > 1000:
             amt *= 1000/abs(amt)
@@ -662,8 +664,8 @@ class Player:
             amt *= abs(target)/abs(amt)
         self.arm_angle -= amt
 
-        self.arm_angle %= 360
-        self.aim_angle %= 360
+        self.arm_angle = angles.wrap(self.arm_angle)
+        self.aim_angle = angles.wrap(self.aim_angle)
 
         #self.aim_knockback *= 0.000001**dt
         self.aim_knockback += self.knockback_velocity*dt
@@ -679,19 +681,66 @@ class Player:
             if self.velocity.magnitude() > 160:
                 self.velocity.scale_to(160)
 
+    def update_hand_animation(self):
+        """
+        Pick the idle hand animation and angle for the current aim. Lives in update so drawing never changes game
+        state.
+        """
+        if self.rolling or self.dead:
+            return
+        dist = self.aim_distance - self.aim_knockback
+        relative = Pose(angles.direction(self.arm_angle)) * dist
+        if self.weapon_mode == c.GUN and not self.firing:
+            if relative.x < 0:
+                self.hand_sprite.start_animation("GunIdleLeft", restart_if_active=False)
+            else:
+                self.hand_sprite.start_animation("GunIdleRight", restart_if_active=False)
+        if self.weapon_mode == c.GATLING and not self.firing:
+            if relative.x < 0:
+                self.hand_sprite.start_animation("GatlingIdleLeft", restart_if_active=False)
+            else:
+                self.hand_sprite.start_animation("GatlingIdleRight", restart_if_active=False)
+        if self.weapon_mode == c.BREAD and not self.firing:
+            if relative.x < 0:
+                self.hand_sprite.start_animation("BreadIdleLeft", restart_if_active=False)
+            else:
+                self.hand_sprite.start_animation("BreadIdleRight", restart_if_active=False)
+        if self.weapon_mode == c.SHURIKEN and not self.firing:
+            if relative.x < 0:
+                self.hand_sprite.start_animation("ShurikenIdleLeft", restart_if_active=False)
+            else:
+                self.hand_sprite.start_animation("ShurikenIdleRight", restart_if_active=False)
+        if self.weapon_mode == c.FIRE and not self.firing:
+            if relative.x < 0:
+                self.hand_sprite.start_animation("FireIdleLeft", restart_if_active=False)
+            else:
+                self.hand_sprite.start_animation("FireIdleRight", restart_if_active=False)
+            self.fire_sprite.start_animation("Idle", restart_if_active=False)
+        if self.weapon_mode == c.KNIFE and not self.firing:
+            if relative.x < 0:
+                self.hand_sprite.start_animation("KnifeIdleLeft", restart_if_active=False)
+            else:
+                self.hand_sprite.start_animation("KnifeIdleRight", restart_if_active=False)
+
+        sprite_angle = self.aim_angle
+        if (relative.x < 0 and "idle" in self.hand_sprite.active_animation_key.lower()) or ("fire" in self.hand_sprite.active_animation_key.lower() and "left" in self.hand_sprite.active_animation_key.lower()):
+            sprite_angle += 180
+            sprite_angle %= 360
+        self.hand_sprite.set_angle(sprite_angle)
+
     def fire(self):
         if self.last_fire < c.COOLDOWNS[self.weapon_mode]:
             return
 
         self.last_fire = 0
         self.firing = True
-        mpos = pygame.mouse.get_pos()
-        relative = Camera.screen_to_world(mpos) - self.position
+        mpos = self.frame.input.mouse_position
+        relative = self.world.camera.screen_to_world(mpos) - self.position
 
         self.aim_angle = relative.get_angle_of_position()*180/math.pi
         self.aim_knockback = 0
         self.arm_angle = self.aim_angle
-        offset = self.position + Pose((math.cos(self.arm_angle*math.pi/180), -math.sin(self.arm_angle*math.pi/180))) * (self.aim_distance + 28)
+        offset = self.position + Pose(angles.direction(self.arm_angle)) * (self.aim_distance + 28)
         knockback = Pose((0, 0))
 
         if self.weapon_mode == c.GUN:
@@ -700,14 +749,14 @@ class Player:
                 self.hand_sprite.start_animation("GunFireLeft")
             else:
                 self.hand_sprite.start_animation("GunFireRight")
-            self.frame.particles.append(MuzzleFlash(offset.get_position(), self.arm_angle))
+            self.frame.particles.append(MuzzleFlash(offset.get_position(), self.world, self.arm_angle))
             self.frame.projectiles.append(PistolBullet(offset.get_position(), relative.get_position(), self.frame))
-            random.choice(self.pistols).play()
+            self.world.rng.cosmetic.choice(self.pistols).play()
             knockback = relative * -1
             knockback.scale_to(500)
             self.frame.shake(direction=relative, amt=15)
             for i in range(8):
-                self.frame.particles.append(SparkParticle(position=(self.hand_sprite.x, self.hand_sprite.y), velocity=relative.get_position(), duration=0.4, scale=20, color=(255, 180, 0)))
+                self.frame.particles.append(SparkParticle(position=(self.hand_sprite.x, self.hand_sprite.y), velocity=relative.get_position(), duration=0.4, scale=20, color=(255, 180, 0), world=self.world))
         elif self.weapon_mode == c.BREAD:
             self.knockback_velocity = 0
             if relative.x < 0:
@@ -715,7 +764,7 @@ class Player:
             else:
                 self.hand_sprite.start_animation("BreadFireRight")
             self.frame.projectiles.append(Bread(offset.get_position(), relative.get_position(), self.frame))
-            random.choice(self.breads).play()
+            self.world.rng.cosmetic.choice(self.breads).play()
         elif self.weapon_mode == c.GATLING:
             self.knockback_velocity = 200
             if relative.x < 0:
@@ -724,19 +773,14 @@ class Player:
                 self.hand_sprite.start_animation("GatlingFireRight")
             if self.velocity.magnitude() > 200:
                 self.velocity.scale_to(200)
-            muzzle_offset = self.position + Pose((math.cos(self.arm_angle*math.pi/180), -math.sin(self.arm_angle*math.pi/180))) * (self.aim_distance + 155) + Pose((0, 25))
-            particle_offset = self.position + Pose(
-                (math.cos(self.arm_angle * math.pi / 180), -math.sin(self.arm_angle * math.pi / 180))) * (
-                                        self.aim_distance + 125) + Pose((0, 25))
-            spark_offset = self.position + Pose(
-                (math.cos(self.arm_angle * math.pi / 180), -math.sin(self.arm_angle * math.pi / 180))) * (
-                                        self.aim_distance + 5) + Pose((0, 25))
-            bullet_offset = self.position + Pose(
-                (math.cos(self.arm_angle * math.pi / 180), -math.sin(self.arm_angle * math.pi / 180))) * (
-                                        self.aim_distance + 125) + Pose((0, 25)) *0.5
-            self.frame.particles.append(MuzzleFlash(muzzle_offset.get_position(), self.arm_angle, duration=0.03))
+            arm = Pose(angles.direction(self.arm_angle))
+            muzzle_offset = self.position + arm * (self.aim_distance + 155) + Pose((0, 25))
+            particle_offset = self.position + arm * (self.aim_distance + 125) + Pose((0, 25))
+            spark_offset = self.position + arm * (self.aim_distance + 5) + Pose((0, 25))
+            bullet_offset = self.position + arm * (self.aim_distance + 125) + Pose((0, 25)) *0.5
+            self.frame.particles.append(MuzzleFlash(muzzle_offset.get_position(), self.world, self.arm_angle, duration=0.03))
             bullet = PistolBullet(bullet_offset.get_position(), relative.get_position(), self.frame)
-            random.choice(self.shots).play()
+            self.world.rng.cosmetic.choice(self.shots).play()
             bullet.damage = 40
             self.frame.projectiles.append(bullet)
             knockback = relative * -1
@@ -746,10 +790,10 @@ class Player:
                 pass
                 self.frame.particles.append(
                     SparkParticle(position=(particle_offset ).get_position(), velocity=relative.get_position(),
-                                  duration=0.3, scale=25, color=(255, 180, 0)))
+                                  duration=0.3, scale=25, color=(255, 180, 0), world=self.world))
                 self.frame.particles.append(
                     SparkParticle(position=(spark_offset).get_position(), velocity=relative.get_position(),
-                                  duration=0.15, velocity_scale=0.6, scale=20, color=(255, 180, 0)))
+                                  duration=0.15, velocity_scale=0.6, scale=20, color=(255, 180, 0), world=self.world))
         elif self.weapon_mode == c.SHURIKEN:
             self.knockback_velocity = 1500
             if relative.x < 0:
@@ -763,7 +807,7 @@ class Player:
                 self.frame.projectiles.append(Shuriken(offset.get_position(), new_relative.get_position(), self.frame))
             knockback = relative * -1
             knockback.scale_to(500)
-            random.choice(self.shurikens).play()
+            self.world.rng.cosmetic.choice(self.shurikens).play()
         elif self.weapon_mode == c.FIRE:
             self.knockback_velocity = 0
             if relative.x < 0:
@@ -787,7 +831,7 @@ class Player:
                         enemy.take_damage(130)
                         for i in range(16):
                             pos = enemy.position * 0.7 + self.position * 0.3
-                            self.frame.particles.append(SparkParticle(pos.get_position(), duration=0.2, color=(255, 255, 255), velocity_scale=1.5))
+                            self.frame.particles.append(SparkParticle(pos.get_position(), duration=0.2, color=(255, 255, 255), velocity_scale=1.5, world=self.world))
             self.knife_sound.play()
 
         self.velocity += knockback
@@ -799,46 +843,11 @@ class Player:
         if self.rolling or self.dead:
             return
         dist = self.aim_distance - self.aim_knockback
-        relative = Pose((math.cos(self.arm_angle*math.pi/180), -math.sin(self.arm_angle * math.pi/180))) * dist
-        sprite_angle = self.aim_angle
+        relative = Pose(angles.direction(self.arm_angle)) * dist
         if up and relative.y > 0:
             return
         if not up and relative.y <= 0:
             return
-        if (relative.x < 0 and "idle" in self.hand_sprite.active_animation_key.lower()) or ("fire" in self.hand_sprite.active_animation_key.lower() and "left" in self.hand_sprite.active_animation_key.lower()):
-            sprite_angle += 180
-            sprite_angle %= 360
-        if self.weapon_mode == c.GUN and not self.firing:
-            if relative.x < 0:
-                self.hand_sprite.start_animation("GunIdleLeft", restart_if_active=False)
-            else:
-                self.hand_sprite.start_animation("GunIdleRight", restart_if_active=False)
-        if self.weapon_mode == c.GATLING and not self.firing:
-            if relative.x < 0:
-                self.hand_sprite.start_animation("GatlingIdleLeft", restart_if_active=False)
-            else:
-                self.hand_sprite.start_animation("GatlingIdleRight", restart_if_active=False)
-        if self.weapon_mode == c.BREAD and not self.firing:
-            if relative.x < 0:
-                self.hand_sprite.start_animation("BreadIdleLeft", restart_if_active=False)
-            else:
-                self.hand_sprite.start_animation("BreadIdleRight", restart_if_active=False)
-        if self.weapon_mode == c.SHURIKEN and not self.firing:
-            if relative.x < 0:
-                self.hand_sprite.start_animation("ShurikenIdleLeft", restart_if_active=False)
-            else:
-                self.hand_sprite.start_animation("ShurikenIdleRight", restart_if_active=False)
-        if self.weapon_mode == c.FIRE and not self.firing:
-            if relative.x < 0:
-                self.hand_sprite.start_animation("FireIdleLeft", restart_if_active=False)
-            else:
-                self.hand_sprite.start_animation("FireIdleRight", restart_if_active=False)
-            self.fire_sprite.start_animation("Idle", restart_if_active=False)
-        if self.weapon_mode == c.KNIFE and not self.firing:
-            if relative.x < 0:
-                self.hand_sprite.start_animation("KnifeIdleLeft", restart_if_active=False)
-            else:
-                self.hand_sprite.start_animation("KnifeIdleRight", restart_if_active=False)
         if self.weapon_mode == c.KNIFE:
             relative *= 2
         elif self.weapon_mode == c.GATLING:
@@ -849,7 +858,6 @@ class Player:
         if self.weapon_mode == c.GATLING:
             self.hand_sprite.y += 30
 
-        self.hand_sprite.set_angle(sprite_angle)
         self.hand_sprite.update_image()
         self.hand_sprite.draw(surface, offset)
         if self.weapon_mode == c.FIRE and not (self.last_fire < c.COOLDOWNS[c.FIRE] and not self.firing):
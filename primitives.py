@@ -2,6 +2,7 @@
 
 import math
 
+import angles
 
 class GameObject:
     def __init__(self, game):
@@ -15,12 +16,20 @@ class GameObject:
 
 
 class Pose:
+    """
+    A position and angle, and the vector math on them. Operators that return a new Pose (+, -, *) build it
+    directly; the in-place ones (+=, -=, *=) change the Pose they are used on, so only use them on a Pose nothing
+    else holds on to.
+    """
+
+    __slots__ = ("x", "y", "angle")
+
     def __init__(self, position, angle=0):
         """ Initialize the Pose.
             position: two-length tuple (x, y)
             angle: angle, in degrees counterclockwise from right ->
         """
-        self.set_position(position)
+        self.x, self.y = position
         self.angle = angle
 
     def set_x(self, new_x):
@@ -64,18 +73,17 @@ class Pose:
         self.set_angle(self.angle + angle)
 
     def rotate_position(self, angle):
-        x = self.x*math.cos(angle*math.pi/180) \
-            + self.y*math.sin(angle*math.pi/180)
-        y = -self.x*math.sin(angle*math.pi/180) \
-            + self.y*math.cos(angle*math.pi/180)
-        self.set_position((x, y))
+        cos, sin = angles.cos_sin(angle*math.pi/180)
+        self.x, self.y = self.x*cos + self.y*sin, -self.x*sin + self.y*cos
 
     def add_pose(self, other, weight=1, frame=None):
+        """ Adds other times weight to this Pose in place, e.g. position.add_pose(velocity, dt). """
         if frame:
             other = other.copy()
             other.rotate_position(frame.angle)
-        self.add_position(other.get_weighted_position(weight))
-        self.add_angle(other.angle*weight)
+        self.x += other.x*weight
+        self.y += other.y*weight
+        self.angle += other.angle*weight
 
     def distance_to(self, other):
         return (self - other).magnitude()
@@ -90,7 +98,21 @@ class Pose:
         self.angle = 0
 
     def copy(self):
-        return Pose(self.get_position(), self.angle)
+        pose = Pose.__new__(Pose)
+        pose.x = self.x
+        pose.y = self.y
+        pose.angle = self.angle
+        return pose
+
+    def get_state(self):
+        return self.x, self.y, self.angle
+
+    @staticmethod
+    def from_state(state):
+        """ Builds a Pose from a get_state tuple, skipping the setters for speed. """
+        pose = Pose.__new__(Pose)
+        pose.x, pose.y, pose.angle = state
+        return pose
 
     def scale_to(self, magnitude):
         """ Scale the X and Y components of the Pose to have a particular
@@ -105,21 +127,45 @@ class Pose:
         self.y *= magnitude / my_magnitude
 
     def __add__(self, other):
-        copy = self.copy()
-        copy.add_pose(other)
-        return copy
+        pose = Pose.__new__(Pose)
+        pose.x = self.x + other.x
+        pose.y = self.y + other.y
+        pose.angle = self.angle + other.angle
+        return pose
 
     def __sub__(self, other):
-        copy = self.copy()
-        copy.add_pose(other, weight=-1)
-        return copy
-
-    def __mul__(self, other):
-        copy = self.copy()
-        copy.x *= other
-        copy.y *= other
-        copy.angle *= other
-        return copy
+        pose = Pose.__new__(Pose)
+        pose.x = self.x - other.x
+        pose.y = self.y - other.y
+        pose.angle = self.angle - other.angle
+        return pose
+
+    def __mul__(self, scalar):
+        pose = Pose.__new__(Pose)
+        pose.x = self.x*scalar
+        pose.y = self.y*scalar
+        pose.angle = self.angle*scalar
+        return pose
+
+    __rmul__ = __mul__
+
+    def __iadd__(self, other):
+        self.x += other.x
+        self.y += other.y
+        self.angle += other.angle
+        return self
+
+    def __isub__(self, other):
+        self.x -= other.x
+        self.y -= other.y
+        self.angle -= other.angle
+        return self
+
+    def __imul__(self, scalar):
+        self.x *= scalar
+        self.y *= scalar
+        self.angle *= scalar
+        return self
 
     def __pow__(self, other):
         copy = self.copy()
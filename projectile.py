@@ -1,16 +1,19 @@
 from primitives import Pose
 import pygame
 import math
-import random
 import constants as c
 
 from pyracy.sprite_tools import Sprite, Animation
 from particle import Puff, SparkParticle, Casing
+from render_list import blit_alpha
 
 
 class Projectile:
 
-    surf_cache = {}
+    state_attributes = ("destroyed", "age", "radius", "damage", "slowdown", "z")
+    pose_attributes = ("position", "velocity")
+    sprite_attributes = ()
+
     def __init__(self, position, velocity):
         self.position = Pose(position)
         self.velocity = Pose(velocity)
@@ -22,18 +25,12 @@ class Projectile:
         self.z = 0
 
     def update(self, dt, events):
-        self.position += self.velocity * dt
+        self.position.add_pose(self.velocity, dt)
         self.age += dt
 
     def draw(self, surface, offset=(0, 0)):
         pass
 
-    @classmethod
-    def load_surf(cls, path):
-        if not path in cls.surf_cache:
-            cls.surf_cache[path] = pygame.image.load(path)
-        return cls.surf_cache[path]
-
     def on_impact(self):
         pass
 
@@ -43,21 +40,24 @@ class Projectile:
 
 class PistolBullet(Projectile):
 
+    sprite_attributes = ("sprite",)
+
     def __init__(self, position, direction, frame):
         self.frame = frame
+        self.world = frame.world
 
         super().__init__(position, direction)
 
         casing_position = Pose(position) * 0.25 + self.frame.player.position * 0.75
-        self.frame.particles.append(Casing(casing_position.get_position()))
+        self.frame.particles.append(Casing(casing_position.get_position(), self.world))
 
         if self.velocity.magnitude() == 0:
             self.velocity = Pose((1, 0))
         angle = self.velocity.get_angle_of_position()
-        angle += random.random() * math.pi/15 - math.pi/30
+        angle += self.world.rng.gameplay.random() * math.pi/15 - math.pi/30
         self.velocity = Pose((math.cos(angle), -math.sin(angle)))
         self.velocity.scale_to(4000)
-        self.surf = self.load_surf("assets/images/bullet.png")
+        self.surf = self.world.images.load("assets/images/bullet.png")
         anim = Animation(self.surf, (3, 1), 3)
         self.sprite = Sprite(12, self.position.get_position())
         self.sprite.add_animation({"Bullet": anim}, loop=True)
@@ -84,20 +84,25 @@ class PistolBullet(Projectile):
     def hit(self, enemy):
         super().hit(enemy)
         for i in range(12):
-            self.frame.particles.append(SparkParticle(self.position.get_position(), velocity=(self.velocity * -1).get_position(), duration=0.25, color=(255, 255, 255), scale=30))
+            self.frame.particles.append(SparkParticle(self.position.get_position(), velocity=(self.velocity * -1).get_position(), duration=0.25, color=(255, 255, 255), scale=30, world=self.world))
         enemy.velocity += (self.velocity - enemy.velocity) * 0.1
 
 class Bread(Projectile):
+
+    state_attributes = Projectile.state_attributes + ("angle", "spin_speed", "zvel", "landed", "bounced")
+    sprite_attributes = ("sprite",)
+
     def __init__(self, position, direction, frame):
         self.frame = frame
+        self.world = frame.world
         super().__init__(position, direction)
         if self.velocity.magnitude() == 0:
             self.velocity = Pose((1, 0))
         angle = self.velocity.get_angle_of_position()
-        angle += random.random() * math.pi/15 - math.pi/30
+        angle += self.world.rng.gameplay.random() * math.pi/15 - math.pi/30
         self.velocity = Pose((math.cos(angle), -math.sin(angle)))
         self.velocity.scale_to(600)
-        self.surf = self.load_surf("assets/images/bread.png")
+        self.surf = self.world.images.load("assets/images/bread.png")
         anim = Animation(self.surf, (7, 1), 1)
         self.sprite = Sprite(12, self.position.get_position())
         self.sprite.add_animation({"Bread": anim}, loop=True)
@@ -106,7 +111,7 @@ class Bread(Projectile):
         if self.velocity.x < 0:
             self.angle += 180
         self.sprite.set_angle(angle)
-        self.spin_speed = random.random()*100 + 260 * random.choice([-1, 1])
+        self.spin_speed = self.world.rng.cosmetic.random()*100 + 260 * self.world.rng.cosmetic.choice([-1, 1])
         self.zvel = -500
         self.z = 0
         self.radius = 25
@@ -127,9 +132,9 @@ class Bread(Projectile):
             if self.velocity.magnitude() > 0:
                 self.velocity = Pose((0, 0))
                 for i in range(7):
-                    self.frame.particles.append(Puff((self.position + Pose((0, -20))).get_position()))
+                    self.frame.particles.append(Puff((self.position + Pose((0, -20))).get_position(), self.world))
                 self.landed = True
-                random.choice(self.frame.player.breads).play()
+                self.world.rng.cosmetic.choice(self.frame.player.breads).play()
             self.spin_speed = 0
             self.angle = -30
 
@@ -143,7 +148,7 @@ class Bread(Projectile):
         self.bounced = True
         self.velocity *= -0.8
         self.zvel = -200
-        random.choice(self.frame.player.breads).play()
+        self.world.rng.cosmetic.choice(self.frame.player.breads).play()
 
 
 
@@ -165,15 +170,19 @@ class Bread(Projectile):
 
 class Shuriken(Projectile):
 
+    state_attributes = Projectile.state_attributes + ("angle", "spin_speed", "alpha")
+    sprite_attributes = ("sprite",)
+
     def __init__(self, position, direction, frame):
         self.frame = frame
+        self.world = frame.world
         super().__init__(position, direction)
         if self.velocity.magnitude() == 0:
             self.velocity = Pose((1, 0))
         angle = self.velocity.get_angle_of_position()
         self.velocity = Pose((math.cos(angle), -math.sin(angle)))
         self.velocity.scale_to(2000)
-        self.surf = self.load_surf("assets/images/shuriken.png")
+        self.surf = self.world.images.load("assets/images/shuriken.png")
         anim = Animation(self.surf, (1, 1), 1)
         self.sprite = Sprite(12, self.position.get_position())
         self.sprite.add_animation({"Bullet": anim}, loop=True)
@@ -191,7 +200,13 @@ class Shuriken(Projectile):
         x = self.position.x
         y = self.position.y
         self.sprite.set_position((x, y))
-        self.sprite.draw(surface, offset)
+        if not self.sprite.image:
+            self.sprite.image = self.sprite.get_image()
+        image = self.sprite.image
+        # As Sprite.draw would, but fading without changing the image a DrawList may still be holding
+        x = int(x - image.get_width()/2 - offset[0])
+        y = int(y - image.get_height()/2 - offset[1])
+        blit_alpha(surface, image, (x, y), self.alpha)
 
     def update(self, dt, events):
         self.velocity *= 0.0001**dt
@@ -202,11 +217,10 @@ class Shuriken(Projectile):
             self.spin_speed *= 0.001**dt
             self.alpha -= 500*dt
         self.sprite.set_angle(self.angle)
-        self.sprite.image.set_alpha(self.alpha)
         if self.alpha < 0:
             self.destroyed = True
 
     def hit(self, enemy):
         super().hit(enemy)
         for i in range(12):
-            self.frame.particles.append(SparkParticle(self.position.get_position(), duration=0.25, color=(128, 135, 160), scale=20))
\ No newline at end of file
+            self.frame.particles.append(SparkParticle(self.position.get_position(), duration=0.25, color=(128, 135, 160), scale=20, world=self.world))
\ No newline at end of file
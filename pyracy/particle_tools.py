@@ -8,6 +8,16 @@ import random
 import time
 from math import sin, cos, pi
 
+#   Function returning the current time in seconds. Games with their own clock
+#   can swap this out with set_time_source.
+time_source = time.time
+
+
+def set_time_source(source):
+    """ Makes particles read the time from source() instead of time.time(). """
+    global time_source
+    time_source = source
+
 ################################################################################
 ########################## PARTICLE DEFINITION #################################
 ################################################################################
@@ -26,7 +36,7 @@ class Particle(object):
         self.pos = pos
 
         #   Some initial values
-        self.created_at = time.time()
+        self.created_at = time_source()
         self.anim_speed = 1.0   #   Alter this to slow/speed the animation
         self.behaviors = []
 
@@ -7,6 +7,16 @@ import pygame
 import time
 import sys
 
+#   Function loading an image file into a surface. Games that cache their images
+#   can swap this out with set_image_loader.
+image_loader = pygame.image.load
+
+
+def set_image_loader(loader):
+    """ Makes Animation.from_path load sheets with loader(path) instead of pygame.image.load. """
+    global image_loader
+    image_loader = loader
+
 
 class Animation(object):
     """
@@ -44,7 +54,7 @@ class Animation(object):
         """
         Initializes an Animation from a file path rather than a pygame surface.
         """
-        return Animation(pygame.image.load(path), *args, **kwargs)
+        return Animation(image_loader(path), *args, **kwargs)
 
     def split(self, surface, sheet_size, frame_count, rect=None, scale=1.0):
         """
@@ -270,6 +280,19 @@ class Sprite(pygame.sprite.Sprite):
         """ Sets the position of the sprite on the screen. """
         self.x, self.y = pos
 
+    def get_state(self):
+        """
+        Returns the animation state of the sprite as a tuple of plain values, for saving and restoring.
+        Animations and callbacks are not included, so set_state expects a sprite built the same way. Position
+        is left out too, since owners set it before drawing.
+        """
+        return self.active_animation_key, self.now, self.paused, self.angle
+
+    def set_state(self, state):
+        """ Restores a state returned by get_state. """
+        self.active_animation_key, self.now, self.paused, self.angle = state
+        self.image = None
+
     def add_callback(self, animation_key, callback, args=None, kwargs=None, temporary=False):
         """
         Adds a callback to be called when the specified animation finishes. For instance, you can schedule a cleanup
@@ -0,0 +1,220 @@
+"""
+Draw lists: a frame drawn into a DrawList is recorded as blit, fill, polygon and overlay commands instead of
+touching any pixels, so the drawing itself can happen later, on another thread, or into several target surfaces.
+"""
+
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+BLIT, FILL, POLYGON, OVERLAY = range(4)
+
+alpha_copies = weakref.WeakKeyDictionary()  # Surface to (alpha, a copy of it at that alpha) for DrawList.blit
+solids = threading.local()  # Each thread's full size single color surfaces for overlays, by size and color
+
+
+class DrawList:
+    """
+    Stands in for the screen while a frame draws, and records what was drawn as a list of commands that can be
+    replayed onto a real surface. Once recorded, a DrawList never changes.
+
+    Surfaces are recorded by reference, and the list may be replayed while the next frame is drawing, so nothing
+    may change a surface after it has been recorded: not its pixels, its alpha or its colorkey. Code that draws a
+    shared surface at an alpha that changes from frame to frame uses blit_alpha, which records a copy at that
+    alpha, and fades the whole screen with draw_overlay, which records only a color and an alpha.
+    """
+
+    def __init__(self, size, ticks=None):
+        """
+        size: size of the surface being stood in for
+        ticks: how many ticks the recorded state had run, for whoever replays it
+        """
+        self.size = tuple(size)
+        self.ticks = ticks
+        self.commands = []
+
+    def get_size(self):
+        return self.size
+
+    def get_width(self):
+        return self.size[0]
+
+    def get_height(self):
+        return self.size[1]
+
+    def get_rect(self):
+        return pygame.Rect((0, 0), self.size)
+
+    def blit(self, source, dest, area=None, special_flags=0, alpha=None):
+        """ alpha: draw source at this per-surface alpha instead of its own, without changing source """
+        if alpha is not None and source.get_alpha() != alpha:
+            source = alpha_copy(source, alpha)
+        # Truncated the way pygame would, since a band's offset can move a position below zero
+        self.commands.append((BLIT, source, (int(dest[0]), int(dest[1])), area, special_flags))
+
+    def fill(self, color, rect=None, special_flags=0):
+        self.commands.append((FILL, color, rect, special_flags))
+
+    def polygon(self, color, points):
+        self.commands.append((POLYGON, color, [(int(point[0]), int(point[1])) for point in points]))
+
+    def overlay(self, color, alpha):
+        """ Covers the whole surface in color at the given alpha. """
+        self.commands.append((OVERLAY, color, alpha))
+
+    def replay(self, surface, offset=(0, 0)):
+        """
+        Draws every command onto surface, moved up and left by offset, so a band of the screen can be drawn into
+        a surface of its own. Blits that land wholly above or below surface are skipped.
+        """
+        ox, oy = offset
+        height = surface.get_height()
+        blits = []
+        for command in self.commands:
+            kind = command[0]
+            if kind == BLIT:
+                _, source, (x, y), area, special_flags = command
+                y -= oy
+                if y >= height or y + (area[3] if area else source.get_height()) <= 0:
+                    continue
+                blits.append((source, (x - ox, y), area, special_flags))
+                continue
+            if blits:
+                surface.blits(blits, doreturn=False)
+                blits = []
+            if kind == FILL:
+                _, color, rect, special_flags = command
+                if rect is not None:
+                    rect = pygame.Rect(rect).move(-ox, -oy)
+                surface.fill(color, rect, special_flags)
+            elif kind == OVERLAY:
+                _, color, alpha = command
+                surface.blit(solid(surface.get_size(), color, alpha), (0, 0))
+            else:
+                _, color, points = command
+                pygame.draw.polygon(surface, color, [(x - ox, y - oy) for x, y in points])
+        if blits:
+            surface.blits(blits, doreturn=False)
+
+
+class BandRenderer:
+    """
+    Replays DrawLists onto a surface split into horizontal bands, one subsurface each, with every band drawn by a
+    worker thread. Bands never overlap, so the result is the same as replaying onto the whole surface.
+
+    This only runs in parallel where the blits and fills run without the GIL; pygame 2.6 holds it for both.
+    """
+
+    def __init__(self, surface, bands=4):
+        self.surface = surface
+        width, height = surface.get_size()
+        self.bands = []
+        for i in range(bands):
+            top = height * i // bands
+            bottom = height * (i + 1) // bands
+            self.bands.append((surface.subsurface((0, top, width, bottom - top)), (0, top)))
+        self.pool = ThreadPoolExecutor(bands, thread_name_prefix="band") if bands > 1 else None
+
+    def replay(self, draw_list):
+        if not self.pool:
+            draw_list.replay(self.surface)
+            return
+        for future in [self.pool.submit(draw_list.replay, band, offset) for band, offset in self.bands]:
+            future.result()
+
+    def close(self):
+        if self.pool:
+            self.pool.shutdown()
+
+
+def draw_polygon(surface, color, points):
+    """ pygame.draw.polygon, for code that might be drawing into a DrawList. """
+    if isinstance(surface, DrawList):
+        surface.polygon(color, points)
+    else:
+        pygame.draw.polygon(surface, color, points)
+
+
+def alpha_copy(source, alpha):
+    """
+    A copy of source with its per-surface alpha set to alpha. The latest one made for each source is kept, since
+    fades often hold one alpha for many frames, and is never changed once made.
+    """
+    cached = alpha_copies.get(source)
+    if cached is not None and cached[0] == alpha:
+        return cached[1]
+    copy = source.copy()
+    copy.set_alpha(alpha)
+    alpha_copies[source] = (alpha, copy)
+    return copy
+
+
+def solid(size, color, alpha):
+    """ This thread's surface of the given size filled with color, its alpha set to alpha. """
+    if not hasattr(solids, "surfaces"):
+        solids.surfaces = {}
+    key = (tuple(size), tuple(color))
+    surface = solids.surfaces.get(key)
+    if surface is None:
+        surface = solids.surfaces[key] = pygame.Surface(size)
+        surface.fill(color)
+    surface.set_alpha(alpha)
+    return surface
+
+
+def blit_alpha(surface, source, dest, alpha):
+    """
+    Draws source at the given per-surface alpha, for code that might be drawing into a DrawList. Either way source
+    is left as it was.
+    """
+    if isinstance(surface, DrawList):
+        surface.blit(source, dest, alpha=alpha)
+    else:
+        previous = source.get_alpha()
+        source.set_alpha(alpha)
+        surface.blit(source, dest)
+        source.set_alpha(previous)
+
+
+def draw_overlay(surface, color, alpha):
+    """ Covers surface, or a DrawList, in color at the given alpha, like blitting a filled surface at that alpha. """
+    if isinstance(surface, DrawList):
+        surface.overlay(color, alpha)
+    else:
+        surface.blit(solid(surface.get_size(), color, alpha), (0, 0))
+
+
+class RenderBuffer:
+    """
+    Double buffer between a simulation thread that publishes DrawLists and a render thread that draws them. The
+    simulation fills the back slot while the renderer draws the front one; take swaps them. Only the newest list
+    is kept, so a slow renderer skips states instead of falling behind.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.back = None
+        self.front = None
+        self.closed = False
+
+    def publish(self, draw_list):
+        with self.condition:
+            self.back = draw_list
+            self.condition.notify()
+
+    def take(self, timeout=None):
+        """ Waits for a list newer than the last one taken and returns it, or None on timeout or close. """
+        with self.condition:
+            if self.back is None and not self.closed:
+                self.condition.wait(timeout)
+            if self.back is None:
+                return None
+            self.front, self.back = self.back, None
+            return self.front
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
@@ -0,0 +1,257 @@
+"""
+Seekable session replays.
+
+A replay is a series of chunks, each holding a keyframe (the full GameFrame.get_state at the chunk's first tick)
+followed by the input for every tick until the next keyframe. An index at the end of the file maps chunk start
+ticks to file offsets, so seeking to any tick restores the nearest earlier keyframe and simulates at most one
+keyframe interval of input, however long the session.
+
+File layout (little endian):
+    header:  magic "SSRP", version u8, tick rate u16, seed u64, keyframe interval u32
+    chunk:   keyframe length u32, input length u32, zlib(JSON keyframe), zlib(input deltas)
+    index:   zlib(JSON [[start tick, offset, tick count], ...])
+    trailer: index offset u64, index length u32, magic "SSIX"
+
+Each tick's input is stored as a delta against the tick before it in the same chunk: a flags byte, then the
+button bits if they changed and the mouse position if it moved.
+
+    python replay.py session.ssrp --seek 14400 --ticks 600
+"""
+
+import argparse
+import json
+import struct
+import time
+import zlib
+
+import constants as c
+from input_state import InputSnapshot, LiveInput
+
+BUTTONS_CHANGED = 1
+MOUSE_CHANGED = 2
+
+header_format = struct.Struct("<4sBHQI")
+chunk_format = struct.Struct("<II")
+trailer_format = struct.Struct("<QI4s")
+buttons_format = struct.Struct("<B")
+mouse_format = struct.Struct("<hh")
+
+MAGIC = b"SSRP"
+INDEX_MAGIC = b"SSIX"
+VERSION = 1
+
+
+def encode_inputs(snapshots):
+    data = bytearray()
+    previous = InputSnapshot()
+    for snapshot in snapshots:
+        flags = 0
+        if snapshot.buttons != previous.buttons:
+            flags |= BUTTONS_CHANGED
+        if tuple(snapshot.mouse_position) != tuple(previous.mouse_position):
+            flags |= MOUSE_CHANGED
+        data.append(flags)
+        if flags & BUTTONS_CHANGED:
+            data += buttons_format.pack(snapshot.buttons)
+        if flags & MOUSE_CHANGED:
+            x, y = snapshot.mouse_position
+            data += mouse_format.pack(int(x), int(y))
+        previous = snapshot
+    return bytes(data)
+
+
+def decode_inputs(data):
+    snapshots = []
+    buttons = 0
+    mouse_position = (0, 0)
+    i = 0
+    while i < len(data):
+        flags = data[i]
+        i += 1
+        if flags & BUTTONS_CHANGED:
+            buttons, = buttons_format.unpack_from(data, i)
+            i += buttons_format.size
+        if flags & MOUSE_CHANGED:
+            mouse_position = mouse_format.unpack_from(data, i)
+            i += mouse_format.size
+        snapshots.append(InputSnapshot(buttons, mouse_position))
+    return snapshots
+
+
+def tuplify(value):
+    """ JSON turns tuples into lists; Random.setstate and friends need them back. """
+    if isinstance(value, list):
+        return tuple([tuplify(item) for item in value])
+    if isinstance(value, dict):
+        return {key: tuplify(item) for key, item in value.items()}
+    return value
+
+
+class ReplayRecorder:
+    """ Input source that passes input through from another source while writing a seekable replay. """
+
+    def __init__(self, path, seed, tick_rate, keyframe_interval=c.TICK_RATE * 10, source=None):
+        self.source = source if source else LiveInput()
+        self.file = open(path, "wb")
+        self.file.write(header_format.pack(MAGIC, VERSION, tick_rate, seed, keyframe_interval))
+        self.keyframe_interval = keyframe_interval
+        self.frame = None
+        self.ticks = 0
+        self.index = []
+        self.keyframe = None
+        self.chunk_inputs = []
+
+    def attach(self, frame):
+        self.frame = frame
+        self.source.attach(frame)
+
+    def poll(self, events):
+        if self.ticks % self.keyframe_interval == 0:
+            self.write_chunk()
+            self.keyframe = self.frame.get_state()
+        snapshot = self.source.poll(events)
+        self.chunk_inputs.append(snapshot)
+        self.ticks += 1
+        return snapshot
+
+    def write_chunk(self):
+        if self.keyframe is None:
+            return
+        keyframe = zlib.compress(json.dumps(self.keyframe, separators=(",", ":")).encode())
+        inputs = zlib.compress(encode_inputs(self.chunk_inputs))
+        start = self.ticks - len(self.chunk_inputs)
+        self.index.append((start, self.file.tell(), len(self.chunk_inputs)))
+        self.file.write(chunk_format.pack(len(keyframe), len(inputs)))
+        self.file.write(keyframe)
+        self.file.write(inputs)
+        self.keyframe = None
+        self.chunk_inputs = []
+
+    def close(self):
+        self.write_chunk()
+        index = zlib.compress(json.dumps(self.index).encode())
+        index_offset = self.file.tell()
+        self.file.write(index)
+        self.file.write(trailer_format.pack(index_offset, len(index), INDEX_MAGIC))
+        self.file.close()
+        self.source.close()
+
+
+class ReplayReader:
+    """
+    Input source that plays a replay back, and can jump the attached GameFrame to any tick with seek.
+    Once the replay runs out, returns empty input.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        magic, version, self.tick_rate, self.seed, self.keyframe_interval = \
+            header_format.unpack(self.file.read(header_format.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} replay")
+        self.file.seek(-trailer_format.size, 2)
+        index_offset, index_length, index_magic = trailer_format.unpack(self.file.read(trailer_format.size))
+        if index_magic != INDEX_MAGIC:
+            raise ValueError(f"{path} has no index; it may not have been closed cleanly")
+        self.file.seek(index_offset)
+        self.index = [tuple(entry) for entry in json.loads(zlib.decompress(self.file.read(index_length)))]
+        self.tick_count = self.index[-1][0] + self.index[-1][2] if self.index else 0
+
+        self.frame = None
+        self.ticks = 0
+        self.chunk_start = None
+        self.chunk_inputs = []
+
+    def attach(self, frame):
+        self.frame = frame
+
+    def finished(self):
+        return self.ticks >= self.tick_count
+
+    def chunk_for(self, tick):
+        """ Index entry of the last chunk starting at or before tick. """
+        entry = self.index[0]
+        for candidate in self.index:
+            if candidate[0] > tick:
+                break
+            entry = candidate
+        return entry
+
+    def read_chunk(self, entry):
+        """ Returns the keyframe and input list of a chunk, and makes it the current one. """
+        start, offset, count = entry
+        self.file.seek(offset)
+        keyframe_length, input_length = chunk_format.unpack(self.file.read(chunk_format.size))
+        keyframe = self.file.read(keyframe_length)
+        self.chunk_inputs = decode_inputs(zlib.decompress(self.file.read(input_length)))
+        self.chunk_start = start
+        return keyframe
+
+    def poll(self, events):
+        if self.finished():
+            return InputSnapshot()
+        if self.chunk_start is None or not 0 <= self.ticks - self.chunk_start < len(self.chunk_inputs):
+            self.read_chunk(self.chunk_for(self.ticks))
+        snapshot = self.chunk_inputs[self.ticks - self.chunk_start]
+        self.ticks += 1
+        return snapshot
+
+    def seek(self, tick):
+        """
+        Puts the attached GameFrame in the state it was in just before tick, and returns it. This reader must be
+        the game's input source, since the ticks between the keyframe and the target are simulated with the
+        recorded input. If the match was restarted in between, the GameFrame returned is the one that followed.
+        """
+        if not 0 <= tick <= self.tick_count:
+            raise ValueError(f"Can't seek to tick {tick} of a {self.tick_count} tick replay")
+        keyframe = self.read_chunk(self.chunk_for(tick))
+        self.frame.set_state(tuplify(json.loads(zlib.decompress(keyframe))))
+        self.ticks = self.chunk_start
+        while self.ticks < tick:
+            self.frame.step(c.TICK_DT, [])
+            if self.frame.done:
+                self.frame.next_frame().load()  # Loading attaches the new frame to this reader
+        assert self.ticks == tick, f"Seeking to tick {tick} stopped at {self.ticks}"
+        return self.frame
+
+    def close(self):
+        self.file.close()
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser(description="Play back part of a Six Shooter replay, headless.")
+    parser.add_argument("path", help="replay file written by game.py --record-session")
+    parser.add_argument("--seek", type=int, default=0, help="tick to start playing from")
+    parser.add_argument("--ticks", type=int, default=None, help="ticks to play after seeking (default to the end)")
+    parser.add_argument("--render-every", type=int, default=0, help="draw every Nth tick (default 0, never draw)")
+    parser.add_argument("--window", action="store_true", help="play in a real window instead of headless")
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    from frame import GameFrame
+    from game import Game
+
+    args = parse_args(args)
+    reader = ReplayReader(args.path)
+    game = Game(headless=not args.window, fast_forward=True, render_every=args.render_every, seed=reader.seed,
+                input_source=reader)
+    frame = GameFrame(game)
+    frame.load()
+
+    start = time.perf_counter()
+    frame = reader.seek(args.seek)
+    seek_time = time.perf_counter() - start
+
+    ticks = args.ticks if args.ticks is not None else reader.tick_count - args.seek
+    game.ticks = reader.ticks
+    start = time.perf_counter()
+    game.main(first_frame=frame, max_ticks=reader.ticks + ticks, load=False)
+    elapsed = time.perf_counter() - start
+    reader.close()
+    print(f"Seeked to tick {args.seek} in {seek_time * 1000:.1f} ms, then played {ticks} ticks "
+          f"in {elapsed:.2f}s, {elapsed / max(ticks, 1) * 1000:.3f} ms/tick")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+import random
+
+
+class WorldRandom:
+    """
+    Seeded random number streams for a single GameFrame.
+
+    Anything that can change the outcome of a match (weapon rolls, boss attacks, bullet spread) draws from
+    gameplay. Particles, clouds and sound variations draw from cosmetic, so adding or removing visual effects
+    never shifts the gameplay sequence.
+    """
+
+    def __init__(self, seed=None):
+        self.seed(seed)
+
+    def seed(self, seed=None):
+        if seed is None:
+            seed = random.randrange(2**32)
+        self.seed_value = seed
+        self.gameplay = random.Random(f"{seed}:gameplay")
+        self.cosmetic = random.Random(f"{seed}:cosmetic")
+
+    def getstate(self):
+        return self.gameplay.getstate(), self.cosmetic.getstate()
+
+    def setstate(self, state):
+        gameplay, cosmetic = state
+        self.gameplay.setstate(gameplay)
+        self.cosmetic.setstate(cosmetic)
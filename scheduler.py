@@ -0,0 +1,68 @@
+"""
+Low priority work that can wait for a frame with time to spare: loading assets before they are first needed,
+building caches, and anything else that must not change what happens in the match.
+"""
+
+import time
+from collections import deque
+
+import constants as c
+
+
+class IdleScheduler:
+    """
+    Queue of deferred jobs, run only in the leftover of each frame's time budget. A job is either a function,
+    called once, or an iterator, advanced one step at a time until it runs out, so long work can be cut into pieces
+    small enough to fit between frames.
+
+    Each step's cost is remembered by job name, and a step is only started if its last cost fits in the time that
+    is left. Jobs must not touch gameplay or cosmetic state, only warm things that would otherwise be built on
+    first use, so the match plays the same whenever they happen to run.
+    """
+
+    def __init__(self, budget=1/c.FRAMERATE, clock=time.perf_counter):
+        """
+        budget: seconds each frame may take, update and draw included
+        clock: function returning the current time in seconds
+        """
+        self.budget = budget
+        self.clock = clock
+        self.jobs = deque()
+        self.costs = {}  # Seconds the last step of each named job took
+        self.ran = 0  # Steps run so far, across every frame
+
+    def defer(self, job, name=None):
+        """ Queues a function or an iterator of steps. Jobs with the same name are assumed to cost the same. """
+        if name is None:
+            name = getattr(job, "__qualname__", type(job).__name__)
+        self.jobs.append((job, name))
+
+    def pending(self):
+        return len(self.jobs)
+
+    def run(self, frame_start):
+        """ Runs queued steps until the budget of the frame that began at frame_start is used up. """
+        deadline = frame_start + self.budget
+        while self.jobs:
+            job, name = self.jobs[0]
+            start = self.clock()
+            if start + self.costs.get(name, 0) > deadline:
+                break
+            self.step(job)
+            self.costs[name] = self.clock() - start
+
+    def finish(self):
+        """ Runs everything still queued, whatever it costs. """
+        while self.jobs:
+            self.step(self.jobs[0][0])
+
+    def step(self, job):
+        self.ran += 1
+        if callable(job):
+            self.jobs.popleft()
+            job()
+            return
+        try:
+            next(job)
+        except StopIteration:
+            self.jobs.popleft()
@@ -0,0 +1,425 @@
+"""
+Runs a GameFrame as an authoritative server over UDP. Clients send their input every tick and get snapshots back.
+
+The first client to send input controls the player; any others watch. A client that sends nothing for
+client_timeout seconds is dropped, and if it was in control, the longest connected client left takes over.
+
+Each snapshot only holds the entities near that client's view (plus the player and boss, always), with positions
+quantized to a quarter pixel and angles to a byte, and is delta compressed against the last snapshot the client
+acknowledged: only fields that changed are sent, and entities that left are listed by id. Particles are cosmetic
+and never sent.
+
+Client to server, one datagram per tick (little endian):
+    input:    type u8, sequence u32, acked snapshot u32, buttons u8, mouse x i16, mouse y i16, view x i16, view y i16
+
+Server to client:
+    snapshot: type u8, snapshot id u32, baseline id u32 (0 for none), tick u32, camera x i16, camera y i16,
+              changed count u16, removed count u16, removed ids (u16 each), then for each changed entity:
+              id u16, field mask u8, then the fields in the mask, in order:
+              kind u8, x i16, y i16, angle u8, health u16, state u8, flags u8
+
+    python server.py --port 7777
+    python server.py --loopback --clients 3 --ticks 1200
+"""
+
+import argparse
+import socket
+import struct
+import time
+import weakref
+
+import constants as c
+from enemy import BossMan, Grunt, Hand
+from frame import GameFrame
+from game import Game
+from input_state import GatlingSpray, InputSnapshot
+from player import Player
+from projectile import Bread, PistolBullet, Shuriken
+
+INPUT = 1
+SNAPSHOT = 2
+
+input_format = struct.Struct("<BIIBhhhh")
+snapshot_header = struct.Struct("<BIIIhhHH")
+id_format = struct.Struct("<H")
+entity_header = struct.Struct("<HB")
+
+# Each field's format, in mask bit order
+FIELDS = ("kind", "x", "y", "angle", "health", "state", "flags")
+field_formats = [struct.Struct(f"<{code}") for code in ("B", "h", "h", "B", "H", "B", "B")]
+KIND, X, Y, ANGLE, HEALTH, STATE, FLAGS = range(len(FIELDS))
+
+kinds = {Player: 1, BossMan: 2, Hand: 3, Grunt: 4, PistolBullet: 5, Bread: 6, Shuriken: 7}
+
+DESTROYED, LETHAL, DAMAGING, RAISED, ROLLING, FIRING, DEAD = (1 << bit for bit in range(7))
+
+MAX_NET_ID = 65535
+POSITION_SCALE = 4  # Quarter pixel positions
+VIEW_MARGIN = 300  # How far outside a client's view entities are still sent
+HISTORY = 32  # Snapshots the server remembers per client, to delta against
+MAX_DATAGRAM = 65507
+
+
+def quantize_position(value):
+    return min(32767, max(-32768, int(round(value * POSITION_SCALE))))
+
+
+def quantize_angle(degrees):
+    return int(round(degrees % 360 / 360 * 256)) % 256
+
+
+def record(obj):
+    """ The quantized fields of one entity, in FIELDS order. """
+    if isinstance(obj, Player):
+        angle = obj.arm_angle
+        state = obj.weapon_mode
+    elif isinstance(obj, BossMan):
+        angle = 0
+        state = obj.boss_mode
+    else:
+        angle = getattr(obj, "angle", None)
+        if angle is None:
+            angle = obj.velocity.get_angle_of_position() * 57.29577951308232
+        state = 0
+    flags = 0
+    for flag, name in ((DESTROYED, "destroyed"), (LETHAL, "lethal"), (DAMAGING, "damaging"), (RAISED, "raised"),
+                       (ROLLING, "rolling"), (FIRING, "firing"), (DEAD, "dead")):
+        if getattr(obj, name, False):
+            flags |= flag
+    health = getattr(obj, "health", 0)
+    return (kinds[type(obj)],
+            quantize_position(obj.position.x), quantize_position(obj.position.y),
+            quantize_angle(angle), min(65535, max(0, int(health))), state, flags)
+
+
+def encode_snapshot(snapshot_id, baseline_id, tick, camera, current, baseline):
+    """ Packs the entities in current (id to record) as changes against baseline, another such dict. """
+    removed = [net_id for net_id in baseline if net_id not in current]
+    body = bytearray()
+    changed = 0
+    for net_id, fields in current.items():
+        previous = baseline.get(net_id)
+        mask = 0
+        for index, value in enumerate(fields):
+            if previous is None or previous[index] != value:
+                mask |= 1 << index
+        if previous is not None:
+            mask &= ~(1 << KIND)  # An entity never changes kind
+        if not mask:
+            continue
+        changed += 1
+        body += entity_header.pack(net_id, mask)
+        for index, value in enumerate(fields):
+            if mask & (1 << index):
+                body += field_formats[index].pack(value)
+    header = snapshot_header.pack(SNAPSHOT, snapshot_id, baseline_id, tick, int(camera[0]), int(camera[1]),
+                                  changed, len(removed))
+    return header + b"".join(id_format.pack(net_id) for net_id in removed) + bytes(body)
+
+
+def decode_snapshot(data, baselines):
+    """
+    Unpacks a snapshot against the baseline it names, looked up in baselines (snapshot id to entity dict).
+    Returns snapshot id, tick, camera position and the full entity dict, or None if the baseline is unknown.
+    """
+    _, snapshot_id, baseline_id, tick, camera_x, camera_y, changed, removed = snapshot_header.unpack_from(data)
+    if baseline_id and baseline_id not in baselines:
+        return None
+    entities = dict(baselines[baseline_id]) if baseline_id else {}
+    offset = snapshot_header.size
+    for i in range(removed):
+        net_id, = id_format.unpack_from(data, offset)
+        offset += id_format.size
+        entities.pop(net_id, None)
+    for i in range(changed):
+        net_id, mask = entity_header.unpack_from(data, offset)
+        offset += entity_header.size
+        fields = list(entities.get(net_id, (0,) * len(FIELDS)))
+        for index, field_format in enumerate(field_formats):
+            if mask & (1 << index):
+                fields[index], = field_format.unpack_from(data, offset)
+                offset += field_format.size
+        entities[net_id] = tuple(fields)
+    return snapshot_id, tick, (camera_x, camera_y), entities
+
+
+class NetworkInput:
+    """
+    Input source fed by the controlling client. Presses (roll, restart) are kept until the next tick reads them,
+    so they aren't lost when several inputs arrive between ticks.
+    """
+
+    presses = InputSnapshot.ROLL | InputSnapshot.RESTART
+
+    def __init__(self):
+        self.latest = InputSnapshot()
+        self.pressed = 0
+
+    def attach(self, frame):
+        pass
+
+    def receive(self, snapshot):
+        self.latest = snapshot
+        self.pressed |= snapshot.buttons & self.presses
+
+    def poll(self, events):
+        snapshot = InputSnapshot(self.latest.buttons | self.pressed, self.latest.mouse_position)
+        self.pressed = 0
+        return snapshot
+
+    def release(self):
+        """ Lets go of everything, for when the controlling client goes away. """
+        self.latest = InputSnapshot(0, self.latest.mouse_position)
+        self.pressed = 0
+
+    def close(self):
+        pass
+
+
+class ClientState:
+    def __init__(self, address):
+        self.address = address
+        self.last_heard = time.monotonic()
+        self.acked = 0
+        self.view = (0, 0)
+        self.sent = {}  # Snapshot id to the entities it held, for the last HISTORY snapshots
+        self.bytes_sent = 0
+        self.snapshots_sent = 0
+
+
+class SimulationServer:
+    """
+    An authoritative match served over UDP.
+
+    address: (host, port) to bind; port 0 picks a free one, see self.address
+    snapshot_every: ticks between snapshots
+    client_timeout: seconds without input after which a client is dropped
+    """
+
+    def __init__(self, address=("127.0.0.1", 0), seed=0, snapshot_every=2, client_timeout=5.0):
+        self.input = NetworkInput()
+        self.game = Game(headless=True, fast_forward=True, render_every=0, seed=seed, input_source=self.input)
+        self.frame = GameFrame(self.game)
+        self.frame.load()
+        self.snapshot_every = snapshot_every
+        self.client_timeout = client_timeout
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(address)
+        self.socket.setblocking(False)
+        self.address = self.socket.getsockname()
+        self.clients = {}
+        self.controller = None
+        self.net_ids = weakref.WeakKeyDictionary()
+        self.live_ids = set()  # Ids of entities still alive; an id goes back into use only once its entity is gone
+        self.next_net_id = 1
+        self.snapshot_id = 0
+        self.ticks = 0
+
+    def receive(self):
+        while True:
+            try:
+                data, address = self.socket.recvfrom(MAX_DATAGRAM)
+            except (BlockingIOError, InterruptedError):
+                return
+            if len(data) != input_format.size or data[0] != INPUT:
+                continue
+            _, sequence, acked, buttons, mouse_x, mouse_y, view_x, view_y = input_format.unpack(data)
+            client = self.clients.get(address)
+            if client is None:
+                client = self.clients[address] = ClientState(address)
+                if self.controller is None:
+                    self.controller = address
+            client.last_heard = time.monotonic()
+            if acked in client.sent and acked > client.acked:
+                client.acked = acked
+            client.view = (view_x, view_y)
+            if address == self.controller:
+                self.input.receive(InputSnapshot(buttons, (mouse_x, mouse_y)))
+
+    def drop_idle_clients(self):
+        """ Forgets clients that haven't sent input for client_timeout, handing control on if need be. """
+        cutoff = time.monotonic() - self.client_timeout
+        for address in [address for address, client in self.clients.items() if client.last_heard < cutoff]:
+            del self.clients[address]
+            if address == self.controller:
+                self.controller = next(iter(self.clients), None)
+                self.input.release()
+
+    def net_id(self, obj):
+        net_id = self.net_ids.get(obj)
+        if net_id is not None:
+            return net_id
+        if len(self.live_ids) >= MAX_NET_ID:
+            raise RuntimeError(f"More than {MAX_NET_ID} entities need net ids at once")
+        net_id = self.next_net_id
+        while net_id in self.live_ids:
+            net_id = net_id % MAX_NET_ID + 1
+        self.next_net_id = net_id % MAX_NET_ID + 1
+        self.net_ids[obj] = net_id
+        self.live_ids.add(net_id)
+        weakref.finalize(obj, self.live_ids.discard, net_id)
+        return net_id
+
+    def visible_entities(self, view):
+        """ Records of the entities a client looking at view (the top left of its screen) should hear about. """
+        left, top = view[0] - VIEW_MARGIN, view[1] - VIEW_MARGIN
+        right, bottom = view[0] + c.WINDOW_WIDTH + VIEW_MARGIN, view[1] + c.WINDOW_HEIGHT + VIEW_MARGIN
+        frame = self.frame
+        entities = {self.net_id(frame.player): record(frame.player)}
+        if frame.boss in frame.enemies:
+            entities[self.net_id(frame.boss)] = record(frame.boss)
+        for obj in frame.enemies + frame.projectiles:
+            if left < obj.position.x < right and top < obj.position.y < bottom:
+                entities[self.net_id(obj)] = record(obj)
+        return entities
+
+    def send_snapshots(self):
+        self.snapshot_id += 1
+        camera = self.frame.world.camera.position
+        for client in self.clients.values():
+            current = self.visible_entities(client.view)
+            baseline_id = client.acked if client.acked in client.sent else 0
+            baseline = client.sent[baseline_id] if baseline_id else {}
+            data = encode_snapshot(self.snapshot_id, baseline_id, self.ticks, (camera.x, camera.y), current, baseline)
+            self.socket.sendto(data, client.address)
+            client.sent[self.snapshot_id] = current
+            client.sent.pop(self.snapshot_id - HISTORY, None)
+            client.bytes_sent += len(data)
+            client.snapshots_sent += 1
+
+    def tick(self):
+        """ Reads pending input, simulates one tick and sends snapshots when due. """
+        self.receive()
+        self.drop_idle_clients()
+        self.frame.step(c.TICK_DT, [])
+        self.ticks += 1
+        if self.frame.done:
+            self.frame = self.frame.next_frame()
+            self.frame.load()
+        if self.ticks % self.snapshot_every == 0:
+            self.send_snapshots()
+
+    def serve_forever(self, realtime=True):
+        next_tick = time.perf_counter()
+        while True:
+            self.tick()
+            if realtime:
+                next_tick += c.TICK_DT
+                delay = next_tick - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+    def close(self):
+        self.socket.close()
+
+
+class SnapshotClient:
+    """
+    Sends input to a SimulationServer and keeps the latest world it described in self.entities (net id to the
+    quantized record). Views follow the server's camera unless set with self.view.
+    """
+
+    def __init__(self, server_address, source=None):
+        self.server_address = server_address
+        self.source = source if source else GatlingSpray()
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(("127.0.0.1", 0))
+        self.socket.setblocking(False)
+        self.sequence = 0
+        self.received = {}  # Snapshot id to entities, kept as baselines for later deltas
+        self.latest = 0
+        self.tick = 0
+        self.camera = (0, 0)
+        self.view = None
+        self.entities = {}
+        self.bytes_received = 0
+
+    def send_input(self):
+        snapshot = self.source.poll([])
+        x, y = snapshot.mouse_position
+        view = self.view if self.view is not None else self.camera
+        self.sequence += 1
+        self.socket.sendto(input_format.pack(INPUT, self.sequence, self.latest, snapshot.buttons, int(x), int(y),
+                                             int(view[0]), int(view[1])), self.server_address)
+
+    def receive(self):
+        while True:
+            try:
+                data = self.socket.recv(MAX_DATAGRAM)
+            except (BlockingIOError, InterruptedError):
+                return
+            if not data or data[0] != SNAPSHOT:
+                continue
+            self.bytes_received += len(data)
+            decoded = decode_snapshot(data, self.received)
+            if decoded is None:
+                continue
+            snapshot_id, tick, camera, entities = decoded
+            self.received[snapshot_id] = entities
+            self.received.pop(snapshot_id - HISTORY * 2, None)
+            if snapshot_id > self.latest:
+                self.latest = snapshot_id
+                self.tick = tick
+                self.camera = camera
+                self.entities = entities
+
+    def close(self):
+        self.socket.close()
+
+
+def run_loopback(clients=2, ticks=1200, seed=0, snapshot_every=2):
+    """
+    Runs a server and several clients in this process over the loopback interface, and checks that what the
+    controlling client sees matches the server. Returns the server and clients for inspection.
+    """
+    server = SimulationServer(seed=seed, snapshot_every=snapshot_every)
+    peers = [SnapshotClient(server.address) for i in range(clients)]
+    for tick in range(ticks):
+        for peer in peers:
+            peer.send_input()
+        server.tick()
+        for peer in peers:
+            peer.receive()
+    return server, peers
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser(description="Serve a Six Shooter match over UDP.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to bind (default 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=7777, help="UDP port (default 7777)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the match (default 0)")
+    parser.add_argument("--snapshot-every", type=int, default=2, help="ticks between snapshots (default 2)")
+    parser.add_argument("--loopback", action="store_true",
+                        help="run scripted clients against a server in this process and report bandwidth")
+    parser.add_argument("--clients", type=int, default=2, help="clients for --loopback (default 2)")
+    parser.add_argument("--ticks", type=int, default=c.TICK_RATE * 20, help="ticks for --loopback")
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    args = parse_args(args)
+    if not args.loopback:
+        server = SimulationServer((args.host, args.port), seed=args.seed, snapshot_every=args.snapshot_every)
+        print(f"Serving on {server.address[0]}:{server.address[1]}")
+        server.serve_forever()
+        return
+
+    start = time.perf_counter()
+    server, peers = run_loopback(args.clients, args.ticks, args.seed, args.snapshot_every)
+    elapsed = time.perf_counter() - start
+    controller = server.clients[server.controller]
+    expected = server.visible_entities(controller.view)
+    seen = next(peer for peer in peers if peer.socket.getsockname() == server.controller).entities
+    print(f"{args.ticks} ticks with {args.clients} clients in {elapsed:.2f}s")
+    for client in server.clients.values():
+        print(f"  {client.address[1]}: {client.snapshots_sent} snapshots, "
+              f"{client.bytes_sent / max(client.snapshots_sent, 1):.0f} bytes each, "
+              f"{client.bytes_sent * c.TICK_RATE / max(args.ticks, 1) / 1024:.1f} KiB/s")
+    print(f"Controlling client's view matches the server: {seen == expected}")
+    server.close()
+    for peer in peers:
+        peer.close()
+
+
+if __name__ == "__main__":
+    main()
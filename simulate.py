@@ -0,0 +1,135 @@
+"""
+Runs the game simulation without a window or audio device.
+
+    python simulate.py --ticks 3600
+    python simulate.py --ticks 36000 --render-every 60
+    python simulate.py --replay fight.ssin
+    python simulate.py --bot --ticks 216000
+"""
+
+import argparse
+import sys
+import time
+
+import constants as c
+from bot import BotInput
+from frame import GameFrame
+from game import Game
+from input_state import InputPlayback, InputRecorder
+import allocations
+from replay import ReplayRecorder
+from state_hash import WorldHasher
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser(description="Run Six Shooter headless, with no display or audio.")
+    parser.add_argument("--ticks", type=int, default=None,
+                        help="number of simulation ticks to run (default one minute of game time, "
+                             "or the length of the replay)")
+    parser.add_argument("--render-every", type=int, default=0,
+                        help="draw every Nth tick to the offscreen surface (default 0, never draw)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed for the match's random streams (default 0)")
+    parser.add_argument("--record", metavar="PATH",
+                        help="record every tick of input to PATH")
+    parser.add_argument("--record-session", metavar="PATH",
+                        help="record a seekable replay, with keyframes, to PATH (view it with replay.py)")
+    parser.add_argument("--replay", metavar="PATH",
+                        help="play back an input recording; its seed overrides --seed")
+    parser.add_argument("--hash-log", metavar="PATH",
+                        help="write a hash of the gameplay state after every tick to PATH")
+    parser.add_argument("--check-hashes", metavar="PATH",
+                        help="compare every tick's gameplay hash against a --hash-log from an earlier run")
+    parser.add_argument("--bot", action="store_true",
+                        help="let the built in bot play instead of leaving the player idle")
+    parser.add_argument("--window", action="store_true",
+                        help="fast forward in a real window instead of headless")
+    parser.add_argument("--threaded", action="store_true",
+                        help="simulate on a worker thread and draw on the main one")
+    parser.add_argument("--bands", type=int, default=1,
+                        help="draw the screen as this many horizontal bands, each on its own thread")
+    parser.add_argument("--allocation-report", action="store_true",
+                        help="count Poses, Surfaces and transforms per tick by caller and print the busiest")
+    parser.add_argument("--allocation-log", metavar="PATH",
+                        help="write the allocation counts to PATH")
+    parser.add_argument("--check-allocations", metavar="PATH",
+                        help="compare the allocation counts against an --allocation-log from an earlier run")
+    return parser.parse_args(args)
+
+
+def run(ticks, render_every=0, headless=True, seed=0, input_source=None, hash_state=False, threaded=False,
+        bands=1, count_allocations=False):
+    """
+    Fast forwards a fresh GameFrame for a number of ticks. Returns the wall time spent, in seconds, the
+    WorldHasher if hash_state is set, and the AllocationCounter if count_allocations is set.
+    """
+    game = Game(headless=headless, fast_forward=True, render_every=render_every, seed=seed,
+                input_source=input_source, hash_state=hash_state, threaded=threaded, bands=bands,
+                count_allocations=count_allocations)
+    start = time.perf_counter()
+    game.main(first_frame=GameFrame(game), max_ticks=ticks)
+    elapsed = time.perf_counter() - start
+    game.input_source.close()
+    if game.allocations:
+        game.allocations.disable()
+    return elapsed, game.hasher, game.allocations
+
+
+def main(args=None):
+    args = parse_args(args)
+    seed = args.seed
+    ticks = args.ticks if args.ticks is not None else c.TICK_RATE * 60
+    input_source = None
+    if args.replay:
+        input_source = InputPlayback(args.replay)
+        seed = input_source.seed
+        if args.ticks is None:
+            ticks = input_source.tick_count
+    else:
+        if args.bot:
+            input_source = BotInput(seed)
+        if args.record:
+            input_source = InputRecorder(args.record, seed, c.TICK_RATE, source=input_source)
+        if args.record_session:
+            input_source = ReplayRecorder(args.record_session, seed, c.TICK_RATE, source=input_source)
+
+    hash_state = bool(args.hash_log or args.check_hashes)
+    count_allocations = bool(args.allocation_report or args.allocation_log or args.check_allocations)
+    elapsed, hasher, counter = run(ticks, render_every=args.render_every, headless=not args.window, seed=seed,
+                                   input_source=input_source, hash_state=hash_state, threaded=args.threaded,
+                                   bands=args.bands, count_allocations=count_allocations)
+    per_tick = elapsed / ticks * 1000 if ticks else 0
+    print(f"Simulated {ticks} ticks ({ticks * c.TICK_DT:.1f}s game time) "
+          f"in {elapsed:.2f}s, {per_tick:.3f} ms/tick")
+
+    if hasher:
+        print(f"Gameplay hash chain: {hasher.chain:016x}")
+        if args.hash_log:
+            hasher.save(args.hash_log)
+        if args.check_hashes:
+            tick = hasher.first_divergence(WorldHasher.load(args.check_hashes))
+            if tick is None:
+                print("Gameplay matches the reference run on every tick")
+            else:
+                print(f"Gameplay diverges from the reference run at tick {tick}")
+                sys.exit(1)
+
+    if counter:
+        report = counter.report()
+        if args.allocation_report:
+            allocations.print_report(report)
+        if args.allocation_log:
+            allocations.save(report, args.allocation_log)
+        if args.check_allocations:
+            found = allocations.regressions(report, allocations.load(args.check_allocations))
+            if not found:
+                print("No site allocates more than in the reference run")
+            else:
+                print("Allocating more than the reference run:")
+                for line in found:
+                    print(f"  {line}")
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Saving and restoring the simulation state of game objects as plain tuples.
+
+A class opts in by listing its attributes:
+    state_attributes: plain values (numbers, bools, strings)
+    pose_attributes: Poses, stored as (x, y, angle)
+    sprite_attributes: pyracy Sprites, stored with Sprite.get_state
+"""
+
+from operator import attrgetter
+
+from primitives import Pose
+
+# Per class getters, built on first use, so saving an object is a few C calls rather than a getattr per attribute
+accessors = {}
+
+
+def tuple_getter(names):
+    """ Like attrgetter, but always returns a tuple, even for zero or one names. """
+    if not names:
+        return lambda obj: ()
+    if len(names) == 1:
+        getter = attrgetter(names[0])
+        return lambda obj: (getter(obj),)
+    return attrgetter(*names)
+
+
+def get_accessors(cls):
+    if cls not in accessors:
+        accessors[cls] = (tuple_getter(cls.state_attributes),
+                          tuple_getter(cls.pose_attributes),
+                          tuple_getter(cls.sprite_attributes))
+    return accessors[cls]
+
+
+def get_state(obj):
+    values, poses, sprites = get_accessors(type(obj))
+    return (values(obj),
+            tuple([pose.get_state() for pose in poses(obj)]),
+            tuple([sprite.get_state() for sprite in sprites(obj)]))
+
+
+def set_state(obj, state):
+    values, poses, sprites = state
+    cls = type(obj)
+    attributes = obj.__dict__
+    attributes.update(zip(cls.state_attributes, values))
+    if poses:
+        attributes.update(zip(cls.pose_attributes, map(Pose.from_state, poses)))
+    for name, sprite_state in zip(cls.sprite_attributes, sprites):
+        attributes[name].set_state(sprite_state)
@@ -0,0 +1,210 @@
+"""
+Runs the game headless for a long session, sampling how many objects of each type the match holds, how much
+surface memory they use, and the process's resident memory, then flags anything that keeps growing.
+
+    python soak.py --hours 4 --csv soak.csv
+    python soak.py --replay session.ssin --interval 10
+
+Exits with status 1 if any series grew steadily over the session.
+"""
+
+import argparse
+import csv
+import gc
+import os
+import sys
+import time
+import types
+
+import pygame
+
+import constants as c
+from bot import BotInput
+from frame import GameFrame
+from game import Game
+from input_state import InputPlayback
+from pyracy.sprite_tools import Sprite
+
+# Not followed when walking the object graph, so the walk stays inside the match instead of crawling the interpreter
+SKIP_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.CodeType, types.FrameType)
+
+
+def census(roots):
+    """
+    Walks everything reachable from roots. Returns a count of objects by type name, the bytes of pixel data held
+    by distinct surfaces, and the number of temporary callbacks waiting on sprites.
+    """
+    seen = set()
+    pending = list(roots)
+    counts = {}
+    surface_bytes = 0
+    temporary_callbacks = 0
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen or isinstance(obj, SKIP_TYPES):
+            continue
+        seen.add(id(obj))
+        name = type(obj).__name__
+        counts[name] = counts.get(name, 0) + 1
+        if isinstance(obj, pygame.Surface):
+            surface_bytes += obj.get_width() * obj.get_height() * obj.get_bytesize()
+        elif isinstance(obj, Sprite):
+            temporary_callbacks += sum(len(callbacks) for callbacks in obj.animation_temporary_callbacks.values())
+        pending.extend(gc.get_referents(obj))
+    return counts, surface_bytes, temporary_callbacks
+
+
+def resident_bytes():
+    """
+    Current resident set size, or the peak where /proc isn't available, or None where neither is (Windows, which
+    has no resource module).
+    """
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def sample(game, frame):
+    """ One row of measurements for the frame as it stands. """
+    counts, surface_bytes, temporary_callbacks = census([game, frame])
+    row = {
+        "ticks": game.ticks,
+        "list:particles": len(frame.particles),
+        "list:projectiles": len(frame.projectiles),
+        "list:enemies": len(frame.enemies),
+        "list:clouds": len(frame.background.clouds),
+        "sprite temporary callbacks": temporary_callbacks,
+        "surface bytes": surface_bytes,
+    }
+    rss = resident_bytes()
+    if rss is not None:
+        row["rss bytes"] = rss
+    for name, count in counts.items():
+        row[f"objects:{name}"] = count
+    return row
+
+
+def growing(values, windows=4):
+    """ True if the peak of every stretch of the series is higher than the one before it. """
+    if len(values) < windows * 2:
+        return False
+    size = len(values) // windows
+    peaks = [max(values[i * size:(i + 1) * size]) for i in range(windows)]
+    return all(later > earlier for earlier, later in zip(peaks, peaks[1:]))
+
+
+def find_growth(rows, min_growth=20, min_bytes_growth=1 << 20, warmup=1):
+    """
+    Series that grew steadily across the session, as (name, first value, last value), biggest growth first.
+    Samples before warmup are ignored, since the first minute of a match fills caches and pools.
+    """
+    rows = rows[warmup:]
+    names = set()
+    for row in rows:
+        names.update(row)
+    names.discard("ticks")
+    flagged = []
+    for name in names:
+        values = [row.get(name, 0) for row in rows]
+        threshold = min_bytes_growth if name.endswith("bytes") else min_growth
+        if values and values[-1] - values[0] >= threshold and growing(values):
+            flagged.append((name, values[0], values[-1]))
+    flagged.sort(key=lambda flag: flag[1] - flag[2])
+    return flagged
+
+
+def soak(game, seconds=None, ticks=None, interval=30, progress=None):
+    """
+    Runs game, fast forwarded, sampling every interval seconds of game time until either seconds of wall time
+    or ticks ticks have passed, or a replay runs out. Returns the samples.
+    """
+    frame = GameFrame(game)
+    frame.load()
+    rows = [sample(game, frame)]
+    start = time.perf_counter()
+    step = max(1, int(interval * c.TICK_RATE))
+    while True:
+        if seconds is not None and time.perf_counter() - start >= seconds:
+            break
+        if ticks is not None and game.ticks >= ticks:
+            break
+        if hasattr(game.input_source, "finished") and game.input_source.finished():
+            break
+        target = game.ticks + step if ticks is None else min(ticks, game.ticks + step)
+        frame = game.main(first_frame=frame, max_ticks=target, load=False)
+        rows.append(sample(game, frame))
+        if progress:
+            progress(rows[-1], time.perf_counter() - start)
+    return rows
+
+
+def print_progress(row, elapsed):
+    rss = f"{row['rss bytes'] / 2**20:7.1f} MiB" if "rss bytes" in row else "unavailable"
+    print(f"{elapsed / 60:7.1f} min  tick {row['ticks']:>9}  particles {row['list:particles']:>5}  "
+          f"projectiles {row['list:projectiles']:>4}  clouds {row['list:clouds']:>3}  "
+          f"callbacks {row['sprite temporary callbacks']:>4}  surfaces {row['surface bytes'] / 2**20:7.1f} MiB  "
+          f"rss {rss}")
+
+
+def write_csv(rows, path):
+    names = ["ticks"] + sorted({name for row in rows for name in row} - {"ticks"})
+    with open(path, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=names, restval=0)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser(description="Soak test Six Shooter and look for memory growth.")
+    parser.add_argument("--hours", type=float, default=None, help="wall clock hours to run (default one)")
+    parser.add_argument("--ticks", type=int, default=None, help="stop after this many ticks instead")
+    parser.add_argument("--interval", type=float, default=30,
+                        help="seconds of game time between samples (default 30)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the match and the bot (default 0)")
+    parser.add_argument("--replay", metavar="PATH", help="play an input recording instead of the bot")
+    parser.add_argument("--render-every", type=int, default=60,
+                        help="draw every Nth tick offscreen, so drawing code is soaked too (default 60, 0 never)")
+    parser.add_argument("--csv", metavar="PATH", help="write every sample to PATH")
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    args = parse_args(args)
+    if args.replay:
+        input_source = InputPlayback(args.replay)
+        seed = input_source.seed
+    else:
+        input_source = BotInput(args.seed)
+        seed = args.seed
+    seconds = args.hours * 3600 if args.hours is not None else None
+    if seconds is None and args.ticks is None:
+        seconds = 3600
+
+    game = Game(headless=True, fast_forward=True, render_every=args.render_every, seed=seed,
+                input_source=input_source)
+    rows = soak(game, seconds=seconds, ticks=args.ticks, interval=args.interval, progress=print_progress)
+    input_source.close()
+    if args.csv:
+        write_csv(rows, args.csv)
+
+    flagged = find_growth(rows)
+    if not flagged:
+        print(f"No steady growth over {len(rows)} samples")
+        return
+    hours = (rows[-1]["ticks"] - rows[0]["ticks"]) * c.TICK_DT / 3600
+    print(f"Steady growth over {len(rows)} samples:")
+    for name, first, last in flagged:
+        print(f"  {name}: {first} -> {last} ({(last - first) / max(hours, 1e-9):.0f} per game hour)")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
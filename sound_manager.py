@@ -1,53 +1,85 @@
 import pygame
 
 
-class SoundManager:
+class SilentSound:
     """
-    Static class to handle loading of pygame surfaces to improve performance
+    Stands in for a pygame Sound when there is no audio device, e.g. in headless runs
     """
 
-    initialized = False
-    sounds = None
+    def __init__(self, path=None):
+        self.path = path
+        self.volume = 1.0
+
+    def play(self, loops=0, maxtime=0, fade_ms=0):
+        return None
+
+    def stop(self):
+        pass
+
+    def fadeout(self, time):
+        pass
 
-    @staticmethod
-    def init():
-        SoundManager.initialized = True
-        SoundManager.sounds = {}
+    def set_volume(self, value):
+        self.volume = value
+
+    def get_volume(self):
+        return self.volume
+
+
+class SoundManager:
+    """
+    Loads pygame sounds once and hands out shared references. Each World holds one, or shares one with other worlds.
+    """
 
-    @staticmethod
-    def check_initialized():
-        if not SoundManager.initialized:
-            raise Exception("Must call ImageHandler.init() before any other methods.")
+    def __init__(self, silent=False):
+        """
+        :param silent: If True, never touch pygame.mixer and hand out SilentSounds instead
+        """
+        self.silent = silent
+        self.sounds = {}
 
-    @staticmethod
-    def clear(path):
+    def clear(self, path):
         """
         Forgets one thing.
         :param path: The path of the file to remove from memory
         :return:
         """
-        SoundManager.check_initialized()
-        if path in SoundManager.sounds:
-            del SoundManager.sounds[path]
+        if path in self.sounds:
+            del self.sounds[path]
 
-    @staticmethod
-    def clear_all():
+    def clear_all(self):
         """
         Forgets everything
         """
-        SoundManager.check_initialized()
-        SoundManager.sounds = {}
+        self.sounds = {}
 
-    @staticmethod
-    def load(path):
+    def load(self, path):
         """
-        Loads a surface from file or from cache
-        :param path: The path of the image
-        :return: The surface. This is likely the same reference others are using, so don't be destructive.
+        Loads a sound from file or from cache
+        :param path: The path of the sound
+        :return: The sound. This is likely the same reference others are using, so don't be destructive.
         """
-        SoundManager.check_initialized()
-        if path in SoundManager.sounds:
-            return SoundManager.sounds[path]
-        sound = pygame.mixer.Sound(path)
-        SoundManager.sounds[path] = sound
+        if path in self.sounds:
+            return self.sounds[path]
+        if self.silent:
+            sound = SilentSound(path)
+        else:
+            sound = pygame.mixer.Sound(path)
+        self.sounds[path] = sound
         return sound
+
+    def play_music(self, path, volume=1.0, loops=-1):
+        """
+        Streams a music track through pygame.mixer.music, unless silent
+        :param path: The path of the music file
+        """
+        if self.silent:
+            return
+        pygame.mixer.music.load(path)
+        pygame.mixer.music.play(loops=loops)
+        pygame.mixer.music.set_volume(volume)
+
+    def set_num_channels(self, count):
+        if self.silent:
+            return
+        pygame.mixer.set_num_channels(count)
@@ -0,0 +1,91 @@
+"""
+Per tick fingerprints of the gameplay state, for checking that an optimization didn't change how a match plays out.
+
+Each tick's hash covers the player, boss, hands, grunts, projectiles, the GameFrame's own timers and flashes, and
+the gameplay random stream. Particles, clouds and the cosmetic stream are left out, so purely visual changes
+keep the same hashes.
+"""
+
+import array
+import hashlib
+
+import snapshot
+
+MASK = 2**64 - 1
+
+
+def digest(data):
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+class WorldHasher:
+    """
+    Keeps a hash of every tick plus a chain over the whole run.
+
+    Every tick reads the full state of every hashed object again, so the cost grows with the number of objects,
+    not with how many changed. Reading is not skipped for objects that look unchanged: nearly everything moves or
+    ages every tick, and a change the hasher didn't see would defeat the point of it. What is saved is digesting:
+    each object's contribution is cached with the state it came from, and blake2b only runs again when that state
+    differs. Contributions are summed, so objects can come and go without touching the others' digests. Updating
+    the hash from the places that change state (dirty marks on Pose, health writes) would skip the reading too, but
+    every Pose and attribute write in the game would have to report in, and one that didn't would go unnoticed.
+
+    The cache holds on to each object until the next tick, so a cached id can't be reused by a new object.
+    """
+
+    def __init__(self):
+        self.cache = {}
+        self.history = []
+        self.chain = 0
+
+    def object_digest(self, obj, cache):
+        state = snapshot.get_state(obj)
+        cached = self.cache.get(id(obj))
+        if cached is not None and cached[0] is obj and cached[1] == state:
+            value = cached[2]
+        else:
+            value = digest(repr((type(obj).__name__, state)).encode())
+        cache[id(obj)] = (obj, state, value)
+        return value
+
+    def update(self, frame):
+        """ Hashes the frame as it stands after a tick, and returns that tick's hash. """
+        cache = {}
+        total = self.object_digest(frame, cache) + self.object_digest(frame.player, cache)
+        for position, enemy in enumerate(frame.enemies):
+            # Order matters for collisions, so mix in each enemy's place in the list
+            total += self.object_digest(enemy, cache) * (2*position + 1)
+        # The boss only joins the enemies once the intro is over, and a dead hand leaves them; count each part once
+        for boss_part in [frame.boss, *frame.boss.hands]:
+            if id(boss_part) not in cache:
+                total += self.object_digest(boss_part, cache)
+        for projectile in frame.projectiles:
+            total += self.object_digest(projectile, cache)
+        self.cache = cache
+
+        rng_state = frame.world.rng.gameplay.getstate()[1]
+        total += digest(array.array("Q", rng_state).tobytes())
+
+        tick_hash = total & MASK
+        self.history.append(tick_hash)
+        self.chain = digest(self.chain.to_bytes(8, "little") + tick_hash.to_bytes(8, "little"))
+        return tick_hash
+
+    def save(self, path):
+        with open(path, "w") as file:
+            for tick_hash in self.history:
+                file.write(f"{tick_hash:016x}\n")
+
+    @staticmethod
+    def load(path):
+        with open(path) as file:
+            return [int(line, 16) for line in file if line.strip()]
+
+    def first_divergence(self, expected):
+        """ Index of the first tick whose hash differs from the expected list, or None if they agree. """
+        for tick, (mine, theirs) in enumerate(zip(self.history, expected)):
+            if mine != theirs:
+                return tick
+        if len(self.history) != len(expected):
+            return min(len(self.history), len(expected))
+        return None
@@ -0,0 +1,22 @@
+"""
+Summaries of timing samples, shared by the batch runner, frame pacing and latency reports.
+"""
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def percentile(ordered, pct):
+    """ Nearest rank percentile of an already sorted list. """
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def distribution(times):
+    """ Summary of a list of durations in seconds, reported in milliseconds. """
+    if not times:
+        return {}
+    ordered = sorted(times)
+    result = {f"p{pct:g}": percentile(ordered, pct) * 1000 for pct in PERCENTILES}
+    result["mean"] = sum(ordered) / len(ordered) * 1000
+    result["max"] = ordered[-1] * 1000
+    return result
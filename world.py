@@ -0,0 +1,58 @@
+import pygame
+
+from camera import Camera
+from game_clock import GameClock
+from rng import WorldRandom
+from sound_manager import SoundManager
+
+
+class ImageCache:
+    """
+    Surfaces loaded or built once and shared by every object in a world
+    """
+
+    def __init__(self):
+        self.surfaces = {}
+
+    def load(self, path):
+        """
+        Loads an image from file or from cache
+        :param path: The path of the image
+        :return: The surface. This is likely the same reference others are using, so don't be destructive.
+        """
+        if path not in self.surfaces:
+            self.surfaces[path] = pygame.image.load(path)
+        return self.surfaces[path]
+
+    def get(self, key, build):
+        """
+        Returns whatever is cached under key, calling build() to make it the first time
+        """
+        if key not in self.surfaces:
+            self.surfaces[key] = build()
+        return self.surfaces[key]
+
+    def clear_all(self):
+        self.surfaces = {}
+
+
+class World:
+    """
+    Everything one match owns that used to live on classes: the camera, random streams, game clock, and loaded
+    sounds and images. Each GameFrame makes its own, and objects in the match reach it through frame.world, so
+    several matches can run side by side in one process and go away cleanly when their frame does.
+    """
+
+    def __init__(self, seed=None, clock=None, sounds=None, images=None):
+        """
+        seed: seed for the random streams, or None for a different match every time
+        clock: the GameClock to read game time from (default a new one)
+        sounds: a SoundManager to share with other worlds (default a new silent one)
+        images: an ImageCache to share with other worlds (default a new one)
+        """
+        self.camera = Camera()
+        self.rng = WorldRandom(seed)
+        self.clock = clock if clock else GameClock()
+        self.sounds = sounds if sounds else SoundManager(silent=True)
+        self.images = images if images else ImageCache()
+